@@ -4,28 +4,78 @@ Coupon Sentinel - FastAPI Backend
 Main API application with endpoints for:
 - Shopping list optimization
 - Store/coupon/item listings
+- Saved lists kept optimized in the background
+- Deal alert rules and their outbox
+- Receipt ingestion and rebate claims
+- Community price submissions
 - Health checks
 """
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from contextlib import asynccontextmanager
 from typing import List, Optional
+from datetime import datetime
+import asyncio
+import json
+import threading
 
-from .models import OptimizeRequest, OptimizeResponse, ShoppingItem
+from .models import (
+    AckAlertsRequest, FrontierResponse, ListEditBatch, OptimizeRequest, OptimizeResponse,
+    PriceSubmissionBatch, RebateClaimUpdate, SaveListRequest, ShoppingItem, WatchRule
+)
 from .engines import optimize_shopping_list
-from .providers import get_mock_store_items, get_mock_coupons, SUPPORTED_STORES
+from .engines.pricing_engine import optimize_as_available
+from .engines.pareto import optimize_frontier
+from .providers import (
+    get_catalog, current_catalog, apply_item_prices, subscribe, unsubscribe, SUPPORTED_STORES,
+    StoreFailure, get_provider_hub, current_provider_hub, close_http_client,
+)
+from .providers.locations import get_locality_index
+from .engines.locality import DEFAULT_RADIUS_MILES, MAX_RADIUS_MILES
+from .engines.catalog_index import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from .engines.suggest import MAX_SUGGESTIONS
+from .http_cache import catalog_response
+from .compression import COMPRESS_MIN_SIZE, DYNAMIC_GZIP_LEVEL, DynamicGZipMiddleware
+from .storage.price_history import get_price_history
+from .engines.price_prediction import get_prediction_table
+from .engines.reoptimize import ReoptimizeScheduler
+from .storage.saved_lists import get_saved_lists
+from .engines.optimize_sessions import SessionRegistry, OptimizationSession
+from .engines.deal_alerts import DealAlertEngine
+from .storage.deal_alerts import get_deal_alerts
+from .engines.receipts import ReceiptWorker
+from .storage.receipts import CLAIM_STATUSES, TERMINAL_STATUSES, get_receipt_store
+from .engines.community_prices import BufferFull, CommunityPriceIngestor
+from .storage.community_prices import get_community_prices
 
 
 # ============================================================================
 # App Setup
 # ============================================================================
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background catalog subscribers with the app and stop them on shutdown."""
+    get_list_scheduler()
+    get_deal_engine()
+    get_receipt_worker()
+    get_price_ingestor()
+    yield
+    stop_list_scheduler()
+    stop_receipt_worker()
+    stop_price_ingestor()
+    await close_http_client()
+
+
 app = FastAPI(
     title="Coupon Sentinel API",
     description="Extreme couponing, automated. Find the cheapest way to fulfill your shopping list.",
     version="0.1.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # CORS middleware for frontend
@@ -37,6 +87,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Routes served through http_cache.catalog_response, which compresses (and
+# precompresses) their bodies itself
+CATALOG_ROUTES = ("/api/stores", "/api/items", "/api/coupons", "/api/categories", "/api/suggest")
+
+# Compress dynamic responses
+app.add_middleware(
+    DynamicGZipMiddleware,
+    exclude_paths=CATALOG_ROUTES,
+    minimum_size=COMPRESS_MIN_SIZE,
+    compresslevel=DYNAMIC_GZIP_LEVEL,
+)
+
 
 # ============================================================================
 # Health Check
@@ -57,6 +119,25 @@ async def health_check():
     }
 
 
+@app.get("/api/diagnostics")
+async def diagnostics():
+    """
+    Cache and ingestion stats for components already running.
+    
+    Never loads the catalog or starts anything; components not created
+    yet are reported as null.
+    """
+    hub = current_provider_hub()
+    catalog = current_catalog()
+    ingestor = _price_ingestor
+    return {
+        "provider_cache": hub.cache.stats if hub else None,
+        "price_zones": catalog.zones.stats() if catalog else None,
+        "best_buys": catalog.best_buys.stats() if catalog else None,
+        "community_prices": {**ingestor.stats, "buffered": ingestor.buffered} if ingestor else None
+    }
+
+
 # ============================================================================
 # Main Optimization Endpoint
 # ============================================================================
@@ -72,104 +153,706 @@ async def optimize(request: OptimizeRequest):
     if not request.shopping_list:
         raise HTTPException(status_code=400, detail="Shopping list cannot be empty")
     
-    # Load data (in production, this would come from real sources)
-    store_items = get_mock_store_items()
-    coupons = get_mock_coupons()
+    # Load data (in production, this would come from real sources),
+    # priced at the shopper's nearest location of each chain
+    locality = get_locality_index()
+    view = get_catalog().zones.for_request(request, locality)
     
     # Run optimization
-    result = optimize_shopping_list(request, store_items, coupons)
+    result = optimize_shopping_list(
+        request, view.store_items, view.coupons,
+        matcher=view.matcher, mixer=view.mixer,
+        predictions=get_prediction_table(), locality=locality,
+        best_buys=view.best_buys
+    )
     
     return result
 
 
+@app.post("/api/optimize/stream")
+async def optimize_stream(request: OptimizeRequest):
+    """
+    Optimize against live provider data, streaming results as stores answer.
+    
+    Responds with newline-delimited JSON: one line per store loaded, each
+    carrying the best result so far. The line with `"final": true` covers
+    every store that answered; stores whose provider failed are listed
+    under `stores_failed`.
+    """
+    if not request.shopping_list:
+        raise HTTPException(status_code=400, detail="Shopping list cannot be empty")
+    
+    hub = get_provider_hub()
+    locality = get_locality_index()
+    stores = request.preferred_stores or hub.stores
+    
+    # Don't fetch stores with no location near the shopper
+    nearby = locality.chains_near_zip(request.zip_code, request.radius_miles)
+    if nearby is not None:
+        stores = [s for s in stores if s.lower() in nearby]
+    loaded: List[str] = []
+    failed: dict = {}
+    
+    async def batches():
+        async for result in hub.iter_stores(stores, request.zip_code):
+            if isinstance(result, StoreFailure):
+                failed[result.store] = result.error
+                continue
+            loaded.append(result.store)
+            yield result.items, result.coupons
+    
+    def line(result: Optional[OptimizeResponse]) -> str:
+        return json.dumps({
+            "stores_loaded": list(loaded),
+            "stores_failed": dict(failed),
+            "final": len(loaded) + len(failed) == len(stores),
+            "result": result.model_dump(mode="json") if result else None
+        }) + "\n"
+    
+    async def stream():
+        last = None
+        final_sent = False
+        async for result in optimize_as_available(request, batches(), locality=locality):
+            last = result
+            text = line(result)
+            final_sent = len(loaded) + len(failed) == len(stores)
+            yield text
+        if not final_sent:
+            yield line(last)
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.post("/api/optimize/frontier", response_model=FrontierResponse)
+async def optimize_frontier_endpoint(request: OptimizeRequest):
+    """
+    Plans that trade total cost against stores visited and brand preference.
+    
+    Returns the Pareto frontier, cheapest first: every plan is better than
+    each other plan on at least one of cost, number of stores and items
+    bought outside their `brand_preference` (entries with `flexible: false`
+    are never substituted). `allow_multi_store` is ignored.
+    """
+    if not request.shopping_list:
+        raise HTTPException(status_code=400, detail="Shopping list cannot be empty")
+    
+    locality = get_locality_index()
+    view = get_catalog().zones.for_request(request, locality)
+    plans = optimize_frontier(
+        request, view.store_items, view.coupons,
+        matcher=view.matcher, mixer=view.mixer,
+        predictions=get_prediction_table(), locality=locality
+    )
+    return FrontierResponse(plans=plans)
+
+
 # ============================================================================
 # Data Listing Endpoints
 # ============================================================================
 
 @app.get("/api/stores")
-async def list_stores():
+async def list_stores(request: Request):
     """List all supported stores."""
-    return {
+    return catalog_response(request, get_catalog(), lambda: {
         "stores": SUPPORTED_STORES,
         "count": len(SUPPORTED_STORES)
+    })
+
+
+@app.get("/api/stores/nearby")
+async def nearby_stores(
+    zip: str = Query(..., pattern="^[0-9]{5}$", description="Zip code"),
+    radius: float = Query(DEFAULT_RADIUS_MILES, gt=0, le=MAX_RADIUS_MILES, description="Radius in miles")
+):
+    """Store locations within a radius of a zip code, nearest first."""
+    nearby = get_locality_index().near_zip(zip, radius)
+    if nearby is None:
+        raise HTTPException(status_code=404, detail=f"Unknown zip code: {zip}")
+    
+    store_zones = get_catalog().zones.store_zones
+    return {
+        "zip_code": zip,
+        "radius_miles": radius,
+        "stores": [
+            {
+                **n.location._asdict(),
+                "price_zone": store_zones.get(n.location.store_id),
+                "distance_miles": n.distance_miles
+            }
+            for n in nearby
+        ],
+        "count": len(nearby)
     }
 
 
+@app.post("/api/stores/{store_id}/optimize", response_model=OptimizeResponse)
+async def optimize_at_store(store_id: str, request: OptimizeRequest):
+    """Optimize a shopping list at one store location, with its own prices."""
+    if not request.shopping_list:
+        raise HTTPException(status_code=400, detail="Shopping list cannot be empty")
+    
+    catalog = get_catalog()
+    location = get_locality_index().by_id.get(store_id)
+    if location is None or store_id not in catalog.zones.store_zones:
+        raise HTTPException(status_code=404, detail=f"Unknown store: {store_id}")
+    
+    view = catalog.zones.view([store_id])
+    at_store = request.model_copy(update={
+        "preferred_stores": [location.chain],
+        "allow_multi_store": False,
+    })
+    return optimize_shopping_list(
+        at_store, view.store_items, view.coupons,
+        matcher=view.matcher, mixer=view.mixer,
+        predictions=get_prediction_table(), best_buys=view.best_buys
+    )
+
+
 @app.get("/api/items")
 async def list_items(
+    request: Request,
     store: Optional[str] = Query(None, description="Filter by store name"),
-    category: Optional[str] = Query(None, description="Filter by category")
+    category: Optional[str] = Query(None, description="Filter by category"),
+    sort: Optional[str] = Query(None, description="Sort by: unit_price, price, name"),
+    order: str = Query("asc", pattern="^(asc|desc)$", description="Sort direction"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page")
 ):
-    """List available items, optionally filtered by store or category."""
-    items = get_mock_store_items()
+    """List available items, optionally filtered, sorted and paginated."""
+    catalog = get_catalog()
+    
+    def build():
+        try:
+            page = catalog.page_items(
+                store=store, category=category, sort=sort, descending=order == "desc",
+                limit=limit, cursor=cursor, fields=fields
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        return {
+            "items": page.rows,
+            "count": len(page.rows),
+            "total": page.total,
+            "next_cursor": page.next_cursor
+        }
     
-    if store:
-        items = [i for i in items if i.store_name.lower() == store.lower()]
+    return catalog_response(request, catalog, build)
+
+
+@app.get("/api/items/{item_id}/history")
+async def item_price_history(
+    item_id: str,
+    start: Optional[datetime] = Query(None, description="Range start (ISO 8601)"),
+    end: Optional[datetime] = Query(None, description="Range end (ISO 8601)"),
+    resolution: str = Query("raw", pattern="^(raw|day|week)$", description="raw runs or day/week rollups")
+):
+    """Price history for one item, as compacted runs or downsampled rollups."""
+    get_catalog()  # Make sure the current catalog has been recorded
+    history = get_price_history()
     
-    if category:
-        items = [i for i in items if i.category.lower() == category.lower()]
+    if not history.has_item(item_id):
+        raise HTTPException(status_code=404, detail=f"No price history for {item_id}")
+    
+    try:
+        points = history.history(item_id, start, end, resolution)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return {
-        "items": [
-            {
-                "store": i.store_name,
-                "name": i.item_name,
-                "brand": i.brand,
-                "price": i.price,
-                "size": f"{i.package_size} {i.package_unit}",
-                "unit_price": round(i.unit_price, 2),
-                "category": i.category
-            }
-            for i in items
-        ],
-        "count": len(items)
+        "item_id": item_id,
+        "resolution": resolution,
+        "points": points,
+        "count": len(points)
     }
 
 
 @app.get("/api/coupons")
 async def list_coupons(
+    request: Request,
     store: Optional[str] = Query(None, description="Filter by store"),
-    coupon_type: Optional[str] = Query(None, description="Filter by type: manufacturer, store, rebate")
+    coupon_type: Optional[str] = Query(None, description="Filter by type: manufacturer, store, rebate"),
+    source: Optional[str] = Query(None, description="Filter by source (e.g., Ibotta)"),
+    sort: Optional[str] = Query(None, description="Sort by: value, id"),
+    order: str = Query("asc", pattern="^(asc|desc)$", description="Sort direction"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page")
+):
+    """List available coupons, optionally filtered, sorted and paginated."""
+    catalog = get_catalog()
+    
+    def build():
+        try:
+            page = catalog.page_coupons(
+                store=store, coupon_type=coupon_type, source=source, sort=sort,
+                descending=order == "desc", limit=limit, cursor=cursor, fields=fields
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        return {
+            "coupons": page.rows,
+            "count": len(page.rows),
+            "total": page.total,
+            "next_cursor": page.next_cursor
+        }
+    
+    return catalog_response(request, catalog, build)
+
+
+@app.get("/api/categories")
+async def list_categories(request: Request):
+    """List all product categories."""
+    catalog = get_catalog()
+    
+    return catalog_response(request, catalog, lambda: {
+        "categories": catalog.categories,
+        "count": len(catalog.categories)
+    })
+
+
+# ============================================================================
+# Autocomplete
+# ============================================================================
+
+@app.get("/api/suggest")
+async def suggest(
+    request: Request,
+    q: str = Query(..., min_length=1, description="Prefix typed so far"),
+    limit: int = Query(MAX_SUGGESTIONS, ge=1, le=MAX_SUGGESTIONS, description="Max suggestions")
 ):
-    """List available coupons, optionally filtered."""
-    coupons = get_mock_coupons()
+    """Suggest product names, categories and brands for a typed prefix."""
+    catalog = get_catalog()
+    
+    def build():
+        suggestions = catalog.suggester.suggest(q, limit)
+        return {
+            "query": q,
+            "suggestions": [s.to_dict() for s in suggestions],
+            "count": len(suggestions)
+        }
+    
+    return catalog_response(request, catalog, build)
+
+
+# ============================================================================
+# Saved Lists
+# ============================================================================
+
+_scheduler: Optional[ReoptimizeScheduler] = None
+_subscribers_lock = threading.Lock()
+
+
+def get_list_scheduler() -> ReoptimizeScheduler:
+    """Background re-optimizer for saved lists, subscribed to catalog deltas."""
+    global _scheduler
+    if _scheduler is None:
+        with _subscribers_lock:
+            if _scheduler is None:
+                scheduler = ReoptimizeScheduler(get_saved_lists(), get_catalog, get_locality_index())
+                subscribe(scheduler.on_catalog_delta)
+                scheduler.start()
+                _scheduler = scheduler
+    return _scheduler
+
+
+def stop_list_scheduler() -> None:
+    global _scheduler
+    with _subscribers_lock:
+        if _scheduler is not None:
+            unsubscribe(_scheduler.on_catalog_delta)
+            _scheduler.stop()
+            _scheduler = None
+
+
+def _saved_list_or_404(list_id: str) -> dict:
+    saved = get_saved_lists().get(list_id)
+    if saved is None:
+        raise HTTPException(status_code=404, detail=f"No saved list {list_id}")
+    return saved
+
+
+@app.post("/api/lists", status_code=201)
+async def create_saved_list(body: SaveListRequest):
+    """
+    Save a shopping list and optimize it.
     
-    if store:
-        coupons = [c for c in coupons if c.store_scope is None or 
-                   c.store_scope.lower() in ["any", store.lower()]]
+    The list is re-optimized in the background whenever a catalog change
+    affects it; poll /api/lists/{list_id}/changes for what changed.
+    """
+    if not body.request.shopping_list:
+        raise HTTPException(status_code=400, detail="Shopping list cannot be empty")
     
-    if coupon_type:
-        coupons = [c for c in coupons if c.coupon_type.value == coupon_type.lower()]
+    list_id = get_saved_lists().create(body.name, body.request)
+    get_list_scheduler().reoptimize(list_id, reason="created")
+    return _saved_list_or_404(list_id)
+
+
+@app.get("/api/lists/{list_id}")
+async def get_saved_list(list_id: str):
+    """A saved list with its latest optimization result."""
+    return _saved_list_or_404(list_id)
+
+
+@app.put("/api/lists/{list_id}")
+async def update_saved_list(list_id: str, body: SaveListRequest):
+    """Replace a saved list and re-optimize it."""
+    if not body.request.shopping_list:
+        raise HTTPException(status_code=400, detail="Shopping list cannot be empty")
     
+    if not get_saved_lists().update(list_id, body.name, body.request):
+        raise HTTPException(status_code=404, detail=f"No saved list {list_id}")
+    get_list_scheduler().reoptimize(list_id, reason="edited")
+    return _saved_list_or_404(list_id)
+
+
+@app.delete("/api/lists/{list_id}")
+async def delete_saved_list(list_id: str):
+    """Delete a saved list and its change history."""
+    if not get_saved_lists().delete(list_id):
+        raise HTTPException(status_code=404, detail=f"No saved list {list_id}")
+    return {"list_id": list_id, "deleted": True}
+
+
+@app.get("/api/lists/{list_id}/changes")
+async def saved_list_changes(
+    list_id: str,
+    since: int = Query(0, ge=0, description="Last version the client has seen")
+):
+    """Result diffs recorded after version `since`; empty when nothing changed."""
+    store = get_saved_lists()
+    version = store.version(list_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail=f"No saved list {list_id}")
+    
+    changes = store.changes(list_id, since) if since < version else []
     return {
-        "coupons": [
-            {
-                "id": c.id,
-                "type": c.coupon_type.value,
-                "store": c.store_scope or "any",
-                "description": c.description,
-                "value": c.value,
-                "item_filter": c.item_filter,
-                "source": c.source
-            }
-            for c in coupons
-        ],
-        "count": len(coupons)
+        "list_id": list_id,
+        "version": version,
+        "changes": changes,
+        "count": len(changes)
     }
 
 
-@app.get("/api/categories")
-async def list_categories():
-    """List all product categories."""
-    items = get_mock_store_items()
-    categories = sorted(set(i.category for i in items))
+# ============================================================================
+# Optimization Sessions
+# ============================================================================
+
+_sessions: Optional[SessionRegistry] = None
+
+
+def get_optimize_sessions() -> SessionRegistry:
+    """In-memory sessions for incremental re-optimization of a list being edited."""
+    global _sessions
+    if _sessions is None:
+        with _subscribers_lock:
+            if _sessions is None:
+                _sessions = SessionRegistry(get_catalog, get_locality_index(), get_prediction_table)
+    return _sessions
+
+
+def _session_or_404(session_id: str) -> OptimizationSession:
+    session = get_optimize_sessions().get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"No optimization session {session_id}")
+    return session
+
+
+@app.post("/api/sessions", status_code=201)
+async def create_optimize_session(request: OptimizeRequest):
+    """
+    Start an optimization session for a list the shopper is editing.
+    
+    The list may start empty. Send edits to /api/sessions/{session_id}/edits
+    instead of re-posting the whole list to /api/optimize; sessions expire
+    after an hour idle.
+    """
+    try:
+        session = get_optimize_sessions().create(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return {
-        "categories": categories,
-        "count": len(categories)
+        "session_id": session.session_id,
+        "version": session.version,
+        "result": session.result()
     }
 
 
+@app.get("/api/sessions/{session_id}")
+async def get_optimize_session(session_id: str):
+    """A session's current list and its full optimization result."""
+    session = _session_or_404(session_id)
+    return {
+        "session_id": session_id,
+        "version": session.version,
+        "shopping_list": session.shopping_list,
+        "result": session.result()
+    }
+
+
+@app.post("/api/sessions/{session_id}/edits")
+async def edit_optimize_session(session_id: str, body: ListEditBatch):
+    """
+    Add, remove or re-quantify items and get back what changed.
+    
+    Only the edited items are re-priced. The response lists the items whose
+    purchase changed (before/after), the new totals and, for single-store
+    sessions, the winning store. A batch with an invalid edit is rejected
+    whole.
+    """
+    session = _session_or_404(session_id)
+    try:
+        return session.apply(body.edits)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.delete("/api/sessions/{session_id}")
+async def delete_optimize_session(session_id: str):
+    """End an optimization session."""
+    if not get_optimize_sessions().delete(session_id):
+        raise HTTPException(status_code=404, detail=f"No optimization session {session_id}")
+    return {"session_id": session_id, "deleted": True}
+
+
+# ============================================================================
+# Deal Alerts
+# ============================================================================
+
+_deal_engine: Optional[DealAlertEngine] = None
+
+
+def get_deal_engine() -> DealAlertEngine:
+    """Deal alert engine, subscribed to catalog deltas."""
+    global _deal_engine
+    if _deal_engine is None:
+        with _subscribers_lock:
+            if _deal_engine is None:
+                engine = DealAlertEngine(get_deal_alerts())
+                subscribe(engine.on_catalog_delta)
+                _deal_engine = engine
+    return _deal_engine
+
+
+@app.post("/api/alerts/rules", status_code=201)
+async def create_watch_rule(rule: WatchRule):
+    """
+    Watch for deals on an item.
+    
+    Whenever a catalog or coupon change produces a deal that satisfies the
+    rule, an alert is queued in the outbox.
+    """
+    try:
+        rule_id = get_deal_engine().add_rule(rule, get_catalog())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return get_deal_alerts().get_rule(rule_id)
+
+
+@app.get("/api/alerts/rules/{rule_id}")
+async def get_watch_rule(rule_id: str):
+    """A watch rule."""
+    rule = get_deal_alerts().get_rule(rule_id)
+    if rule is None:
+        raise HTTPException(status_code=404, detail=f"No watch rule {rule_id}")
+    return rule
+
+
+@app.delete("/api/alerts/rules/{rule_id}")
+async def delete_watch_rule(rule_id: str):
+    """Stop watching; alerts already queued stay in the outbox."""
+    if not get_deal_alerts().delete_rule(rule_id):
+        raise HTTPException(status_code=404, detail=f"No watch rule {rule_id}")
+    return {"rule_id": rule_id, "deleted": True}
+
+
+@app.get("/api/alerts/outbox")
+async def alert_outbox(
+    owner: Optional[str] = Query(None, description="Only alerts for this owner"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE, description="Max alerts to return")
+):
+    """Undelivered alerts, oldest first, for a notification worker to send."""
+    alerts = get_deal_alerts().pending(limit, owner)
+    return {"alerts": alerts, "count": len(alerts)}
+
+
+@app.post("/api/alerts/outbox/ack")
+async def ack_alerts(body: AckAlertsRequest):
+    """Mark alerts as delivered so they leave the outbox."""
+    acknowledged = get_deal_alerts().mark_delivered(body.alert_ids)
+    return {"acknowledged": acknowledged}
+
+
+# ============================================================================
+# Receipts and Rebate Claims
+# ============================================================================
+
+# How often a status stream re-checks a receipt job, and for how long
+RECEIPT_EVENT_POLL_SECONDS = 0.5
+RECEIPT_EVENT_TIMEOUT_SECONDS = 300
+
+_receipt_worker: Optional[ReceiptWorker] = None
+
+
+def get_receipt_worker() -> ReceiptWorker:
+    """Background receipt processor (OCR and parsing in a process pool)."""
+    global _receipt_worker
+    if _receipt_worker is None:
+        with _subscribers_lock:
+            if _receipt_worker is None:
+                worker = ReceiptWorker(get_receipt_store(), get_catalog, get_price_history())
+                worker.start()
+                _receipt_worker = worker
+    return _receipt_worker
+
+
+def stop_receipt_worker() -> None:
+    global _receipt_worker
+    with _subscribers_lock:
+        if _receipt_worker is not None:
+            _receipt_worker.stop()
+            _receipt_worker = None
+
+
+def _receipt_job_or_404(job_id: str) -> dict:
+    job = get_receipt_store().job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No receipt job {job_id}")
+    return job
+
+
+@app.post("/api/receipts", status_code=202)
+async def upload_receipt(
+    request: Request,
+    owner: Optional[str] = Query(None, description="Who the receipt belongs to"),
+    store: Optional[str] = Query(None, description="Store, if not printed on the receipt")
+):
+    """
+    Queue a receipt for processing.
+    
+    Send the image (image/png, image/jpeg, ...) or its text (text/plain)
+    as the request body. Returns a job id to poll; once processed, the
+    receipt's prices feed the price history and its rebates open claims.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    payload = await request.body()
+    
+    try:
+        job_id = get_receipt_worker().submit(content_type, payload, owner, store)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/api/receipts/{job_id}",
+        "events_url": f"/api/receipts/{job_id}/events"
+    }
+
+
+@app.get("/api/receipts/{job_id}")
+async def get_receipt_job(job_id: str):
+    """A receipt job's status, with the parsed receipt once done."""
+    return _receipt_job_or_404(job_id)
+
+
+@app.get("/api/receipts/{job_id}/events")
+async def receipt_job_events(job_id: str):
+    """
+    Stream a receipt job's status changes as newline-delimited JSON.
+    
+    The stream ends with the job's final state (done or failed).
+    """
+    job = _receipt_job_or_404(job_id)
+    
+    async def stream():
+        current = job
+        last_status = None
+        waited = 0.0
+        while True:
+            if current["status"] != last_status:
+                last_status = current["status"]
+                yield json.dumps(current) + "\n"
+            if current["status"] in TERMINAL_STATUSES or waited >= RECEIPT_EVENT_TIMEOUT_SECONDS:
+                return
+            await asyncio.sleep(RECEIPT_EVENT_POLL_SECONDS)
+            waited += RECEIPT_EVENT_POLL_SECONDS
+            current = get_receipt_store().job(job_id) or current
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.get("/api/rebates/claims")
+async def rebate_claims(
+    owner: Optional[str] = Query(None, description="Only claims for this owner"),
+    status: Optional[str] = Query(None, description="Only claims in this status"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE, description="Max claims to return")
+):
+    """Rebate claims found on processed receipts, newest first."""
+    if status is not None and status not in CLAIM_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Unknown claim status: {status}")
+    claims = get_receipt_store().claims(owner, status, limit)
+    return {"claims": claims, "count": len(claims)}
+
+
+@app.put("/api/rebates/claims/{claim_id}")
+async def update_rebate_claim(claim_id: int, body: RebateClaimUpdate):
+    """Move a rebate claim along (submitted, paid, rejected)."""
+    if not get_receipt_store().set_claim_status(claim_id, body.status):
+        raise HTTPException(status_code=404, detail=f"No rebate claim {claim_id}")
+    return {"claim_id": claim_id, "status": body.status}
+
+
+# ============================================================================
+# Community Prices
+# ============================================================================
+
+_price_ingestor: Optional[CommunityPriceIngestor] = None
+
+
+def get_price_ingestor() -> CommunityPriceIngestor:
+    """Buffered community price ingestion, publishing consensus prices to the catalog."""
+    global _price_ingestor
+    if _price_ingestor is None:
+        with _subscribers_lock:
+            if _price_ingestor is None:
+                ingestor = CommunityPriceIngestor(
+                    get_community_prices(), get_catalog, apply_item_prices, get_locality_index()
+                )
+                ingestor.start()
+                _price_ingestor = ingestor
+    return _price_ingestor
+
+
+def stop_price_ingestor() -> None:
+    global _price_ingestor
+    with _subscribers_lock:
+        if _price_ingestor is not None:
+            _price_ingestor.stop()
+            _price_ingestor = None
+
+
+@app.post("/api/prices/submissions", status_code=202)
+async def submit_prices(body: PriceSubmissionBatch, request: Request):
+    """
+    Report shelf prices seen in store.
+    
+    Valid reports are buffered and written in batches; once enough
+    clients agree on a price over time within the window, their median
+    replaces the catalog price. A request counts as one client however
+    many submitters it names. Invalid reports are returned with a reason.
+    """
+    source = request.client.host if request.client else None
+    try:
+        accepted, rejected = get_price_ingestor().submit(body.submissions, source=source)
+    except BufferFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    return {"accepted": accepted, "rejected": rejected}
+
+
 # ============================================================================
 # Quick Optimize (Simplified Endpoint)
 # ============================================================================
@@ -198,10 +881,15 @@ async def quick_optimize(
         rebate_apps=[]
     )
     
-    store_items = get_mock_store_items()
-    coupons = get_mock_coupons()
+    locality = get_locality_index()
+    view = get_catalog().zones.for_request(request, locality)
     
-    result = optimize_shopping_list(request, store_items, coupons)
+    result = optimize_shopping_list(
+        request, view.store_items, view.coupons,
+        matcher=view.matcher, mixer=view.mixer,
+        predictions=get_prediction_table(), locality=locality,
+        best_buys=view.best_buys
+    )
     
     # Return simplified response
     return {
@@ -0,0 +1,93 @@
+"""
+Coupon Sentinel - Response Compression
+
+Content-encoding negotiation and compression helpers:
+- gzip always available (stdlib)
+- brotli used when the optional `brotli` package is installed
+- Bodies below a size threshold are never compressed
+- A gzip middleware for dynamic responses that leaves routes compressing
+  their own bodies (http_cache.catalog_response) alone
+"""
+
+from typing import Dict, Iterable, List, Optional
+import gzip
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Optional dependency
+    brotli = None
+
+
+# Below this size the encoding overhead outweighs the savings
+COMPRESS_MIN_SIZE = 1024
+
+# Level for compressing dynamic responses on every request
+DYNAMIC_GZIP_LEVEL = 6
+
+# Levels for bodies compressed once per catalog version
+PRECOMPRESS_LEVELS: Dict[str, int] = {"br": 11, "gzip": 9}
+
+# Levels for bodies compressed per request outside the middleware
+DYNAMIC_LEVELS: Dict[str, int] = {"br": 5, "gzip": DYNAMIC_GZIP_LEVEL}
+
+
+def supported_encodings() -> List[str]:
+    """Encodings this server can produce, in preference order."""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the best supported encoding from an Accept-Encoding header."""
+    if not accept_encoding:
+        return None
+
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+
+    best = None
+    best_q = 0.0
+    for encoding in supported_encodings():
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """Compress a body with the given content-encoding."""
+    if level is None:
+        level = PRECOMPRESS_LEVELS.get(encoding)
+    if encoding == "br":
+        if brotli is None:
+            raise ValueError("brotli encoding requested but brotli is not installed")
+        return brotli.compress(body, quality=level)
+    if encoding == "gzip":
+        # mtime=0 keeps output (and therefore ETags) deterministic
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+class DynamicGZipMiddleware:
+    """GZipMiddleware for every path except `exclude_paths`, which encode their own responses."""
+
+    def __init__(self, app: ASGIApp, exclude_paths: Iterable[str] = (), **gzip_options):
+        self.app = app
+        self.gzip = GZipMiddleware(app, **gzip_options)
+        self.exclude_paths = frozenset(exclude_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+        else:
+            await self.gzip(scope, receive, send)
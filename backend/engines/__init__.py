@@ -1,5 +1,6 @@
 # Coupon Sentinel - Optimization Engines
 from .pricing_engine import optimize_shopping_list
 from .stacking_logic import calculate_best_coupon_stack
+from .matching import ItemMatcher
 
-__all__ = ["optimize_shopping_list", "calculate_best_coupon_stack"]
+__all__ = ["optimize_shopping_list", "calculate_best_coupon_stack", "ItemMatcher"]
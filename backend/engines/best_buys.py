@@ -0,0 +1,231 @@
+"""
+Coupon Sentinel - Best Buy Table
+
+Materialized answers for the list entries shoppers ask for most:
+1. For each popular search term, store, loyalty tier and common quantity,
+   the best purchase (products and coupon stack) is solved once per
+   catalog version
+2. Quantities are keyed by their canonical base amount (units.to_base),
+   so "1 gallon" and "128 fl oz" of milk share an entry
+3. The optimizer looks a list entry up by its normalized term before
+   matching and stacking; brand-preferring, net-of-rebate and long-tail
+   entries fall back to the full path
+4. Hits and misses are counted per (term, base quantity); on the next
+   catalog version the most-missed ones are materialized and promoted
+   ones nobody asked for are dropped
+
+Terms are keyed by their matching tokens (matching.query_tokens), so
+"Eggs" and "egg" share an entry.
+"""
+
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple, Union
+import threading
+import time
+from ..models import ShoppingItem
+from .loyalty import GUEST, MEMBER
+from .matching import ItemMatcher, query_tokens
+from .package_mix import NO_APPS, PackageMixer, Purchase
+from .units import COUNT, CanonicalQuantity, canonical_size, compatible, to_base
+
+
+# Always materialized
+POPULAR_TERMS = (
+    "milk", "2% milk", "whole milk", "eggs", "bread", "butter", "cheese",
+    "yogurt", "bananas", "apples", "chicken breast", "ground beef", "bacon",
+    "rice", "pasta", "cereal", "coffee", "orange juice", "chips", "soda",
+    "water", "toilet paper", "paper towels", "marinara sauce", "peanut butter",
+)
+
+# (quantity, unit) materialized for each popular term. Counts always are;
+# weights and volumes only at stores selling the term by weight or volume
+COMMON_QUANTITIES = (
+    (1, "count"), (2, "count"), (3, "count"), (4, "count"), (6, "count"), (12, "count"),
+    (0.5, "gallon"), (1, "gallon"),
+    (1, "lb"), (2, "lb"), (12, "oz"),
+)
+
+TIERS = (GUEST, MEMBER)
+
+# Missed (term, quantity) pairs materialized on the next catalog version
+PROMOTE_MIN_MISSES = 5
+PROMOTE_MAX_TERMS = 50
+
+# Distinct missed (term, quantity) pairs tracked per version
+MAX_TRACKED_MISSES = 10_000
+
+# A term at one quantity, materialized on its own: (term, quantity, unit)
+BestBuySpec = Tuple[str, float, str]
+
+# Canonical quantity with its amount rounded, so float noise shares a key
+QuantityKey = Tuple[str, float, bool]
+
+# (term, store, tier, quantity, requested count). The count is None when
+# every match compares in base units; otherwise products sold in other
+# units are bought one package per requested unit, so it is part of the key
+BestBuyKey = Tuple[str, str, int, QuantityKey, Optional[float]]
+
+
+def term_key(name: str) -> str:
+    """Normalized lookup term for a list entry's name."""
+    return " ".join(sorted(query_tokens(name)))
+
+
+def quantity_key(quantity: float, unit: str) -> Optional[QuantityKey]:
+    """Canonical base quantity of a list entry, or None for unknown units."""
+    base = to_base(quantity, unit)
+    if base is None:
+        return None
+    return (base.dimension, round(base.amount, 6), base.ambiguous)
+
+
+def _comparable(wanted: CanonicalQuantity, matches: Iterable) -> Tuple[bool, bool]:
+    """(any, all) of the matches comparable with the wanted quantity in base units."""
+    flags = [
+        size is not None and size.amount > 0 and compatible(wanted, size)
+        for size in (canonical_size(m) for m in matches)
+    ]
+    return any(flags), all(flags)
+
+
+_MISSING = object()
+
+
+class BestBuyTable:
+    """Best purchases for popular (term, store, tier, quantity), solved once per catalog version."""
+
+    def __init__(
+        self,
+        matcher: ItemMatcher,
+        mixer: PackageMixer,
+        stores: Sequence[str],
+        terms: Iterable[Union[str, BestBuySpec]] = POPULAR_TERMS
+    ):
+        """
+        Solve every entry up front. A bare term is materialized at
+        COMMON_QUANTITIES; a (term, quantity, unit) spec at that quantity.
+        """
+        self.mixer = mixer
+        self._entries: Dict[BestBuyKey, Optional[Purchase]] = {}
+        # Normalized term -> as it was given
+        self.terms: Dict[str, str] = {}
+        # Materialized (term, quantity) -> the spec it came from (a bare term for common quantities)
+        self._sources: Dict[Tuple[str, QuantityKey], Union[str, BestBuySpec]] = {}
+
+        started = time.perf_counter()
+        matches_by_term: Dict[Tuple[str, str], list] = {}
+        for source in terms:
+            if isinstance(source, str):
+                name, quantities = source, COMMON_QUANTITIES
+            else:
+                name, quantities = source[0], [source[1:]]
+            key = term_key(name)
+            if not key:
+                continue
+            self.terms.setdefault(key, name)
+            for quantity, unit in quantities:
+                wanted = to_base(quantity, unit)
+                qkey = quantity_key(quantity, unit)
+                if wanted is None or (key, qkey) in self._sources:
+                    continue
+                self._sources[(key, qkey)] = source
+                for store in stores:
+                    # Matches depend on the term only
+                    matches = matches_by_term.get((key, store))
+                    if matches is None:
+                        matches = matcher.match_items(ShoppingItem(name=name), store=store)
+                        matches_by_term[(key, store)] = matches
+                    comparable_any, comparable_all = _comparable(wanted, matches)
+                    if wanted.dimension != COUNT and not comparable_any:
+                        continue
+                    count = None if comparable_all else float(quantity)
+                    requested = ShoppingItem(name=name, quantity=quantity, unit=unit)
+                    for tier in TIERS:
+                        self._entries[(key, store, tier, qkey, count)] = (
+                            mixer.best_purchase(requested, matches, store, tier) if matches else None
+                        )
+        self.build_seconds = time.perf_counter() - started
+
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._hits: Dict[Tuple[str, QuantityKey], int] = {}
+        # (term, quantity) -> (misses, spec to materialize it with)
+        self._misses: Dict[Tuple[str, QuantityKey], Tuple[int, BestBuySpec]] = {}
+        self._lock = threading.Lock()
+
+    def lookup(
+        self,
+        requested: ShoppingItem,
+        store: str,
+        tier: int = GUEST,
+        apps: FrozenSet[str] = NO_APPS,
+        net_of_rebates: bool = False
+    ) -> Tuple[bool, Optional[Purchase]]:
+        """
+        (found, purchase) for a list entry at a store.
+
+        `found` is False when the entry is not materialized and must be
+        solved in full; a found purchase of None means the store has no
+        match. Rebates from `apps` are attached to materialized purchases.
+        """
+        if requested.brand_preference or net_of_rebates:
+            # Ranking depends on more than the term
+            with self._lock:
+                self.bypassed += 1
+            return False, None
+
+        term = term_key(requested.name)
+        qkey = quantity_key(requested.quantity, requested.unit)
+        purchase = self._entries.get((term, store, tier, qkey, None), _MISSING)
+        if purchase is _MISSING:
+            purchase = self._entries.get((term, store, tier, qkey, float(requested.quantity)), _MISSING)
+        if purchase is _MISSING:
+            with self._lock:
+                self.misses += 1
+                key = (term, qkey)
+                if qkey is not None and key not in self._sources:
+                    tracked = self._misses.get(key)
+                    if tracked is not None or len(self._misses) < MAX_TRACKED_MISSES:
+                        count = tracked[0] if tracked else 0
+                        self._misses[key] = (count + 1, (requested.name, requested.quantity, requested.unit))
+            return False, None
+
+        with self._lock:
+            self.hits += 1
+            self._hits[(term, qkey)] = self._hits.get((term, qkey), 0) + 1
+        if purchase is None:
+            return True, None
+        return True, self.mixer.with_rebates(purchase, apps)
+
+    def top_misses(self, limit: int = 10) -> List[Tuple[BestBuySpec, int]]:
+        """Most-missed (term, quantity) pairs, as the spec that would materialize them."""
+        with self._lock:
+            ranked = sorted(self._misses.values(), key=lambda t: -t[0])
+        return [(spec, misses) for misses, spec in ranked[:limit]]
+
+    def next_terms(self) -> List[Union[str, BestBuySpec]]:
+        """Terms and (term, quantity, unit) specs to materialize for the next catalog version."""
+        with self._lock:
+            used = {self._sources[key] for key in self._hits if key in self._sources}
+        kept: List[Union[str, BestBuySpec]] = []
+        for source in dict.fromkeys(self._sources.values()):
+            if source in used or source in POPULAR_TERMS:
+                kept.append(source)
+        promoted = [spec for spec, misses in self.top_misses(PROMOTE_MAX_TERMS) if misses >= PROMOTE_MIN_MISSES]
+        return kept + promoted
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.misses
+        return {
+            "terms": len(self.terms),
+            "entries": len(self._entries),
+            "build_ms": round(self.build_seconds * 1000, 1),
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "top_misses": [
+                {"term": term, "quantity": quantity, "unit": unit, "misses": n}
+                for (term, quantity, unit), n in self.top_misses()
+            ],
+        }
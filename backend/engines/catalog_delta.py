@@ -0,0 +1,87 @@
+"""
+Coupon Sentinel - Catalog Deltas
+
+What changed between two catalog versions:
+1. Items and coupons added, changed or removed, found by comparing the
+   per-record fingerprints each CatalogIndex computes at load
+2. The item ids a coupon change touches (every item the coupon matched
+   before or matches now), so consumers only reason about items
+
+Deltas are computed once per reload and handed to every subscriber.
+"""
+
+from typing import Dict, FrozenSet, Iterable, NamedTuple, Optional, Set, Tuple
+from ..models import Coupon, StoreItem
+from .catalog_index import CatalogIndex
+from .stacking_logic import matches_item
+
+
+class CatalogDelta(NamedTuple):
+    """Differences between two catalog versions."""
+    old_version: Optional[str]
+    new_version: str
+    added_items: FrozenSet[str]
+    changed_items: FrozenSet[str]
+    removed_items: FrozenSet[str]
+    added_coupons: FrozenSet[str]
+    changed_coupons: FrozenSet[str]
+    removed_coupons: FrozenSet[str]
+    # Every item id whose price or applicable coupons may have changed
+    touched_items: FrozenSet[str]
+
+    @property
+    def empty(self) -> bool:
+        return self.old_version == self.new_version
+
+
+def _diff(
+    old: Dict[str, bytes],
+    new: Dict[str, bytes]
+) -> Tuple[FrozenSet[str], FrozenSet[str], FrozenSet[str]]:
+    """(added, changed, removed) keys between two fingerprint maps."""
+    added = frozenset(k for k in new if k not in old)
+    removed = frozenset(k for k in old if k not in new)
+    changed = frozenset(k for k, v in new.items() if k in old and old[k] != v)
+    return added, changed, removed
+
+
+def _matched_items(coupons: Iterable[Coupon], store_items: Iterable[StoreItem]) -> Set[str]:
+    coupons = list(coupons)
+    if not coupons:
+        return set()
+    return {
+        item.item_id for item in store_items
+        if any(matches_item(c, item) for c in coupons)
+    }
+
+
+def compute_delta(old: Optional[CatalogIndex], new: CatalogIndex) -> CatalogDelta:
+    """Diff a freshly loaded catalog against the one it replaces."""
+    old_items = old.item_fingerprints if old else {}
+    old_coupons = old.coupon_fingerprints if old else {}
+
+    added_items, changed_items, removed_items = _diff(old_items, new.item_fingerprints)
+    added_coupons, changed_coupons, removed_coupons = _diff(old_coupons, new.coupon_fingerprints)
+
+    touched = set(added_items | changed_items | removed_items)
+    if old is not None:
+        touched |= _matched_items(
+            (old.coupons_by_id[c] for c in changed_coupons | removed_coupons),
+            old.store_items,
+        )
+    touched |= _matched_items(
+        (new.coupons_by_id[c] for c in added_coupons | changed_coupons),
+        new.store_items,
+    )
+
+    return CatalogDelta(
+        old_version=old.version if old else None,
+        new_version=new.version,
+        added_items=added_items,
+        changed_items=changed_items,
+        removed_items=removed_items,
+        added_coupons=added_coupons,
+        changed_coupons=changed_coupons,
+        removed_coupons=removed_coupons,
+        touched_items=frozenset(touched),
+    )
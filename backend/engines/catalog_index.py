@@ -0,0 +1,321 @@
+"""
+Coupon Sentinel - Catalog Index
+
+Prebuilt secondary indexes over the store catalog:
+1. Items bucketed by store and category
+2. Coupons bucketed by store scope, coupon type and source
+3. Every bucket pre-sorted for each supported sort key
+4. Cursor-based pagination that slices a prebuilt ordering
+5. Store locations mapped onto price zones, with zone and store price
+   overrides layered over the chain-level records (price_zones.py)
+
+The index is built once per catalog version, so a listing request only
+pays for the page it returns.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+from datetime import datetime, timezone
+import base64
+import hashlib
+import itertools
+from pydantic import BaseModel
+from ..models import StoreItem, Coupon
+from .best_buys import POPULAR_TERMS, BestBuySpec, BestBuyTable
+from .matching import ItemMatcher
+from .package_mix import PackageMixer
+from .price_zones import StoreOverrides, ZonedCatalog
+from .suggest import SuggestionIndex
+from .units import annotate_catalog, base_unit, comparable_unit_price
+from . import loyalty
+
+
+# Store scope key shared by coupons that apply at every store
+ANY_STORE = "any"
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+ITEM_FIELDS = (
+    "id", "store", "name", "brand", "price", "size", "unit_price",
+    "base_unit", "base_unit_price", "category",
+)
+COUPON_FIELDS = ("id", "type", "store", "description", "value", "item_filter", "source")
+
+ITEM_SORT_KEYS: Dict[str, Callable[[StoreItem], Any]] = {
+    "unit_price": comparable_unit_price,
+    "price": lambda i: i.price,
+    "name": lambda i: i.item_name.lower(),
+}
+
+COUPON_SORT_KEYS: Dict[str, Callable[[Coupon], Any]] = {
+    "value": lambda c: c.value,
+    "id": lambda c: c.id,
+}
+
+# Bucket key: one slot per filter dimension, None meaning "unfiltered"
+BucketKey = Tuple[Optional[str], ...]
+
+
+class Page:
+    """One page of rows from a prebuilt ordering."""
+
+    def __init__(self, rows: List[Dict[str, Any]], total: int, next_cursor: Optional[str]):
+        self.rows = rows
+        self.total = total
+        self.next_cursor = next_cursor
+
+
+def fingerprint(record: BaseModel) -> bytes:
+    """Content hash of one item or coupon, used to detect changes between loads."""
+    return hashlib.sha1(record.model_dump_json().encode()).digest()[:8]
+
+
+def compute_catalog_version(fingerprints: Iterable[bytes]) -> str:
+    """Content hash of the catalog; changes whenever any item or coupon does."""
+    digest = hashlib.sha1()
+    for part in fingerprints:
+        digest.update(part)
+    return digest.hexdigest()[:12]
+
+
+def item_row(item: StoreItem) -> Dict[str, Any]:
+    """Serialized listing row for a store item."""
+    return {
+        "id": item.item_id,
+        "store": item.store_name,
+        "name": item.item_name,
+        "brand": item.brand,
+        "price": item.price,
+        "size": f"{item.package_size} {item.package_unit}",
+        "unit_price": round(item.unit_price, 2),
+        "base_unit": base_unit(item),
+        "base_unit_price": round(comparable_unit_price(item), 4),
+        "category": item.category,
+    }
+
+
+def coupon_row(coupon: Coupon) -> Dict[str, Any]:
+    """Serialized listing row for a coupon."""
+    return {
+        "id": coupon.id,
+        "type": coupon.coupon_type.value,
+        "store": coupon.store_scope or ANY_STORE,
+        "description": coupon.description,
+        "value": coupon.value,
+        "item_filter": coupon.item_filter,
+        "source": coupon.source,
+    }
+
+
+def _bucket_keys(dimensions: Sequence[Sequence[str]]) -> List[BucketKey]:
+    """Every filter combination a record belongs to (None = wildcard)."""
+    choices = [[None, *values] for values in dimensions]
+    return list(itertools.product(*choices))
+
+
+def _build_orderings(
+    records: Sequence[Any],
+    dimensions_for: Callable[[Any], Sequence[Sequence[str]]],
+    sort_keys: Dict[str, Callable[[Any], Any]],
+) -> Dict[BucketKey, Dict[Optional[str], List[int]]]:
+    """Bucket record positions by filter combination, pre-sorted per sort key."""
+    memberships = [_bucket_keys(dimensions_for(r)) for r in records]
+
+    orderings: Dict[BucketKey, Dict[Optional[str], List[int]]] = {}
+    global_orders: Dict[Optional[str], List[int]] = {None: list(range(len(records)))}
+    for name, key in sort_keys.items():
+        global_orders[name] = sorted(range(len(records)), key=lambda p: key(records[p]))
+
+    for sort_name, order in global_orders.items():
+        for pos in order:
+            for bucket in memberships[pos]:
+                orderings.setdefault(bucket, {}).setdefault(sort_name, []).append(pos)
+
+    return orderings
+
+
+def encode_cursor(version: str, offset: int) -> str:
+    """Opaque pagination cursor bound to a catalog version."""
+    raw = f"{version}:{offset}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, version: str) -> int:
+    """Decode a cursor back to an offset, rejecting cursors from older catalogs."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_version, offset = base64.urlsafe_b64decode(padded).decode().split(":")
+        offset_value = int(offset)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Malformed cursor")
+
+    if cursor_version != version:
+        raise ValueError("Cursor is from an older catalog version; restart pagination")
+    if offset_value < 0:
+        raise ValueError("Malformed cursor")
+    return offset_value
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> Optional[List[str]]:
+    """Parse a comma-separated projection, validating against allowed fields."""
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
+
+class CatalogIndex:
+    """Immutable, indexed view of one catalog version."""
+
+    def __init__(
+        self,
+        store_items: List[StoreItem],
+        coupons: List[Coupon],
+        best_buy_terms: Iterable[Union[str, BestBuySpec]] = POPULAR_TERMS,
+        store_zones: Optional[Mapping[str, str]] = None,
+        zone_overrides: Optional[Mapping[str, StoreOverrides]] = None,
+        store_overrides: Optional[Mapping[str, StoreOverrides]] = None
+    ):
+        self.store_items = store_items
+        self.coupons = coupons
+
+        # Per-record content hashes, so reloads can be diffed (catalog_delta.py)
+        item_prints = [fingerprint(i) for i in store_items]
+        coupon_prints = [fingerprint(c) for c in coupons]
+        self.version = compute_catalog_version(itertools.chain(item_prints, coupon_prints))
+        self.items_by_id: Dict[str, StoreItem] = {i.item_id: i for i in store_items}
+        self.coupons_by_id: Dict[str, Coupon] = {c.id: c for c in coupons}
+        self.item_fingerprints = dict(zip((i.item_id for i in store_items), item_prints))
+        self.coupon_fingerprints = dict(zip((c.id for c in coupons), coupon_prints))
+
+        annotate_catalog(store_items)
+        loyalty.annotate_catalog(store_items)
+        self.loaded_at = datetime.now(timezone.utc)
+
+        self.stores = sorted(set(i.store_name for i in store_items))
+        self.categories = sorted(set(i.category for i in store_items))
+
+        self.matcher = ItemMatcher(store_items)
+        self.mixer = PackageMixer(coupons)
+        self.suggester = SuggestionIndex.from_catalog(store_items, coupons)
+        self.best_buys = BestBuyTable(self.matcher, self.mixer, self.stores, best_buy_terms)
+        self.zones = ZonedCatalog(self, store_zones or {}, zone_overrides, store_overrides)
+
+        self._item_rows = [item_row(i) for i in store_items]
+        self._coupon_rows = [coupon_row(c) for c in coupons]
+
+        self._item_orderings = _build_orderings(
+            store_items,
+            lambda i: ([i.store_name.lower()], [i.category.lower()]),
+            ITEM_SORT_KEYS,
+        )
+
+        known_stores = sorted(
+            set(s.lower() for s in self.stores)
+            | set(
+                c.store_scope.lower() for c in coupons
+                if c.store_scope and c.store_scope.lower() != ANY_STORE
+            )
+        )
+        self._known_coupon_stores = set(known_stores)
+
+        def coupon_dimensions(c: Coupon) -> Sequence[Sequence[str]]:
+            if c.store_scope and c.store_scope.lower() != ANY_STORE:
+                stores = [c.store_scope.lower()]
+            else:
+                # "any"-scoped coupons show up under every store
+                stores = [*known_stores, ANY_STORE]
+            return (stores, [c.coupon_type.value], [c.source.lower()])
+
+        self._coupon_orderings = _build_orderings(coupons, coupon_dimensions, COUPON_SORT_KEYS)
+
+    # ------------------------------------------------------------------------
+    # Paging
+    # ------------------------------------------------------------------------
+
+    def _page(
+        self,
+        orderings: Dict[BucketKey, Dict[Optional[str], List[int]]],
+        rows: List[Dict[str, Any]],
+        bucket: BucketKey,
+        sort: Optional[str],
+        descending: bool,
+        limit: int,
+        cursor: Optional[str],
+        fields: Optional[List[str]],
+    ) -> Page:
+        order = orderings.get(bucket, {}).get(sort, [])
+        total = len(order)
+        offset = decode_cursor(cursor, self.version) if cursor else 0
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        end = min(offset + limit, total)
+
+        if descending:
+            positions = [order[total - 1 - k] for k in range(offset, end)]
+        else:
+            positions = order[offset:end]
+
+        if fields:
+            page_rows = [{f: rows[p][f] for f in fields} for p in positions]
+        else:
+            page_rows = [rows[p] for p in positions]
+
+        next_cursor = encode_cursor(self.version, end) if end < total else None
+        return Page(page_rows, total, next_cursor)
+
+    def page_items(
+        self,
+        store: Optional[str] = None,
+        category: Optional[str] = None,
+        sort: Optional[str] = None,
+        descending: bool = False,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        fields: Optional[str] = None,
+    ) -> Page:
+        """One page of items matching the filters, in the requested order."""
+        if sort is not None and sort not in ITEM_SORT_KEYS:
+            raise ValueError(f"Unsupported sort key: {sort}")
+        bucket = (
+            store.lower() if store else None,
+            category.lower() if category else None,
+        )
+        return self._page(
+            self._item_orderings, self._item_rows, bucket, sort, descending,
+            limit, cursor, parse_fields(fields, ITEM_FIELDS),
+        )
+
+    def page_coupons(
+        self,
+        store: Optional[str] = None,
+        coupon_type: Optional[str] = None,
+        source: Optional[str] = None,
+        sort: Optional[str] = None,
+        descending: bool = False,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        fields: Optional[str] = None,
+    ) -> Page:
+        """One page of coupons matching the filters, in the requested order."""
+        if sort is not None and sort not in COUPON_SORT_KEYS:
+            raise ValueError(f"Unsupported sort key: {sort}")
+
+        store_key = None
+        if store:
+            store_key = store.lower()
+            if store_key not in self._known_coupon_stores:
+                # Unknown stores only see coupons valid anywhere
+                store_key = ANY_STORE
+
+        bucket = (
+            store_key,
+            coupon_type.lower() if coupon_type else None,
+            source.lower() if source else None,
+        )
+        return self._page(
+            self._coupon_orderings, self._coupon_rows, bucket, sort, descending,
+            limit, cursor, parse_fields(fields, COUPON_FIELDS),
+        )
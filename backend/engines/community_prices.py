@@ -0,0 +1,264 @@
+"""
+Coupon Sentinel - Community Price Ingestion
+
+Crowd-sourced price reports, kept off the optimize path:
+1. Submissions are validated against the current catalog (known item,
+   plausible price, the reporting store sells the item's chain) with dict
+   lookups only, then appended to an in-memory buffer
+2. A flush thread writes the buffer in one transaction per batch, when
+   it fills up or every FLUSH_INTERVAL_SECONDS
+3. After each flush, the touched items are re-aggregated over each
+   reporter's latest report within the window. Reporters are assigned by
+   the server (client address, else one per request), so a request counts
+   once however many submitters it names; a price is accepted once enough
+   reporters agree on it at times spread across the window
+4. Accepted prices that differ from the catalog are applied together at
+   most every PUBLISH_INTERVAL_SECONDS, as one catalog reload whose
+   delta reaches every catalog subscriber
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from datetime import datetime, timezone
+import logging
+import statistics
+import threading
+import time
+import uuid
+from ..models import PriceSubmission
+from ..storage.community_prices import CommunityPriceStore, Report
+from ..storage.price_history import to_epoch
+from .catalog_index import CatalogIndex
+from .locality import LocalityIndex
+from .loyalty import regular_price
+from ..money import to_cents, to_dollars
+
+
+logger = logging.getLogger(__name__)
+
+
+# Flush when this many reports are buffered, or after this long
+FLUSH_BATCH_SIZE = 5_000
+FLUSH_INTERVAL_SECONDS = 1.0
+
+# Submissions are refused (not dropped) beyond this backlog
+MAX_BUFFERED = 200_000
+
+# Aggregation window and the distinct reporters needed to accept a price
+WINDOW_SECONDS = 24 * 60 * 60
+MIN_SUBMITTERS = 3
+
+# Reports within this fraction of the median agree with it
+AGREEMENT_RATIO = 0.02
+
+# Agreeing reports must span at least this long, so one burst can't set a price
+MIN_SPREAD_SECONDS = 30 * 60
+
+# Reports outside this multiple of the catalog's reference price are rejected
+MIN_PRICE_RATIO = 0.25
+MAX_PRICE_RATIO = 4.0
+
+# How often accepted prices are applied to the catalog
+PUBLISH_INTERVAL_SECONDS = 30.0
+
+
+class BufferFull(Exception):
+    """The ingestion backlog is full; the client should retry later."""
+
+
+def median_cents(prices: Sequence[int]) -> int:
+    """Median of cent prices, rounding a half cent up."""
+    return int(statistics.median(prices) + 0.5)
+
+
+def consensus_cents(reports: Sequence[Tuple[int, int]]) -> Optional[int]:
+    """
+    The agreed price among reporters' (reported_at, cents) reports, or None.
+
+    At least MIN_SUBMITTERS reports must be within AGREEMENT_RATIO of the
+    median and span MIN_SPREAD_SECONDS; the agreed price is their median.
+    """
+    if len(reports) < MIN_SUBMITTERS:
+        return None
+    median = median_cents([cents for _, cents in reports])
+    agreeing = [(ts, cents) for ts, cents in reports if abs(cents - median) <= AGREEMENT_RATIO * median]
+    if len(agreeing) < MIN_SUBMITTERS:
+        return None
+    times = [ts for ts, _ in agreeing]
+    if max(times) - min(times) < MIN_SPREAD_SECONDS:
+        return None
+    return median_cents([cents for _, cents in agreeing])
+
+
+class CommunityPriceIngestor:
+    """Buffers validated price reports, flushes them in batches and publishes consensus prices."""
+
+    def __init__(
+        self,
+        store: CommunityPriceStore,
+        catalog_source: Callable[[], CatalogIndex],
+        apply_prices: Callable[[Dict[str, float]], object],
+        locality: Optional[LocalityIndex] = None
+    ):
+        self.store = store
+        self._catalog_source = catalog_source
+        self._apply_prices = apply_prices
+        self.locality = locality
+
+        self._buffer: List[Report] = []
+        self._pending: Dict[str, float] = {}
+        self._last_publish = time.monotonic()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self.stats = {"accepted": 0, "rejected": 0, "flushed": 0, "flushes": 0, "published": 0}
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="community-prices", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the flush thread after writing whatever is still buffered."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    # ------------------------------------------------------------------------
+    # Submission
+    # ------------------------------------------------------------------------
+
+    def _check(self, submission: PriceSubmission, catalog: CatalogIndex) -> Optional[str]:
+        """Why a submission is rejected, or None if it is valid."""
+        item = catalog.items_by_id.get(submission.item_id)
+        if item is None:
+            return "unknown item"
+
+        if submission.store_id is not None and self.locality is not None:
+            location = self.locality.by_id.get(submission.store_id)
+            if location is None:
+                return "unknown store"
+            if location.chain.lower() != item.store_name.lower():
+                return f"item is not sold at {location.chain}"
+
+        reference = regular_price(item)
+        if not MIN_PRICE_RATIO * reference <= submission.price <= MAX_PRICE_RATIO * reference:
+            return "price is implausible for this item"
+        return None
+
+    def submit(
+        self,
+        submissions: Sequence[PriceSubmission],
+        now: Optional[datetime] = None,
+        source: Optional[str] = None
+    ) -> Tuple[int, List[Dict[str, object]]]:
+        """
+        Validate and buffer one request's submissions. Returns (accepted
+        count, rejections).
+
+        `source` identifies the client as the server saw it (e.g. its
+        address); without one, the request itself is the reporter.
+        """
+        catalog = self._catalog_source()
+        ts = to_epoch(now or datetime.now(timezone.utc))
+        reporter = source or uuid.uuid4().hex
+
+        accepted: List[Report] = []
+        rejected: List[Dict[str, object]] = []
+        for index, submission in enumerate(submissions):
+            reason = self._check(submission, catalog)
+            if reason is not None:
+                rejected.append({"index": index, "item_id": submission.item_id, "reason": reason})
+                continue
+            accepted.append((
+                submission.item_id, ts, reporter, submission.submitter,
+                to_cents(submission.price), submission.store_id,
+            ))
+
+        with self._cond:
+            if len(self._buffer) + len(accepted) > MAX_BUFFERED:
+                raise BufferFull("Too many pending price submissions; retry shortly")
+            self._buffer.extend(accepted)
+            self.stats["accepted"] += len(accepted)
+            self.stats["rejected"] += len(rejected)
+            if len(self._buffer) >= FLUSH_BATCH_SIZE:
+                self._cond.notify()
+        return len(accepted), rejected
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    # ------------------------------------------------------------------------
+    # Flushing and aggregation
+    # ------------------------------------------------------------------------
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._stopping and len(self._buffer) < FLUSH_BATCH_SIZE:
+                    self._cond.wait(FLUSH_INTERVAL_SECONDS)
+                stopping = self._stopping
+            try:
+                self.flush()
+                if stopping or time.monotonic() - self._last_publish >= PUBLISH_INTERVAL_SECONDS:
+                    self.publish()
+            except Exception:
+                logger.exception("Community price flush failed")
+            if stopping:
+                return
+
+    def flush(self) -> int:
+        """Write buffered reports and re-aggregate the items they touch."""
+        with self._cond:
+            batch, self._buffer = self._buffer, []
+        if not batch:
+            return 0
+
+        for start in range(0, len(batch), FLUSH_BATCH_SIZE):
+            self.store.insert_reports(batch[start:start + FLUSH_BATCH_SIZE])
+            self.stats["flushes"] += 1
+        self.stats["flushed"] += len(batch)
+
+        self._aggregate({report[0] for report in batch}, max(report[1] for report in batch))
+        return len(batch)
+
+    def _aggregate(self, item_ids: set, now: int) -> None:
+        catalog = self._catalog_source()
+        window = self.store.window_prices(item_ids, now - WINDOW_SECONDS)
+        with self._cond:
+            for item_id in item_ids:
+                item = catalog.items_by_id.get(item_id)
+                consensus = consensus_cents(window.get(item_id, ()))
+                if item is None or consensus is None:
+                    continue
+                if consensus != to_cents(item.price):
+                    self._pending[item_id] = to_dollars(consensus)
+                else:
+                    self._pending.pop(item_id, None)
+
+    def pending(self) -> Dict[str, float]:
+        """Accepted prices not yet applied to the catalog."""
+        with self._cond:
+            return dict(self._pending)
+
+    def publish(self) -> int:
+        """Apply accepted prices to the catalog in one reload."""
+        with self._cond:
+            prices, self._pending = self._pending, {}
+            self._last_publish = time.monotonic()
+        if prices:
+            try:
+                self._apply_prices(prices)
+            except Exception:
+                # Keep them for the next publish, unless newer aggregates replaced them
+                with self._cond:
+                    for item_id, price in prices.items():
+                        self._pending.setdefault(item_id, price)
+                raise
+            self.stats["published"] += len(prices)
+            self.store.prune(to_epoch(datetime.now(timezone.utc)) - 2 * WINDOW_SECONDS)
+        return len(prices)
@@ -0,0 +1,115 @@
+"""
+Coupon Sentinel - Deal Alerts
+
+Matches deals against users' watch rules on every catalog delta:
+1. Rules are indexed by their normalized terms (same tokens as item
+   matching); a close catalog spelling of a token is indexed alongside
+   it as an alternative, never in its place
+2. Only items a delta touched are priced as deals: best coupon stack on
+   one package, savings vs. the regular price, price per base unit
+3. Each deal's tokens look up candidate rules in the term index; rules
+   that pass their thresholds get an alert in the local outbox
+
+Work per delta scales with the items it touched and the rules sharing
+their terms, never with the total number of rules.
+"""
+
+from typing import Any, Dict, List
+from datetime import datetime, timezone
+import logging
+from ..models import StoreItem, WatchRule
+from ..storage.deal_alerts import DealAlertStore
+from .catalog_delta import CatalogDelta
+from .catalog_index import CatalogIndex
+from .loyalty import regular_price
+from .matching import ItemMatcher, normalize, query_tokens
+from .units import base_unit, canonical_size
+
+
+logger = logging.getLogger(__name__)
+
+
+# Minimum similarity for a catalog spelling to stand in for a rule token
+SPELLING_SIMILARITY = 0.65
+
+
+def rule_terms(rule: WatchRule, matcher: ItemMatcher) -> List[List[str]]:
+    """
+    Index terms for a rule: the alternatives accepted for each of its tokens.
+
+    The literal token always counts, so a rule can wait for products the
+    catalog doesn't carry yet ('greek' must not become 'great'); a close
+    catalog spelling ('yoghurt' -> 'yogurt') is only an extra alternative.
+    """
+    terms: List[List[str]] = []
+    for text in (rule.item_filter, rule.brand or ""):
+        for token in query_tokens(text):
+            if any(alternatives[0] == token for alternatives in terms):
+                continue
+            alternatives = [token]
+            for candidate, similarity in matcher.expand(token):
+                if similarity >= SPELLING_SIMILARITY and candidate not in alternatives:
+                    alternatives.append(candidate)
+            terms.append(alternatives)
+    return terms
+
+
+def brand_match_key(brand: str) -> str:
+    """Normalized brand text, so 'Good Gather' and 'Good & Gather' compare equal."""
+    return " ".join(normalize(brand))
+
+
+def price_deal(item: StoreItem, catalog: CatalogIndex) -> Dict[str, Any]:
+    """One package of an item at its best coupon stack, as an alert payload."""
+    line = catalog.mixer.price_line(item, 1)
+    regular = regular_price(item)
+    size = canonical_size(item)
+    amount = size.amount if size and size.amount > 0 else item.package_size
+    savings_pct = (regular - line.final_cost) / regular * 100 if regular > 0 else 0.0
+
+    tokens = set()
+    for text in (item.item_name, item.brand or "", item.category):
+        tokens.update(normalize(text))
+
+    return {
+        "item_id": item.item_id,
+        "store": item.store_name,
+        "name": item.item_name,
+        "brand": item.brand,
+        "final_price": round(line.final_cost, 2),
+        "regular_price": round(regular, 2),
+        "unit_price": round(line.final_cost / amount, 4) if amount > 0 else line.final_cost,
+        "base_unit": base_unit(item),
+        "savings_pct": round(savings_pct, 1),
+        "coupons": [c.coupon_id for c in line.applied_coupons],
+        "catalog_version": catalog.version,
+        "tokens": sorted(tokens),
+        "brand_key": brand_match_key(item.brand or ""),
+    }
+
+
+class DealAlertEngine:
+    """Registers watch rules and queues alerts for deals in catalog deltas."""
+
+    def __init__(self, store: DealAlertStore):
+        self.store = store
+
+    def add_rule(self, rule: WatchRule, catalog: CatalogIndex) -> str:
+        """Index and store a watch rule; raises ValueError if it has no terms."""
+        brand_key = brand_match_key(rule.brand) if rule.brand else None
+        return self.store.add_rule(rule, rule_terms(rule, catalog.matcher), brand_key)
+
+    def on_catalog_delta(self, delta: CatalogDelta, catalog: CatalogIndex) -> int:
+        """Catalog subscriber: match every touched item's deal against the rules."""
+        deals = [
+            price_deal(catalog.items_by_id[item_id], catalog)
+            for item_id in delta.touched_items
+            if item_id in catalog.items_by_id
+        ]
+        if not deals:
+            return 0
+
+        queued = self.store.match_deals(deals, datetime.now(timezone.utc))
+        if queued:
+            logger.info("Catalog %s queued %d deal alerts", delta.new_version, queued)
+        return queued
@@ -0,0 +1,128 @@
+"""
+Coupon Sentinel - Store Locality Index
+
+Resolves a shopper's zip code to the store locations near them:
+1. Zip codes map to centroid coordinates
+2. Store locations are bucketed into a uniform lat/lon grid
+3. A radius query only visits the grid cells overlapping its bounding
+   box, then filters by great-circle distance
+4. Results are memoized per (zip, radius), so repeat lookups are a dict hit
+
+The optimizer uses the chains with a nearby location as its candidate
+store set instead of every store in the catalog.
+"""
+
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+from collections import OrderedDict
+import math
+import threading
+
+
+# Default search radius around a shopper's zip code
+DEFAULT_RADIUS_MILES = 25.0
+
+# Upper bound on radius queries
+MAX_RADIUS_MILES = 100.0
+
+# Grid cell size in degrees (~35 miles of latitude)
+CELL_DEGREES = 0.5
+
+# Memoized (zip, radius) lookups kept per index
+LOOKUP_CACHE_SIZE = 50_000
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LAT = 69.0
+
+
+class StoreLocation(NamedTuple):
+    """One physical store of a chain."""
+    store_id: str
+    chain: str
+    name: str
+    zip_code: str
+    lat: float
+    lon: float
+
+
+class NearbyStore(NamedTuple):
+    location: StoreLocation
+    distance_miles: float
+
+
+def haversine_miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points, in miles."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(a))
+
+
+def _cell(lat: float, lon: float) -> Tuple[int, int]:
+    return (math.floor(lat / CELL_DEGREES), math.floor(lon / CELL_DEGREES))
+
+
+class LocalityIndex:
+    """Grid index over store locations plus a zip centroid table."""
+
+    def __init__(
+        self,
+        locations: Iterable[StoreLocation],
+        zip_centroids: Dict[str, Tuple[float, float]]
+    ):
+        self.locations = list(locations)
+        self.zip_centroids = zip_centroids
+        self.by_id: Dict[str, StoreLocation] = {loc.store_id: loc for loc in self.locations}
+
+        self._grid: Dict[Tuple[int, int], List[StoreLocation]] = {}
+        for loc in self.locations:
+            self._grid.setdefault(_cell(loc.lat, loc.lon), []).append(loc)
+
+        self._memo: "OrderedDict[Tuple[str, float], Tuple[NearbyStore, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def near_point(self, lat: float, lon: float, radius_miles: float) -> List[NearbyStore]:
+        """Store locations within a radius of a point, nearest first."""
+        lat_span = radius_miles / MILES_PER_DEGREE_LAT
+        cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+        lon_span = min(180.0, radius_miles / (MILES_PER_DEGREE_LAT * cos_lat))
+
+        (row_lo, col_lo) = _cell(lat - lat_span, lon - lon_span)
+        (row_hi, col_hi) = _cell(lat + lat_span, lon + lon_span)
+
+        found = []
+        for row in range(row_lo, row_hi + 1):
+            for col in range(col_lo, col_hi + 1):
+                for loc in self._grid.get((row, col), ()):
+                    distance = haversine_miles(lat, lon, loc.lat, loc.lon)
+                    if distance <= radius_miles:
+                        found.append(NearbyStore(loc, round(distance, 2)))
+        found.sort(key=lambda n: n.distance_miles)
+        return found
+
+    def near_zip(self, zip_code: str, radius_miles: float = DEFAULT_RADIUS_MILES) -> Optional[Tuple[NearbyStore, ...]]:
+        """Store locations near a zip code's centroid, or None for unknown zip codes."""
+        key = (zip_code.strip()[:5], radius_miles)
+        with self._lock:
+            cached = self._memo.get(key)
+            if cached is not None:
+                self._memo.move_to_end(key)
+                return cached
+
+        centroid = self.zip_centroids.get(key[0])
+        if centroid is None:
+            return None
+        nearby = tuple(self.near_point(centroid[0], centroid[1], radius_miles))
+
+        with self._lock:
+            self._memo[key] = nearby
+            if len(self._memo) > LOOKUP_CACHE_SIZE:
+                self._memo.popitem(last=False)
+        return nearby
+
+    def chains_near_zip(self, zip_code: str, radius_miles: float = DEFAULT_RADIUS_MILES) -> Optional[FrozenSet[str]]:
+        """Lowercased chain names with a location near a zip, or None for unknown zip codes."""
+        nearby = self.near_zip(zip_code, radius_miles)
+        if nearby is None:
+            return None
+        return frozenset(n.location.chain.lower() for n in nearby)
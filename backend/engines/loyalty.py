@@ -0,0 +1,80 @@
+"""
+Coupon Sentinel - Loyalty Pricing
+
+Effective shelf prices per loyalty tier:
+- Tier 0 (guest) pays `price`
+- Tier 1 (member) pays the lower of `price` and `loyalty_price`
+- `regular_price` is the undiscounted reference used for savings
+
+Tier prices are precomputed per item at catalog load, in integer cents
+(backend/money.py), and a user's tier is resolved once per
+store per request, so the hot loop indexes a tuple instead of branching
+on membership for every product.
+"""
+
+from typing import Dict, Iterable, List, Set
+from ..models import StoreItem
+from ..money import to_cents, to_dollars
+
+
+GUEST = 0
+MEMBER = 1
+
+# Store -> loyalty program a membership can be named by
+LOYALTY_PROGRAMS: Dict[str, str] = {
+    "Target": "Target Circle",
+    "Walmart": "Walmart+",
+    "Costco": "Costco Membership",
+}
+
+
+def annotate_prices(item: StoreItem) -> None:
+    """Compute and cache an item's per-tier and regular prices."""
+    member_price = item.price
+    if item.loyalty_price is not None and item.loyalty_price < item.price:
+        member_price = item.loyalty_price
+    item._tier_cents = (to_cents(item.price), to_cents(member_price))
+
+    regular = item.price
+    if item.regular_price is not None and item.regular_price > item.price:
+        regular = item.regular_price
+    item._regular_cents = to_cents(regular)
+
+
+def annotate_catalog(store_items: List[StoreItem]) -> None:
+    """Precompute tier price columns for every item at catalog load."""
+    for item in store_items:
+        annotate_prices(item)
+
+
+def tier_cents(item: StoreItem, tier: int) -> int:
+    """Shelf price at a loyalty tier, in cents."""
+    if item._tier_cents is None:
+        annotate_prices(item)
+    return item._tier_cents[tier]
+
+
+def regular_cents(item: StoreItem) -> int:
+    """Undiscounted reference price, in cents."""
+    if item._regular_cents is None:
+        annotate_prices(item)
+    return item._regular_cents
+
+
+def regular_price(item: StoreItem) -> float:
+    """Undiscounted reference price (the regular price when on sale)."""
+    return to_dollars(regular_cents(item))
+
+
+def member_stores(memberships: Iterable[str]) -> Set[str]:
+    """Lowercased store names a user's memberships (store or program names) cover."""
+    names = {m.strip().lower() for m in memberships}
+    return {
+        store.lower() for store, program in LOYALTY_PROGRAMS.items()
+        if store.lower() in names or program.lower() in names
+    } | names
+
+
+def store_tier(store_name: str, members_of: Set[str]) -> int:
+    """Loyalty tier a user shops at for one store."""
+    return MEMBER if store_name.lower() in members_of else GUEST
@@ -0,0 +1,250 @@
+"""
+Coupon Sentinel - Item Matching
+
+Fuzzy, synonym-aware matching of shopping list entries to store products:
+1. Normalize text (lowercase, canonical synonyms, light stemming)
+2. Look up query tokens in an inverted index over the product vocabulary
+3. Fall back to a trigram index for misspelled tokens
+4. Rank products by the fraction of query tokens they cover
+
+The matcher is built once per catalog version; a lookup only touches the
+postings of the query's tokens.
+"""
+
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from collections import OrderedDict
+import re
+import threading
+from ..models import ShoppingItem, StoreItem
+
+
+# Phrases rewritten to one canonical form on both the product and query side
+SYNONYMS: Dict[str, str] = {
+    "reduced fat": "2%",
+    "2 percent": "2%",
+    "two percent": "2%",
+    "oj": "orange juice",
+    "pop": "soda",
+    "soft drink": "soda",
+    "tp": "toilet paper",
+    "bathroom tissue": "toilet paper",
+    "kitchen roll": "paper towel",
+    "pasta sauce": "marinara sauce",
+    "spaghetti sauce": "marinara sauce",
+    "tomato sauce": "marinara sauce",
+    "hamburger": "ground beef",
+    "java": "coffee",
+}
+
+# How strongly a token identifies a product, by the field it came from
+FIELD_WEIGHTS: Dict[str, float] = {
+    "name": 1.0,
+    "brand": 0.9,
+    "category": 0.8,
+}
+
+# Quantity and filler words that carry no product identity
+STOPWORDS: FrozenSet[str] = frozenset({
+    "a", "an", "and", "of", "the", "for", "with",
+    "dozen", "pack", "pk", "ct", "count", "each", "ea",
+    "gallon", "gal", "half", "lb", "lbs", "pound", "oz", "ounce", "fl",
+})
+
+# Minimum trigram similarity for a misspelled token to count as a match
+FUZZY_CUTOFF = 0.5
+
+# Minimum fraction of query tokens a product must cover
+MIN_MATCH_SCORE = 0.5
+
+# Weight given to a token matched by swapping two adjacent letters
+TRANSPOSITION_WEIGHT = 0.9
+
+# Products scoring within this margin of the best are equally good matches
+TOP_TIER_MARGIN = 1e-6
+
+# Fuzzy expansions of out-of-vocabulary tokens remembered per matcher
+EXPANSION_CACHE_SIZE = 10_000
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+%?")
+_SYNONYM_RE = re.compile(
+    r"\b(" + "|".join(re.escape(p) for p in sorted(SYNONYMS, key=len, reverse=True)) + r")\b"
+)
+
+
+def stem(token: str) -> str:
+    """Very light plural stripping so 'eggs' and 'egg' share a token."""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 4 and token.endswith(("ches", "shes", "sses", "xes")):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def normalize(text: str) -> List[str]:
+    """Lowercase, apply synonyms and stem into a list of tokens."""
+    text = _SYNONYM_RE.sub(lambda m: SYNONYMS[m.group(1)], text.lower())
+    return [stem(t) for t in _TOKEN_RE.findall(text)]
+
+
+def query_tokens(text: str) -> List[str]:
+    """Normalized tokens for a search query, minus quantities and filler."""
+    tokens = []
+    for token in normalize(text):
+        if token in STOPWORDS or token.isdigit():
+            continue
+        if token not in tokens:
+            tokens.append(token)
+    return tokens
+
+
+def trigrams(token: str) -> Set[str]:
+    """Padded character trigrams of a token."""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ItemMatcher:
+    """Inverted token index plus trigram index over a product catalog."""
+
+    def __init__(self, store_items: List[StoreItem]):
+        self.store_items = store_items
+
+        # token -> store -> (product position, field weight)
+        self._postings: Dict[str, Dict[str, List[Tuple[int, float]]]] = {}
+        for pos, item in enumerate(store_items):
+            token_weights: Dict[str, float] = {}
+            fields = (
+                ("name", item.item_name),
+                ("brand", item.brand or ""),
+                ("category", item.category),
+            )
+            for field, text in fields:
+                for token in normalize(text):
+                    token_weights[token] = max(token_weights.get(token, 0.0), FIELD_WEIGHTS[field])
+            for token, weight in token_weights.items():
+                self._postings.setdefault(token, {}).setdefault(item.store_name, []).append(
+                    (pos, weight)
+                )
+
+        # trigram -> vocabulary tokens, for approximate lookups
+        self._trigrams: Dict[str, List[str]] = {}
+        self._token_trigram_counts: Dict[str, int] = {}
+        for token in self._postings:
+            grams = trigrams(token)
+            self._token_trigram_counts[token] = len(grams)
+            for gram in grams:
+                self._trigrams.setdefault(gram, []).append(token)
+
+        # (token, cutoff) -> expansion, for tokens not in the vocabulary
+        self._expansions: "OrderedDict[Tuple[str, float], List[Tuple[str, float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def vocabulary(self) -> Iterable[str]:
+        """Every normalized token in the catalog."""
+        return self._postings.keys()
+
+    def expand(self, token: str, cutoff: float = FUZZY_CUTOFF) -> List[Tuple[str, float]]:
+        """Vocabulary tokens a query token may refer to, with similarity weights."""
+        if token in self._postings:
+            return [(token, 1.0)]
+
+        key = (token, cutoff)
+        with self._lock:
+            cached = self._expansions.get(key)
+            if cached is not None:
+                self._expansions.move_to_end(key)
+                return cached
+
+        grams = trigrams(token)
+        shared: Dict[str, int] = {}
+        for gram in grams:
+            for candidate in self._trigrams.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+
+        result = []
+        for candidate, overlap in shared.items():
+            # Dice coefficient over trigram sets
+            similarity = 2 * overlap / (len(grams) + self._token_trigram_counts[candidate])
+            if similarity >= cutoff:
+                result.append((candidate, similarity))
+        if not result:
+            # Trigrams miss adjacent transpositions ('mlik'), so try them directly
+            for i in range(len(token) - 1):
+                # Stemmed like the vocabulary ('egsg' -> 'eggs' -> 'egg')
+                swapped = stem(token[:i] + token[i + 1] + token[i] + token[i + 2:])
+                if swapped in self._postings and (swapped, TRANSPOSITION_WEIGHT) not in result:
+                    result.append((swapped, TRANSPOSITION_WEIGHT))
+        result.sort(key=lambda c: -c[1])
+
+        with self._lock:
+            self._expansions[key] = result
+            if len(self._expansions) > EXPANSION_CACHE_SIZE:
+                self._expansions.popitem(last=False)
+        return result
+
+    def rank(
+        self,
+        query: str,
+        store: Optional[str] = None,
+        cutoff: float = FUZZY_CUTOFF,
+        min_score: float = MIN_MATCH_SCORE
+    ) -> List[Tuple[StoreItem, float]]:
+        """Products matching a query, best first, with coverage scores in [0, 1]."""
+        tokens = query_tokens(query)
+        if not tokens:
+            return []
+
+        scores: Dict[int, float] = {}
+        for token in tokens:
+            best_for_token: Dict[int, float] = {}
+            for variant, similarity in self.expand(token, cutoff):
+                by_store = self._postings[variant]
+                if store is not None:
+                    postings: Iterable[Tuple[int, float]] = by_store.get(store, ())
+                else:
+                    postings = (p for plist in by_store.values() for p in plist)
+                for pos, field_weight in postings:
+                    weight = similarity * field_weight
+                    if weight > best_for_token.get(pos, 0.0):
+                        best_for_token[pos] = weight
+            for pos, weight in best_for_token.items():
+                scores[pos] = scores.get(pos, 0.0) + weight
+
+        ranked = [
+            (self.store_items[pos], total / len(tokens))
+            for pos, total in scores.items()
+            if total / len(tokens) >= min_score
+        ]
+        ranked.sort(key=lambda r: -r[1])
+        return ranked
+
+    def match_items(
+        self,
+        requested: ShoppingItem,
+        store: Optional[str] = None,
+        cutoff: float = FUZZY_CUTOFF
+    ) -> List[StoreItem]:
+        """
+        Products that equally best match a requested item.
+
+        Only the top-scoring tier is returned so the optimizer compares
+        like with like ('2% milk' does not fall back to whole milk).
+        Products of the preferred brand that match at all join the tier.
+        """
+        ranked = self.rank(requested.name, store=store, cutoff=cutoff)
+        if not ranked:
+            return []
+
+        top_score = ranked[0][1]
+        brand = requested.brand_preference.lower() if requested.brand_preference else None
+
+        matches = []
+        for item, score in ranked:
+            if score >= top_score - TOP_TIER_MARGIN:
+                matches.append(item)
+            elif brand and item.brand and brand in item.brand.lower():
+                matches.append(item)
+        return matches
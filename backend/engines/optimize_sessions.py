@@ -0,0 +1,374 @@
+"""
+Coupon Sentinel - Optimization Sessions
+
+Incremental re-optimization while a shopper edits a list:
+1. A session prices each (item, store) pair once and keeps running
+   totals per store (single-store) or across the chosen stores
+   (multi-store)
+2. An add, remove or quantity change re-prices only that item's row,
+   adjusts the totals by the difference and re-picks the winning store
+3. Each batch of edits returns a diff of the items whose purchase
+   changed, in the shape of saved-list change diffs (engines/reoptimize.py)
+4. Sessions are held in memory by id, dropped after SESSION_TTL_SECONDS
+   idle or least recently used beyond MAX_SESSIONS
+
+An edit costs one row of pricing (memoized by the catalog's mixer), not
+the whole list; only a change of winning store in single-store mode
+touches every item, because every item's purchase then changes. If the
+catalog changes under a session, its next edit re-prices every row. The
+full result is always what /api/optimize returns for the current list.
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from collections import OrderedDict
+import threading
+import time
+import uuid
+from ..models import ListEdit, OptimizeRequest, OptimizeResponse, ShoppingItem
+from .catalog_index import CatalogIndex
+from .locality import LocalityIndex
+from .loyalty import member_stores, store_tier
+from .package_mix import Purchase
+from ..money import to_dollars
+from .price_prediction import Prediction
+from .pricing_engine import candidate_stores, optimize_shopping_list, price_item, rebate_apps
+
+
+SESSION_TTL_SECONDS = 60 * 60
+MAX_SESSIONS = 10_000
+
+# Store -> cheapest purchase there, for the stores that carry an item
+Row = Dict[str, Purchase]
+
+
+def _summarize(store: str, purchase: Purchase) -> Dict[str, object]:
+    """Where and what is bought for one item, as in saved-list diffs."""
+    return {
+        "store": store,
+        "products": [
+            {"id": line.product.item_id, "name": line.product.item_name, "quantity": line.quantity}
+            for line in purchase.lines
+        ],
+        "final_cost": to_dollars(purchase.final_cents),
+    }
+
+
+class OptimizationSession:
+    """One shopper's list, priced per item and store, updated edit by edit."""
+
+    def __init__(
+        self,
+        session_id: str,
+        request: OptimizeRequest,
+        catalog_source: Callable[[], CatalogIndex],
+        locality: Optional[LocalityIndex] = None,
+        predictions_source: Optional[Callable[[], Dict[str, Prediction]]] = None
+    ):
+        self.session_id = session_id
+        self.version = 0
+        self.touched = time.monotonic()
+        self.locality = locality
+        self._catalog_source = catalog_source
+        self._predictions_source = predictions_source
+        self._lock = threading.Lock()
+
+        # The request's settings; the list itself lives in _items
+        self._request = request.model_copy(update={"shopping_list": []})
+        self._multi = request.allow_multi_store
+        self._net = request.rank_by_net_cost
+
+        self._items: Dict[str, ShoppingItem] = {}
+        for item in request.shopping_list:
+            key = item.name.lower()
+            if key in self._items:
+                raise ValueError(f"'{item.name}' is on the list more than once")
+            self._items[key] = item
+        self._reprice(catalog_source())
+
+    # ------------------------------------------------------------------------
+    # Pricing state
+    # ------------------------------------------------------------------------
+
+    def _reprice(self, catalog: CatalogIndex) -> None:
+        """Price every item from scratch against a catalog version."""
+        self._catalog = catalog
+        # Priced at the shopper's nearest location of each chain
+        self._view = catalog.zones.for_request(self._request, self.locality)
+        self._stores = candidate_stores(self._request, self._view.store_items, self.locality)
+        members_of = member_stores(self._request.loyalty_memberships)
+        self._tiers = {store: store_tier(store, members_of) for store in self._stores}
+        self._apps = rebate_apps(self._request)
+
+        self._rows: Dict[str, Row] = {}
+        # Single-store: store -> [final, savings, rebates (cents), items priced]
+        self._store_totals: Dict[str, List[int]] = {store: [0, 0, 0, 0] for store in self._stores}
+        # Multi-store: item -> chosen store, and (final, savings) cents across them
+        self._choice: Dict[str, str] = {}
+        self._multi_cents = [0, 0]
+
+        for key, item in self._items.items():
+            self._rows[key] = self._price(item)
+            self._apply_row(key, self._rows[key], 1)
+        self._best = self._pick_store()
+
+    def _price(self, item: ShoppingItem) -> Row:
+        """The cheapest purchase of one item at each candidate store."""
+        view = self._view
+        row: Row = {}
+        for store in self._stores:
+            purchase = price_item(
+                item, [], store, self._tiers[store], self._apps, self._net,
+                view.matcher, view.mixer, view.best_buys
+            )
+            if purchase:
+                row[store] = purchase
+        return row
+
+    def _cost(self, purchase: Purchase) -> int:
+        return purchase.net_cents if self._net else purchase.final_cents
+
+    def _cheapest(self, row: Row) -> Optional[str]:
+        """The store an item goes to in multi-store mode (first wins ties, as in the optimizer)."""
+        best = None
+        for store in self._stores:
+            purchase = row.get(store)
+            if purchase and (best is None or self._cost(purchase) < self._cost(row[best])):
+                best = store
+        return best
+
+    def _apply_row(self, key: str, row: Row, sign: int) -> None:
+        """Add (sign 1) or subtract (sign -1) an item's row from the running totals."""
+        for store, purchase in row.items():
+            totals = self._store_totals[store]
+            totals[0] += sign * purchase.final_cents
+            totals[1] += sign * (purchase.base_cents - purchase.final_cents)
+            totals[2] += sign * purchase.rebate_cents
+            totals[3] += sign
+
+        if self._multi:
+            store = self._cheapest(row) if sign > 0 else self._choice.pop(key, None)
+            if store is None:
+                return
+            if sign > 0:
+                self._choice[key] = store
+            purchase = row[store]
+            self._multi_cents[0] += sign * purchase.final_cents
+            self._multi_cents[1] += sign * (purchase.base_cents - purchase.final_cents)
+
+    def _pick_store(self) -> Optional[str]:
+        """The single store with the lowest total, compared as the optimizer does."""
+        if self._multi:
+            return None
+        best, best_total = None, float("inf")
+        for store in self._stores:
+            final, _, rebates, priced = self._store_totals[store]
+            if not priced:
+                continue
+            total = final - (rebates if self._net else 0)
+            if total < best_total:
+                best, best_total = store, total
+        return best
+
+    def _set_item(self, key: str, item: Optional[ShoppingItem]) -> None:
+        """Replace (or with None, remove) one item and re-price only its row."""
+        old = self._rows.pop(key, None)
+        if old is not None:
+            self._apply_row(key, old, -1)
+        if item is None:
+            self._items.pop(key, None)
+            return
+        self._items[key] = item
+        self._rows[key] = self._price(item)
+        self._apply_row(key, self._rows[key], 1)
+
+    def _assigned(self, key: str, store: Optional[str] = None) -> Optional[Dict[str, object]]:
+        """Summary of what is bought for an item, at `store` or where it is assigned now."""
+        row = self._rows.get(key)
+        if row is None:
+            return None
+        if store is None:
+            store = self._choice.get(key) if self._multi else self._best
+        purchase = row.get(store) if store else None
+        return _summarize(store, purchase) if purchase else None
+
+    def _totals(self) -> Tuple[float, float]:
+        """(grand total, total savings) of the current plan."""
+        if self._multi:
+            final, savings = self._multi_cents
+        elif self._best is None:
+            final, savings = 0, 0
+        else:
+            final, savings = self._store_totals[self._best][:2]
+        return to_dollars(final), to_dollars(savings)
+
+    # ------------------------------------------------------------------------
+    # Edits
+    # ------------------------------------------------------------------------
+
+    def _validate(self, edits: Sequence[ListEdit]) -> None:
+        """Reject the whole batch before applying any of it."""
+        keys = set(self._items)
+        for index, edit in enumerate(edits):
+            if edit.op == "add":
+                if edit.item is None:
+                    raise ValueError(f"Edit {index}: 'add' needs an item")
+                key = edit.item.name.lower()
+                if key in keys:
+                    raise ValueError(f"Edit {index}: '{edit.item.name}' is already on the list")
+                keys.add(key)
+                continue
+
+            if not edit.name:
+                raise ValueError(f"Edit {index}: '{edit.op}' needs the item name")
+            key = edit.name.lower()
+            if key not in keys:
+                raise ValueError(f"Edit {index}: '{edit.name}' is not on the list")
+            if edit.op == "remove":
+                keys.discard(key)
+            elif edit.quantity is None:
+                raise ValueError(f"Edit {index}: 'set_quantity' needs a quantity")
+
+    def apply(self, edits: Sequence[ListEdit]) -> Dict[str, object]:
+        """Apply edits in order and return what changed."""
+        with self._lock:
+            self._validate(edits)
+            before_total, before_savings = self._totals()
+            before_store = self._best
+
+            catalog = self._catalog_source()
+            stale = catalog.version != self._catalog.version
+            before: Dict[str, Optional[Dict[str, object]]] = {}
+            if stale:
+                before = {key: self._assigned(key) for key in self._items}
+
+            for edit in edits:
+                key = (edit.item.name if edit.op == "add" else edit.name).lower()
+                if key not in before:
+                    before[key] = self._assigned(key)
+                if edit.op == "add":
+                    item = edit.item
+                elif edit.op == "remove":
+                    item = None
+                else:
+                    item = self._items[key].model_copy(update={"quantity": edit.quantity})
+
+                if stale:
+                    if item is None:
+                        self._items.pop(key, None)
+                    else:
+                        self._items[key] = item
+                else:
+                    self._set_item(key, item)
+
+            if stale:
+                self._reprice(catalog)
+            else:
+                self._best = self._pick_store()
+                if self._best != before_store:
+                    # Every untouched item moves with the store; their rows did not change
+                    for key in self._items:
+                        if key not in before:
+                            before[key] = self._assigned(key, before_store)
+
+            items = []
+            for key in sorted(before):
+                after = self._assigned(key)
+                if after != before[key]:
+                    items.append({"item": key, "before": before[key], "after": after})
+
+            after_total, after_savings = self._totals()
+            self.version += 1
+            diff: Dict[str, object] = {
+                "session_id": self.session_id,
+                "version": self.version,
+                "catalog_version": self._catalog.version,
+                "repriced": stale,
+                "grand_total": {"before": before_total, "after": after_total},
+                "total_savings": {"before": before_savings, "after": after_savings},
+                "items": items,
+            }
+            if not self._multi:
+                diff["store"] = {"before": before_store, "after": self._best}
+            return diff
+
+    # ------------------------------------------------------------------------
+    # Full result
+    # ------------------------------------------------------------------------
+
+    @property
+    def shopping_list(self) -> List[ShoppingItem]:
+        return list(self._items.values())
+
+    def result(self) -> OptimizeResponse:
+        """The full optimization of the current list, as /api/optimize returns it."""
+        with self._lock:
+            catalog = self._catalog_source()
+            if catalog.version != self._catalog.version:
+                # Later diffs are relative to what the client is shown now
+                self._reprice(catalog)
+            request = self._request.model_copy(update={"shopping_list": self.shopping_list})
+            predictions = self._predictions_source() if self._predictions_source else None
+            view = self._view
+            return optimize_shopping_list(
+                request, view.store_items, view.coupons,
+                matcher=view.matcher, mixer=view.mixer,
+                predictions=predictions, locality=self.locality,
+                best_buys=view.best_buys
+            )
+
+
+class SessionRegistry:
+    """In-memory optimization sessions by id, dropped when idle or least recently used."""
+
+    def __init__(
+        self,
+        catalog_source: Callable[[], CatalogIndex],
+        locality: Optional[LocalityIndex] = None,
+        predictions_source: Optional[Callable[[], Dict[str, Prediction]]] = None,
+        ttl_seconds: float = SESSION_TTL_SECONDS,
+        max_sessions: int = MAX_SESSIONS
+    ):
+        self._catalog_source = catalog_source
+        self.locality = locality
+        self._predictions_source = predictions_source
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        # Least recently used first
+        self._sessions: "OrderedDict[str, OptimizationSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, request: OptimizeRequest) -> OptimizationSession:
+        session = OptimizationSession(
+            uuid.uuid4().hex, request, self._catalog_source,
+            self.locality, self._predictions_source
+        )
+        with self._lock:
+            self._expire(session.touched)
+            self._sessions[session.session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def get(self, session_id: str) -> Optional[OptimizationSession]:
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.touched = now
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _expire(self, now: float) -> None:
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.touched <= self.ttl_seconds:
+                return
+            self._sessions.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
@@ -0,0 +1,416 @@
+"""
+Coupon Sentinel - Package Mix Optimizer
+
+Finds the cheapest combination of package sizes that covers a requested
+quantity at one store (e.g. 18-ct + 12-ct eggs instead of 2x 18-ct):
+- Bounded knapsack over every matched product with comparable units
+- Each line priced with its best coupon stack, so BOGO and min_quantity
+  thresholds are part of the search
+- Coupons are not reused across lines beyond their max_uses
+- Lines are priced at the shopper's loyalty tier; base cost uses the
+  regular price so sale and loyalty savings are reported
+- Rebates from the shopper's apps are looked up per (app, product) in the
+  same pass; products can optionally be ranked by cost net of rebates
+- Optionally, the K cheapest single-product alternatives are kept in a
+  bounded heap while the matches are priced, with no extra pass
+
+Money is integer cents throughout (backend/money.py); dollar properties
+are provided for responses. Results are memoized per (store, requested
+item), so common list entries are solved once per catalog version.
+"""
+
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+from collections import OrderedDict
+import heapq
+import math
+import threading
+from ..models import ShoppingItem, StoreItem, Coupon, CouponType, AppliedCoupon
+from .stacking_logic import best_coupon_stack_cents, matches_item
+from .units import canonical_size, compatible, packages_needed, to_base
+from .loyalty import GUEST, regular_cents, tier_cents
+from ..money import to_cents, to_dollars
+
+
+# Upper bound on packages of one product considered in a mix
+MAX_PACKAGES_PER_PRODUCT = 24
+
+# Memoized (store, requested item) solutions kept per mixer
+MIX_CACHE_SIZE = 10_000
+
+# Per-product coupon and rebate lookups, and priced coupon stacks, kept per mixer
+PRODUCT_CACHE_SIZE = 50_000
+STACK_CACHE_SIZE = 100_000
+
+# Tolerance for covered package amounts (money is exact integer cents)
+_EPSILON = 1e-9
+
+# Sorted ((coupon_id, uses), ...) consumed by earlier lines of a mix
+UsedCoupons = Tuple[Tuple[str, int], ...]
+
+# ((app, amount), ...) rebates a line qualifies for
+Rebates = Tuple[Tuple[str, float], ...]
+
+NO_APPS: FrozenSet[str] = frozenset()
+
+
+class PurchaseLine(NamedTuple):
+    """Packages of one product bought towards a requested item, in cents."""
+    product: StoreItem
+    quantity: int
+    unit_cents: int
+    applied_coupons: List[AppliedCoupon]
+    base_cents: int
+    final_cents: int
+    rebates: Rebates = ()
+
+    @property
+    def rebate_cents(self) -> int:
+        return sum(to_cents(amount) for _, amount in self.rebates)
+
+    @property
+    def unit_price(self) -> float:
+        return to_dollars(self.unit_cents)
+
+    @property
+    def base_cost(self) -> float:
+        return to_dollars(self.base_cents)
+
+    @property
+    def final_cost(self) -> float:
+        return to_dollars(self.final_cents)
+
+    @property
+    def rebate_total(self) -> float:
+        return to_dollars(self.rebate_cents)
+
+
+class Purchase(NamedTuple):
+    """Everything bought at one store to fulfill one requested item, in cents."""
+    lines: List[PurchaseLine]
+    base_cents: int
+    final_cents: int
+    rebate_cents: int = 0
+    # Cheapest single-product purchases other than this one, cheapest first
+    alternatives: Tuple["Purchase", ...] = ()
+
+    @property
+    def net_cents(self) -> int:
+        """In-store cost minus rebates claimed afterwards."""
+        return self.final_cents - self.rebate_cents
+
+    @property
+    def base_cost(self) -> float:
+        return to_dollars(self.base_cents)
+
+    @property
+    def final_cost(self) -> float:
+        return to_dollars(self.final_cents)
+
+    @property
+    def rebate_total(self) -> float:
+        return to_dollars(self.rebate_cents)
+
+    @property
+    def net_cost(self) -> float:
+        return to_dollars(self.net_cents)
+
+
+def _purchase(lines: List[PurchaseLine], base_cents: int) -> Purchase:
+    return Purchase(
+        lines, base_cents,
+        sum(line.final_cents for line in lines),
+        sum(line.rebate_cents for line in lines),
+    )
+
+
+def _line_cost(line: PurchaseLine, net: bool) -> int:
+    """What a line costs for ranking purposes, in cents."""
+    return line.final_cents - line.rebate_cents if net else line.final_cents
+
+
+def _use_coupons(used: UsedCoupons, applied: List[AppliedCoupon]) -> UsedCoupons:
+    if not applied:
+        return used
+    counts = dict(used)
+    for coupon in applied:
+        counts[coupon.coupon_id] = counts.get(coupon.coupon_id, 0) + 1
+    return tuple(sorted(counts.items()))
+
+
+def _cheaper(a: Tuple[int, int, list], b: Tuple[int, int, list]) -> bool:
+    """Lower cost wins; on a tie, fewer purchase lines wins."""
+    return a[0] < b[0] or (a[0] == b[0] and len(a[2]) < len(b[2]))
+
+
+class PackageMixer:
+    """Per-catalog solver for the cheapest package combination per item."""
+
+    def __init__(self, coupons: List[Coupon]):
+        self.coupons = coupons
+        # Per-product caches are keyed by id(product) and hold the product
+        # itself, so an id is never reused for another product while cached:
+        # id -> (product, coupons that apply to it)
+        self._applicable: "OrderedDict[int, Tuple[StoreItem, List[Coupon]]]" = OrderedDict()
+        # id -> (product, lowercased app -> (app, amount) rebates)
+        self._rebates: "OrderedDict[int, Tuple[StoreItem, Dict[str, Rebates]]]" = OrderedDict()
+        # (id, quantity, tier, used) -> (product, applied coupons, discount cents)
+        self._stacks: "OrderedDict[tuple, Tuple[StoreItem, List[AppliedCoupon], int]]" = OrderedDict()
+        self._memo: "OrderedDict[tuple, Purchase]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------------
+    # Line pricing
+    # ------------------------------------------------------------------------
+
+    def _cached(self, cache: OrderedDict, key, product: StoreItem):
+        """Cached entry (without the product) if it was stored for this very product."""
+        with self._lock:
+            entry = cache.get(key)
+            if entry is None or entry[0] is not product:
+                return None
+            cache.move_to_end(key)
+            return entry[1:]
+
+    def _cache(self, cache: OrderedDict, key, entry: tuple, limit: int) -> None:
+        with self._lock:
+            cache[key] = entry
+            if len(cache) > limit:
+                cache.popitem(last=False)
+
+    def _applicable_coupons(self, product: StoreItem) -> List[Coupon]:
+        key = id(product)
+        cached = self._cached(self._applicable, key, product)
+        if cached is not None:
+            return cached[0]
+        applicable = [c for c in self.coupons if matches_item(c, product)]
+        self._cache(self._applicable, key, (product, applicable), PRODUCT_CACHE_SIZE)
+        return applicable
+
+    def _rebate_index(self, product: StoreItem) -> Dict[str, Rebates]:
+        key = id(product)
+        cached = self._cached(self._rebates, key, product)
+        if cached is not None:
+            return cached[0]
+        index: Dict[str, Rebates] = {}
+        for coupon in self._applicable_coupons(product):
+            if coupon.coupon_type == CouponType.REBATE:
+                app = coupon.source.lower()
+                index[app] = index.get(app, ()) + ((coupon.source, coupon.value),)
+        self._cache(self._rebates, key, (product, index), PRODUCT_CACHE_SIZE)
+        return index
+
+    def rebates_for(self, product: StoreItem, apps: FrozenSet[str]) -> Rebates:
+        """Rebates on a product from the given (lowercased) apps."""
+        if not apps:
+            return ()
+        index = self._rebate_index(product)
+        if not index:
+            return ()
+        return tuple(rebate for app in sorted(apps & index.keys()) for rebate in index[app])
+
+    def with_rebates(self, purchase: Purchase, apps: FrozenSet[str]) -> Purchase:
+        """A purchase solved without rebate apps, with the given apps' rebates attached."""
+        if not apps:
+            return purchase
+        lines = [line._replace(rebates=self.rebates_for(line.product, apps)) for line in purchase.lines]
+        return _purchase(lines, purchase.base_cents)
+
+    def price_line(
+        self,
+        product: StoreItem,
+        quantity: int,
+        used: UsedCoupons = (),
+        tier: int = GUEST,
+        apps: FrozenSet[str] = NO_APPS
+    ) -> PurchaseLine:
+        """Price `quantity` packages of a product with its best coupon stack and rebates."""
+        price = tier_cents(product, tier)
+        applicable = self._applicable_coupons(product)
+        # Only coupons still relevant to this product affect the stack
+        relevant_used = tuple((cid, n) for cid, n in used if any(c.id == cid for c in applicable))
+        key = (id(product), quantity, tier, relevant_used)
+
+        cached = self._cached(self._stacks, key, product)
+        if cached is None:
+            uses = dict(relevant_used)
+            available = [c for c in applicable if uses.get(c.id, 0) < c.max_uses]
+            cached = best_coupon_stack_cents(product, quantity, available, price)
+            self._cache(self._stacks, key, (product, *cached), STACK_CACHE_SIZE)
+
+        applied, discount = cached
+        return PurchaseLine(
+            product, quantity, price, applied,
+            regular_cents(product) * quantity,
+            price * quantity - discount,
+            self.rebates_for(product, apps),
+        )
+
+    # ------------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------------
+
+    def best_purchase(
+        self,
+        requested: ShoppingItem,
+        matches: List[StoreItem],
+        store_name: str,
+        tier: int = GUEST,
+        apps: FrozenSet[str] = NO_APPS,
+        net_of_rebates: bool = False,
+        alternatives: int = 0,
+        brand_only: bool = False
+    ) -> Optional[Purchase]:
+        """
+        Cheapest way to cover the requested quantity from the matched products.
+
+        `apps` (lowercased rebate app names) attaches the shopper's rebates
+        to each line; with `net_of_rebates`, cost after rebates decides.
+        With `alternatives`, up to that many of the cheapest other ways to
+        buy it from a single product are attached to the result. With
+        `brand_only`, only products of the item's preferred brand are used.
+        """
+        if brand_only:
+            brand = (requested.brand_preference or "").lower()
+            matches = [m for m in matches if brand and m.brand and brand in m.brand.lower()]
+        if not matches:
+            return None
+
+        key = (
+            store_name,
+            requested.name.lower(),
+            (requested.brand_preference or "").lower(),
+            requested.quantity,
+            requested.unit,
+            tier,
+            apps,
+            net_of_rebates,
+            alternatives,
+            brand_only,
+        )
+        with self._lock:
+            cached = self._memo.get(key)
+            if cached is not None:
+                self._memo.move_to_end(key)
+                return cached
+
+        purchase = self._solve(requested, matches, tier, apps, net_of_rebates, alternatives)
+
+        with self._lock:
+            self._memo[key] = purchase
+            if len(self._memo) > MIX_CACHE_SIZE:
+                self._memo.popitem(last=False)
+        return purchase
+
+    def _solve(
+        self,
+        requested: ShoppingItem,
+        matches: List[StoreItem],
+        tier: int,
+        apps: FrozenSet[str],
+        net: bool,
+        alternatives: int = 0
+    ) -> Purchase:
+        wanted = to_base(requested.quantity, requested.unit)
+
+        def cost(purchase: Purchase) -> int:
+            return purchase.net_cents if net else purchase.final_cents
+
+        mixable: List[StoreItem] = []
+        best: Optional[Purchase] = None
+        # Max-heap (negated cost; earlier matches win ties) of the cheapest
+        # single-product purchases; one extra slot in case the best is among them
+        kept: List[Tuple[int, int, Purchase]] = []
+
+        for index, product in enumerate(matches):
+            size = canonical_size(product)
+            mix = wanted is not None and size is not None and size.amount > 0 and compatible(wanted, size)
+            if mix:
+                mixable.append(product)
+                if not alternatives:
+                    continue
+            # The product on its own (the only option for incomparable units)
+            line = self.price_line(product, packages_needed(requested, product), tier=tier, apps=apps)
+            single = _purchase([line], line.base_cents)
+            if alternatives:
+                entry = (-cost(single), -index, single)
+                if len(kept) <= alternatives:
+                    heapq.heappush(kept, entry)
+                elif entry > kept[0]:
+                    heapq.heapreplace(kept, entry)
+            if not mix and (best is None or cost(single) < cost(best)):
+                best = single
+
+        if mixable:
+            mixed = self._solve_mix(wanted.amount, mixable, tier, apps, net)
+            if mixed is None:
+                # Too many packages to search; fall back to one product each
+                for product in mixable:
+                    line = self.price_line(product, packages_needed(requested, product), tier=tier, apps=apps)
+                    single = _purchase([line], line.base_cents)
+                    if mixed is None or cost(single) < cost(mixed):
+                        mixed = single
+            if best is None or cost(mixed) < cost(best):
+                best = mixed
+
+        if kept:
+            chosen = [(line.product.item_id, line.quantity) for line in best.lines]
+            others = tuple(
+                single for _, _, single in sorted(kept, reverse=True)
+                if [(line.product.item_id, line.quantity) for line in single.lines] != chosen
+            )
+            best = best._replace(alternatives=others[:alternatives])
+        return best
+
+    def _solve_mix(
+        self,
+        target: float,
+        products: List[StoreItem],
+        tier: int,
+        apps: FrozenSet[str],
+        net: bool
+    ) -> Optional[Purchase]:
+        """Bounded knapsack over (amount covered, coupons used) states."""
+        # state -> (ranking cost, base cost, lines)
+        states: Dict[Tuple[float, UsedCoupons], Tuple[int, int, List[PurchaseLine]]] = {
+            (0.0, ()): (0, 0, [])
+        }
+
+        for product in products:
+            size = canonical_size(product).amount
+            # Buying past the target can be cheaper when a coupon needs more packages
+            threshold = max((c.min_quantity for c in self._applicable_coupons(product)), default=1)
+            needed = max(1, math.ceil(target / size - _EPSILON))
+            max_n = min(max(needed, threshold), MAX_PACKAGES_PER_PRODUCT)
+            next_states = dict(states)
+
+            for (covered, used), (cost, base, lines) in states.items():
+                if covered >= target - _EPSILON:
+                    continue
+                for n in range(1, max_n + 1):
+                    line = self.price_line(product, n, used, tier, apps)
+                    new_covered = round(min(target, covered + n * size), 6)
+                    state = (new_covered, _use_coupons(used, line.applied_coupons))
+                    candidate = (cost + _line_cost(line, net), base + line.base_cents, lines + [line])
+
+                    current = next_states.get(state)
+                    if current is None or _cheaper(candidate, current):
+                        next_states[state] = candidate
+                    if new_covered >= target - _EPSILON and n >= threshold:
+                        # Past every coupon threshold, more packages can only cost more
+                        break
+
+            states = next_states
+
+        complete = [
+            value for (covered, _), value in states.items()
+            if covered >= target - _EPSILON and value[2]
+        ]
+        if not complete:
+            return None
+
+        cheapest = complete[0]
+        for value in complete[1:]:
+            if _cheaper(value, cheapest):
+                cheapest = value
+        _, base, lines = cheapest
+        return _purchase(lines, base)
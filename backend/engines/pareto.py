@@ -0,0 +1,200 @@
+"""
+Coupon Sentinel - Plan Frontier
+
+Plans that trade total cost against store stops and brand preference:
+1. Each list entry is priced at every candidate store: its cheapest
+   purchase and, when that ignores the preferred brand, its cheapest
+   from the preferred brand (entries that are not `flexible` only get
+   the latter)
+2. Partial plans are grown item by item, keyed by the set of stores they
+   visit. Within a key only (cost, violations) non-dominated points are
+   kept, and points dominated by a plan visiting a subset of the stores
+   are dropped, since every completion of theirs is dominated too
+3. The complete plans left are filtered to the Pareto frontier over
+   (cost, stores, brand violations), cheapest first
+
+Plans visit at most MAX_FRONTIER_STORES stores; an entry that cannot be
+added within that bound, or has no acceptable product, is unfulfilled.
+"""
+
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+from ..models import (
+    FrontierPlan, OptimizeRequest, ShoppingItem, StoreItem, Coupon
+)
+from .matching import ItemMatcher
+from .package_mix import PackageMixer, Purchase
+from .loyalty import member_stores, store_tier
+from .price_prediction import Prediction
+from .locality import LocalityIndex
+from .pricing_engine import (
+    assignments_to_plans, build_response, candidate_stores, find_matches, rebate_apps
+)
+
+
+MAX_FRONTIER_STORES = 4
+
+
+class Option(NamedTuple):
+    """One way to buy a list entry."""
+    store: str
+    cost: int
+    violation: int
+    purchase: Purchase
+
+
+# Persistent list of choices: (previous, item index, option), or None
+Choices = Optional[Tuple[object, int, Option]]
+
+# (cost in cents, brand violations, choices)
+Point = Tuple[int, int, Choices]
+
+
+def honors_brand(requested: ShoppingItem, purchase: Purchase) -> bool:
+    """Whether every product bought is of the preferred brand (if there is one)."""
+    brand = (requested.brand_preference or "").lower()
+    if not brand:
+        return True
+    return all(line.product.brand and brand in line.product.brand.lower() for line in purchase.lines)
+
+
+def _cost_cents(purchase: Purchase, net: bool) -> int:
+    return purchase.net_cents if net else purchase.final_cents
+
+
+def item_options(
+    request: OptimizeRequest,
+    requested: ShoppingItem,
+    items_by_store: Dict[str, List[StoreItem]],
+    stores: List[str],
+    tiers: Dict[str, int],
+    apps: FrozenSet[str],
+    matcher: Optional[ItemMatcher],
+    mixer: PackageMixer
+) -> List[Option]:
+    """The non-dominated ways to buy one entry at each store."""
+    net = request.rank_by_net_cost
+    options: List[Option] = []
+    for store in stores:
+        matches = find_matches(requested, items_by_store.get(store, []), store, matcher)
+        best = mixer.best_purchase(requested, matches, store, tiers[store], apps, net)
+        if best is None:
+            continue
+        if honors_brand(requested, best):
+            options.append(Option(store, _cost_cents(best, net), 0, best))
+            continue
+
+        branded = mixer.best_purchase(requested, matches, store, tiers[store], apps, net, brand_only=True)
+        if branded is not None:
+            options.append(Option(store, _cost_cents(branded, net), 0, branded))
+        if requested.flexible:
+            options.append(Option(store, _cost_cents(best, net), 1, best))
+    return options
+
+
+def _pareto_2d(points: List[Point]) -> List[Point]:
+    """Points not dominated in (cost, violations), cheapest first."""
+    points.sort(key=lambda p: (p[0], p[1]))
+    kept: List[Point] = []
+    for point in points:
+        if not kept or point[1] < kept[-1][1]:
+            kept.append(point)
+    return kept
+
+
+def _dominated(point: Point, by: List[Point]) -> bool:
+    return any(other[0] <= point[0] and other[1] <= point[1] for other in by)
+
+
+def _prune_subsumed(states: Dict[FrozenSet[str], List[Point]]) -> Dict[FrozenSet[str], List[Point]]:
+    """Drop points dominated by a partial plan that visits a proper subset of their stores."""
+    keys = sorted(states, key=len)
+    pruned: Dict[FrozenSet[str], List[Point]] = {}
+    for key in keys:
+        points = states[key]
+        for smaller, dominators in pruned.items():
+            if len(smaller) < len(key) and smaller < key:
+                points = [p for p in points if not _dominated(p, dominators)]
+                if not points:
+                    break
+        if points:
+            pruned[key] = points
+    return pruned
+
+
+def optimize_frontier(
+    request: OptimizeRequest,
+    store_items: List[StoreItem],
+    coupons: List[Coupon],
+    matcher: Optional[ItemMatcher] = None,
+    mixer: Optional[PackageMixer] = None,
+    predictions: Optional[Dict[str, Prediction]] = None,
+    locality: Optional[LocalityIndex] = None
+) -> List[FrontierPlan]:
+    """
+    Pareto-optimal plans over total cost, number of stores and brand violations.
+
+    Takes the same inputs as optimize_shopping_list; `allow_multi_store`
+    is ignored since the frontier spans single- and multi-store plans.
+    """
+    if mixer is None:
+        mixer = PackageMixer(coupons)
+
+    stores = candidate_stores(request, store_items, locality)
+    items_by_store: Dict[str, List[StoreItem]] = {}
+    for item in store_items:
+        items_by_store.setdefault(item.store_name, []).append(item)
+
+    members_of = member_stores(request.loyalty_memberships)
+    tiers = {store: store_tier(store, members_of) for store in stores}
+    apps = rebate_apps(request)
+
+    # Store set visited -> non-dominated partial plans
+    states: Dict[FrozenSet[str], List[Point]] = {frozenset(): [(0, 0, None)]}
+
+    for index, requested in enumerate(request.shopping_list):
+        options = item_options(request, requested, items_by_store, stores, tiers, apps, matcher, mixer)
+
+        grown: Dict[FrozenSet[str], List[Point]] = {}
+        for visited, points in states.items():
+            for option in options:
+                key = visited | {option.store}
+                if len(key) > MAX_FRONTIER_STORES:
+                    continue
+                bucket = grown.setdefault(key, [])
+                for cost, violations, choices in points:
+                    bucket.append((cost + option.cost, violations + option.violation, (choices, index, option)))
+
+        if not grown:
+            # Unfulfilled in every plan
+            continue
+        states = _prune_subsumed({key: _pareto_2d(points) for key, points in grown.items()})
+
+    complete = sorted(
+        (
+            (cost, len(visited), violations, choices)
+            for visited, points in states.items()
+            for cost, violations, choices in points
+        ),
+        key=lambda plan: plan[:3]
+    )
+
+    frontier: List[Tuple[int, int, int, Choices]] = []
+    for plan in complete:
+        if not any(f[0] <= plan[0] and f[1] <= plan[1] and f[2] <= plan[2] for f in frontier):
+            frontier.append(plan)
+
+    results = []
+    for _, store_count, violations, choices in frontier:
+        assignments: Dict[str, Tuple[str, Purchase]] = {}
+        while choices is not None:
+            choices, index, option = choices
+            assignments[request.shopping_list[index].name] = (option.store, option.purchase)
+
+        result = build_response(request, assignments_to_plans(request, assignments), predictions)
+        results.append(FrontierPlan(
+            grand_total=result.grand_total,
+            store_count=store_count,
+            brand_violations=violations,
+            result=result
+        ))
+    return results
@@ -0,0 +1,186 @@
+"""
+Coupon Sentinel - Price Prediction
+
+Batch "wait N days" predictions from the price history:
+1. Stream daily closing prices for every SKU in one ordered scan
+2. Per SKU, compare against a trailing moving average to find sale days
+3. Estimate the sale cycle from the spacing of sale starts
+4. Store the next expected sale (days away, expected price) in a table
+
+Requests never model anything: the optimizer looks predictions up by
+item id. Run the batch with `python -m backend.engines.price_prediction`.
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from datetime import datetime, timezone
+from itertools import groupby
+import statistics
+import threading
+import time
+
+from ..money import to_dollars
+from ..storage.price_history import DAY, PriceHistory, get_price_history, to_epoch
+
+
+# Days of history each model is fitted on
+LOOKBACK_DAYS = 180
+
+# Trailing window for the moving average, in days
+MOVING_AVERAGE_DAYS = 28
+
+# A day is a sale day when it closes this far below the moving average
+SALE_THRESHOLD = 0.05
+
+# Only predict sales expected within this many days
+HORIZON_DAYS = 21
+
+# Minimum confidence for a prediction to be surfaced to shoppers
+MIN_CONFIDENCE = 0.5
+
+# How long the in-process prediction table is trusted before reloading
+TABLE_TTL_SECONDS = 300
+
+
+class Prediction(NamedTuple):
+    """Expected next sale for one item."""
+    item_id: str
+    days_until: int
+    current_cents: int
+    expected_cents: int
+    confidence: float
+
+
+def fit_series(item_id: str, closes: List[int]) -> Optional[Prediction]:
+    """
+    Fit a sale-cycle model to one item's daily closes (oldest first, cents).
+
+    Returns None when there is no regular sale cycle or the item is
+    already at (or below) its typical sale price.
+    """
+    if len(closes) < MOVING_AVERAGE_DAYS * 2:
+        return None
+
+    # Trailing moving average via a running sum
+    window_sum = sum(closes[:MOVING_AVERAGE_DAYS])
+    sale_starts: List[int] = []
+    sale_prices: List[int] = []
+    on_sale = False
+    for day in range(MOVING_AVERAGE_DAYS, len(closes)):
+        average = window_sum / MOVING_AVERAGE_DAYS
+        price = closes[day]
+        is_sale = price < average * (1 - SALE_THRESHOLD)
+        if is_sale:
+            sale_prices.append(price)
+            if not on_sale:
+                sale_starts.append(day)
+        on_sale = is_sale
+        window_sum += price - closes[day - MOVING_AVERAGE_DAYS]
+
+    if len(sale_starts) < 2:
+        return None
+
+    intervals = [b - a for a, b in zip(sale_starts, sale_starts[1:])]
+    period = statistics.mean(intervals)
+    spread = statistics.pstdev(intervals) if len(intervals) > 1 else period / 2
+    confidence = max(0.0, 1.0 - spread / period)
+
+    current = closes[-1]
+    expected = int(statistics.median(sale_prices))
+    if on_sale or current <= expected:
+        return None
+
+    today = len(closes) - 1
+    next_sale = sale_starts[-1] + period
+    while next_sale <= today:
+        next_sale += period
+    days_until = round(next_sale - today)
+    if days_until > HORIZON_DAYS:
+        return None
+
+    return Prediction(item_id, max(1, days_until), current, expected, round(confidence, 2))
+
+
+def _fill_forward(rows: Iterable[Tuple[int, int]], start: int, end: int) -> List[int]:
+    """Daily closes from (bucket, close) rows, carrying prices over gaps."""
+    closes: List[int] = []
+    last: Optional[int] = None
+    day = start
+    for bucket, close in rows:
+        if bucket < start:
+            last = close
+            continue
+        while day < bucket and last is not None:
+            closes.append(last)
+            day += DAY
+        day = bucket + DAY
+        closes.append(close)
+        last = close
+    while day <= end and last is not None:
+        closes.append(last)
+        day += DAY
+    return closes
+
+
+def run_prediction_batch(
+    history: Optional[PriceHistory] = None,
+    now: Optional[datetime] = None
+) -> int:
+    """Refit every SKU's model and replace the predictions table. Returns rows written."""
+    history = history or get_price_history()
+    end = to_epoch(now or datetime.now(timezone.utc))
+    end -= end % DAY
+    start = end - LOOKBACK_DAYS * DAY
+
+    predictions = []
+    for item_id, rows in groupby(history.iter_daily_closes(since=start - DAY), key=lambda r: r[0]):
+        closes = _fill_forward(((bucket, close) for _, bucket, close in rows), start, end)
+        prediction = fit_series(item_id, closes)
+        if prediction is not None:
+            predictions.append(prediction)
+
+    history.replace_predictions(predictions, computed_at=end)
+    invalidate_prediction_table()
+    return len(predictions)
+
+
+# ============================================================================
+# In-process lookup table
+# ============================================================================
+
+_table: Optional[Dict[str, Prediction]] = None
+_table_loaded_at = 0.0
+_table_lock = threading.Lock()
+
+
+def get_prediction_table(history: Optional[PriceHistory] = None) -> Dict[str, Prediction]:
+    """Confident predictions keyed by item id, reloaded at most every TTL."""
+    global _table, _table_loaded_at
+    if _table is None or time.monotonic() - _table_loaded_at > TABLE_TTL_SECONDS:
+        with _table_lock:
+            history = history or get_price_history()
+            _table = {
+                p.item_id: p for p in (Prediction(*row) for row in history.load_predictions())
+                if p.confidence >= MIN_CONFIDENCE
+            }
+            _table_loaded_at = time.monotonic()
+    return _table
+
+
+def invalidate_prediction_table() -> None:
+    """Force the next lookup to reload predictions."""
+    global _table
+    _table = None
+
+
+def prediction_note(prediction: Prediction) -> str:
+    """Shopper-facing note for a prediction."""
+    days = "day" if prediction.days_until == 1 else "days"
+    return (
+        f"Likely cheaper in {prediction.days_until} {days} "
+        f"(~${to_dollars(prediction.expected_cents):.2f} vs ${to_dollars(prediction.current_cents):.2f} now)"
+    )
+
+
+if __name__ == "__main__":
+    written = run_prediction_batch()
+    print(f"Wrote {written} price predictions")
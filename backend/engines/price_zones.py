@@ -0,0 +1,239 @@
+"""
+Coupon Sentinel - Price Zones
+
+Chains price identically across every store in a price zone, so the
+catalog stores each chain's products and coupons once and describes
+stores as differences from them:
+1. Store locations map to a zone; a zone's overrides (a different price,
+   or an item its stores do not carry) apply to every store in it
+2. Per-store overrides are layered on top of their zone's
+3. The chain-level catalog (CatalogIndex) is the records and indexes every
+   zone shares; a view for a set of stores copies only the items they
+   override and reuses the catalog's matcher through an overlay
+4. Optimizing for a shopper prices each chain at its nearest location, so
+   the main optimize path sees the same effective prices as optimizing at
+   that store
+
+Memory and index size scale with the catalog plus its overrides, not with
+store count; stores without overrides cost one dict entry.
+"""
+
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+from collections import Counter, OrderedDict
+import threading
+from ..models import StoreItem, Coupon, OptimizeRequest, ShoppingItem
+from .best_buys import BestBuyTable
+from .locality import LocalityIndex
+from .matching import FUZZY_CUTOFF, ItemMatcher
+from .package_mix import PackageMixer
+from . import loyalty
+
+
+# Fields an override may change; matching fields stay chain-wide
+OVERRIDE_FIELDS = ("price", "regular_price", "loyalty_price")
+
+# Views over stores with overrides kept built
+VIEW_CACHE_SIZE = 1024
+
+# item id -> field updates, or None when the item is not carried
+StoreOverrides = Dict[str, Optional[Dict[str, Any]]]
+
+# Required StoreItem fields, for type-checking overrides on their own
+_PROBE_ITEM = {
+    "store_name": "", "item_name": "", "package_size": 1, "package_unit": "count",
+    "price": 0, "category": "",
+}
+
+
+class _OverlayMatcher:
+    """The catalog's matcher with some stores' overridden products swapped in."""
+
+    def __init__(self, matcher: ItemMatcher, replaced: Dict[int, Optional[StoreItem]]):
+        self._matcher = matcher
+        # id(catalog item) -> store copy, or None when not carried
+        self._replaced = replaced
+
+    def match_items(
+        self,
+        requested: ShoppingItem,
+        store: Optional[str] = None,
+        cutoff: float = FUZZY_CUTOFF
+    ) -> List[StoreItem]:
+        matches = []
+        for item in self._matcher.match_items(requested, store=store, cutoff=cutoff):
+            item = self._replaced.get(id(item), item)
+            if item is not None:
+                matches.append(item)
+        return matches
+
+
+class CatalogView(NamedTuple):
+    """
+    The catalog as priced at some store locations.
+
+    Has the attributes of a CatalogIndex the optimizer reads, so either
+    can be passed to optimize_shopping_list.
+    """
+    store_ids: Tuple[str, ...]
+    store_items: List[StoreItem]
+    coupons: List[Coupon]
+    matcher: Any  # ItemMatcher, or an overlay over it
+    mixer: PackageMixer
+    best_buys: Optional[BestBuyTable]
+
+
+def validate_override(updates: Any) -> Optional[Dict[str, Any]]:
+    """
+    An override's field updates, checked against the StoreItem schema.
+
+    Raises ValueError for fields outside OVERRIDE_FIELDS or values a
+    StoreItem would reject, so bad overrides fail when loaded rather than
+    when a shopper's request first prices that store.
+    """
+    if updates is None:
+        return None
+    if not isinstance(updates, dict):
+        raise ValueError("Override must be an object of field updates, or null")
+    unknown = set(updates) - set(OVERRIDE_FIELDS)
+    if unknown:
+        raise ValueError(f"Cannot override fields: {', '.join(sorted(unknown))}")
+    probe = StoreItem.model_validate({**_PROBE_ITEM, **updates})
+    return {field: getattr(probe, field) for field in updates}
+
+
+def apply_override(item: StoreItem, updates: Dict[str, Any]) -> StoreItem:
+    """A store's copy of a catalog item with validated override fields replaced."""
+    copy = item.model_copy(update=updates)
+    # Tier prices depend on the overridden fields; the canonical size does not
+    loyalty.annotate_prices(copy)
+    return copy
+
+
+def _validated(overrides: StoreOverrides) -> StoreOverrides:
+    return {item_id: validate_override(updates) for item_id, updates in overrides.items()}
+
+
+def layer_overrides(zone: StoreOverrides, store: StoreOverrides) -> StoreOverrides:
+    """A store's overrides on top of its zone's; the store's fields win."""
+    merged = dict(zone)
+    for item_id, updates in store.items():
+        below = merged.get(item_id)
+        merged[item_id] = {**below, **updates} if below is not None and updates is not None else updates
+    return merged
+
+
+class ZonedCatalog:
+    """Store locations mapped onto price zones over one chain-level catalog."""
+
+    def __init__(
+        self,
+        catalog: Any,
+        store_zones: Mapping[str, str],
+        zone_overrides: Optional[Mapping[str, StoreOverrides]] = None,
+        store_overrides: Optional[Mapping[str, StoreOverrides]] = None
+    ):
+        # The CatalogIndex whose records the zones share
+        self.catalog = catalog
+        self.store_zones: Dict[str, str] = dict(store_zones)
+        self.zone_overrides: Dict[str, StoreOverrides] = {
+            zone_id: _validated(o) for zone_id, o in (zone_overrides or {}).items() if o
+        }
+        self.store_overrides: Dict[str, StoreOverrides] = {
+            store_id: _validated(o) for store_id, o in (store_overrides or {}).items() if o
+        }
+        unknown = set(self.store_overrides) - self.store_zones.keys()
+        if unknown:
+            raise ValueError(f"Overrides for stores without a zone: {', '.join(sorted(unknown))}")
+
+        self.shared = CatalogView(
+            (), catalog.store_items, catalog.coupons, catalog.matcher, catalog.mixer, catalog.best_buys
+        )
+        self._views: "OrderedDict[Tuple[str, ...], CatalogView]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def overrides_for(self, store_id: str) -> StoreOverrides:
+        """A store's effective overrides: its zone's with its own on top."""
+        zone = self.zone_overrides.get(self.store_zones.get(store_id, ""), {})
+        own = self.store_overrides.get(store_id)
+        return layer_overrides(zone, own) if own else zone
+
+    def _overridden(self, store_id: str) -> bool:
+        return store_id in self.store_overrides or self.store_zones.get(store_id) in self.zone_overrides
+
+    def view(self, store_ids: Iterable[str]) -> CatalogView:
+        """
+        The catalog as priced at the given stores (at most one per chain).
+
+        Stores without overrides price exactly like the catalog, so if none
+        of them has any, the catalog's own records and indexes are returned.
+        """
+        key = tuple(sorted(s for s in set(store_ids) if self._overridden(s)))
+        if not key:
+            return self.shared
+
+        with self._lock:
+            cached = self._views.get(key)
+            if cached is not None:
+                self._views.move_to_end(key)
+                return cached
+
+        view = self._build_view(key)
+
+        with self._lock:
+            self._views[key] = view
+            if len(self._views) > VIEW_CACHE_SIZE:
+                self._views.popitem(last=False)
+        return view
+
+    def _build_view(self, store_ids: Tuple[str, ...]) -> CatalogView:
+        items_by_id = self.catalog.items_by_id
+        replaced: Dict[int, Optional[StoreItem]] = {}
+        for store_id in store_ids:
+            for item_id, updates in self.overrides_for(store_id).items():
+                item = items_by_id.get(item_id)
+                if item is not None:
+                    replaced[id(item)] = apply_override(item, updates) if updates is not None else None
+
+        items = []
+        for item in self.catalog.store_items:
+            item = replaced.get(id(item), item)
+            if item is not None:
+                items.append(item)
+
+        # The mixer memoizes purchases per chain and the best-buy table holds
+        # catalog prices, so overridden views get their own mixer and no table
+        return CatalogView(
+            store_ids, items, self.catalog.coupons,
+            _OverlayMatcher(self.catalog.matcher, replaced), PackageMixer(self.catalog.coupons), None,
+        )
+
+    def for_request(self, request: OptimizeRequest, locality: Optional[LocalityIndex]) -> CatalogView:
+        """The catalog as priced at the nearest location of each chain near the shopper."""
+        if locality is None or not (self.zone_overrides or self.store_overrides):
+            return self.shared
+        nearby = locality.near_zip(request.zip_code, request.radius_miles)
+        if not nearby:
+            return self.shared
+
+        nearest: Dict[str, str] = {}
+        for n in nearby:
+            nearest.setdefault(n.location.chain.lower(), n.location.store_id)
+        return self.view(nearest.values())
+
+    def stats(self) -> Dict[str, int]:
+        """Stored records vs. what a per-store catalog would hold."""
+        items_per_chain = Counter(item.store_name.lower() for item in self.catalog.store_items)
+        return {
+            "zones": len(set(self.store_zones.values())),
+            "stores": len(self.store_zones),
+            "catalog_items": len(self.catalog.store_items),
+            "zone_overrides": sum(len(o) for o in self.zone_overrides.values()),
+            "store_overrides": sum(len(o) for o in self.store_overrides.values()),
+            "views_built": len(self._views),
+            "per_store_items": sum(items_per_chain[zone.split(":")[0]] for zone in self.store_zones.values()),
+        }
+
+
+def zone_of_chain(chain: str) -> str:
+    """Zone id for a chain's stores (one price zone per chain)."""
+    return chain.lower()
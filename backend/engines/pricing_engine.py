@@ -6,15 +6,24 @@ Core optimization logic:
 2. Apply coupon stacking rules
 3. Choose optimal store(s)
 4. Generate shopping plan
+
+Money is added up in integer cents (backend/money.py) and converted to
+dollars only for the response, so totals are exact and identical however
+they were computed.
 """
 
-from typing import List, Dict, Tuple, Optional
-import math
+from typing import AsyncIterable, AsyncIterator, FrozenSet, List, Dict, Tuple, Optional
 from ..models import (
     ShoppingItem, StoreItem, Coupon, OptimizeRequest, OptimizeResponse,
-    OptimizedItem, StorePlan, AppliedCoupon, RebateOpportunity
+    OptimizedItem, StorePlan, RebateOpportunity, ItemAlternative
 )
-from .stacking_logic import calculate_best_coupon_stack, find_rebate_opportunities
+from .matching import ItemMatcher
+from .package_mix import PackageMixer, Purchase
+from .loyalty import LOYALTY_PROGRAMS, member_stores, store_tier
+from .price_prediction import Prediction, prediction_note
+from .locality import LocalityIndex
+from .best_buys import BestBuyTable
+from ..money import to_cents, to_dollars
 
 
 def match_items(
@@ -44,35 +53,107 @@ def match_items(
     return matches
 
 
-def calculate_packages_needed(requested: ShoppingItem, product: StoreItem) -> int:
-    """Calculate how many packages to buy to fulfill request."""
-    if requested.unit == product.package_unit:
-        return math.ceil(requested.quantity / product.package_size)
-    
-    # Simple unit conversions
-    conversion = {
-        ("count", "count"): 1,
-        ("gallon", "gallon"): 1,
-        ("lb", "lb"): 1,
-        ("oz", "oz"): 1,
-        ("oz", "lb"): 16,  # 16 oz = 1 lb
-        ("lb", "oz"): 1/16,
-    }
-    
-    key = (requested.unit, product.package_unit)
-    if key in conversion:
-        needed = requested.quantity * conversion[key]
-        return math.ceil(needed / product.package_size)
-    
-    # Default: assume 1 package
-    return max(1, int(requested.quantity))
+def find_matches(
+    requested: ShoppingItem,
+    items_at_store: List[StoreItem],
+    store_name: str,
+    matcher: Optional[ItemMatcher] = None
+) -> List[StoreItem]:
+    """Match via the prebuilt catalog matcher when available, else by substring."""
+    if matcher is not None:
+        return matcher.match_items(requested, store=store_name)
+    return match_items(requested, items_at_store)
+
+
+def price_item(
+    requested: ShoppingItem,
+    items_at_store: List[StoreItem],
+    store_name: str,
+    tier: int,
+    apps: FrozenSet[str],
+    net_of_rebates: bool,
+    matcher: Optional[ItemMatcher],
+    mixer: PackageMixer,
+    best_buys: Optional[BestBuyTable] = None,
+    alternatives: int = 0
+) -> Optional[Purchase]:
+    """Best purchase of a list entry at a store: a best-buy lookup, else matching and mixing."""
+    if best_buys is not None and not alternatives:
+        found, purchase = best_buys.lookup(requested, store_name, tier, apps, net_of_rebates)
+        if found:
+            return purchase
+    
+    matches = find_matches(requested, items_at_store, store_name, matcher)
+    if not matches:
+        return None
+    return mixer.best_purchase(requested, matches, store_name, tier, apps, net_of_rebates, alternatives)
+
+
+def rebate_apps(request: OptimizeRequest) -> FrozenSet[str]:
+    """The request's rebate apps, lowercased once for the whole request."""
+    return frozenset(app.strip().lower() for app in request.rebate_apps)
+
+
+def plan_rebate_cents(plan: StorePlan) -> int:
+    """Rebates a plan's items qualify for, in cents."""
+    return sum(to_cents(amount) for item in plan.items for _, amount in item._rebates)
+
+
+def purchase_to_items(requested: ShoppingItem, purchase: Purchase) -> List[OptimizedItem]:
+    """One OptimizedItem per package size bought for a requested item."""
+    shared_notes = []
+    if len(purchase.lines) > 1:
+        sizes = " + ".join(
+            f"{line.quantity}x {line.product.package_size} {line.product.package_unit}"
+            for line in purchase.lines
+        )
+        shared_notes.append(f"Mixed pack sizes: {sizes}")
+    
+    items = []
+    for line in purchase.lines:
+        notes = list(shared_notes)
+        product = line.product
+        if line.unit_cents < to_cents(product.price):
+            program = LOYALTY_PROGRAMS.get(product.store_name, "loyalty")
+            notes.append(f"{program} price: ${line.unit_price:.2f} (shelf ${product.price:.2f})")
+        if product.regular_price and product.regular_price > product.price:
+            notes.append(f"On sale: ${product.price:.2f} (reg. ${product.regular_price:.2f})")
+        
+        item = OptimizedItem(
+            requested_item=requested,
+            chosen_product=product,
+            quantity_to_buy=line.quantity,
+            base_cost=to_dollars(line.base_cents),
+            applied_coupons=line.applied_coupons,
+            final_cost=to_dollars(line.final_cents),
+            savings=to_dollars(line.base_cents - line.final_cents),
+            notes=notes
+        )
+        item._rebates = line.rebates
+        items.append(item)
+    
+    if purchase.alternatives:
+        items[0].alternatives = [
+            ItemAlternative(
+                product=alt.lines[0].product,
+                quantity_to_buy=alt.lines[0].quantity,
+                applied_coupons=alt.lines[0].applied_coupons,
+                final_cost=to_dollars(alt.final_cents),
+                savings=to_dollars(alt.base_cents - alt.final_cents)
+            )
+            for alt in purchase.alternatives
+        ]
+    return items
 
 
 def optimize_single_store(
     request: OptimizeRequest,
     store_items: List[StoreItem],
     coupons: List[Coupon],
-    store_name: str
+    store_name: str,
+    matcher: Optional[ItemMatcher] = None,
+    mixer: Optional[PackageMixer] = None,
+    best_buys: Optional[BestBuyTable] = None
 ) -> Optional[StorePlan]:
     """Optimize shopping for a single store."""
     
@@ -81,56 +162,28 @@ def optimize_single_store(
     if not items_at_store:
         return None
     
+    if mixer is None:
+        mixer = PackageMixer(coupons)
+    
+    # Resolve loyalty tier and rebate apps once for the whole store
+    tier = store_tier(store_name, member_stores(request.loyalty_memberships))
+    apps = rebate_apps(request)
+    
     optimized_items: List[OptimizedItem] = []
-    total_base = 0.0
-    total_final = 0.0
-    total_savings = 0.0
+    total_base = 0
+    total_final = 0
     
     for requested in request.shopping_list:
-        # Find matching products at this store
-        matches = match_items(requested, items_at_store)
-        
-        if not matches:
-            continue
-        
-        # Evaluate each match
-        best_choice = None
-        best_final_cost = float('inf')
-        best_coupons = []
-        
-        for product in matches:
-            qty_needed = calculate_packages_needed(requested, product)
-            base_cost = product.price * qty_needed
-            
-            # Calculate coupon savings
-            applied_coupons, discount = calculate_best_coupon_stack(
-                product, qty_needed, coupons
-            )
-            
-            final_cost = base_cost - discount
-            
-            if final_cost < best_final_cost:
-                best_choice = product
-                best_final_cost = final_cost
-                best_coupons = applied_coupons
-                best_qty = qty_needed
-                best_base = base_cost
+        # Cheapest combination of package sizes, with coupons
+        purchase = price_item(
+            requested, items_at_store, store_name, tier, apps,
+            request.rank_by_net_cost, matcher, mixer, best_buys, request.alternatives
+        )
         
-        if best_choice:
-            savings = best_base - best_final_cost
-            optimized_items.append(OptimizedItem(
-                requested_item=requested,
-                chosen_product=best_choice,
-                quantity_to_buy=best_qty,
-                base_cost=round(best_base, 2),
-                applied_coupons=best_coupons,
-                final_cost=round(best_final_cost, 2),
-                savings=round(savings, 2),
-                notes=[]
-            ))
-            total_base += best_base
-            total_final += best_final_cost
-            total_savings += savings
+        if purchase:
+            optimized_items.extend(purchase_to_items(requested, purchase))
+            total_base += purchase.base_cents
+            total_final += purchase.final_cents
     
     if not optimized_items:
         return None
@@ -138,10 +191,10 @@ def optimize_single_store(
     return StorePlan(
         store_name=store_name,
         items=optimized_items,
-        subtotal=round(total_base, 2),
+        subtotal=to_dollars(total_base),
         store_level_discounts=[],
-        final_total=round(total_final, 2),
-        estimated_savings=round(total_savings, 2)
+        final_total=to_dollars(total_final),
+        estimated_savings=to_dollars(total_base - total_final)
     )
 
 
@@ -149,83 +202,87 @@ def optimize_multi_store(
     request: OptimizeRequest,
     store_items: List[StoreItem],
     coupons: List[Coupon],
-    stores: List[str]
+    stores: List[str],
+    matcher: Optional[ItemMatcher] = None,
+    mixer: Optional[PackageMixer] = None,
+    best_buys: Optional[BestBuyTable] = None
 ) -> List[StorePlan]:
     """Optimize by picking the best store for each item."""
     
+    if mixer is None:
+        mixer = PackageMixer(coupons)
+    
+    items_by_store: Dict[str, List[StoreItem]] = {}
+    for item in store_items:
+        items_by_store.setdefault(item.store_name, []).append(item)
+    
+    # Resolve loyalty tiers once per store
+    members_of = member_stores(request.loyalty_memberships)
+    tiers = {store: store_tier(store, members_of) for store in stores}
+    apps = rebate_apps(request)
+    net = request.rank_by_net_cost
+    
     # For each item, find the best store
-    item_assignments: Dict[str, Tuple[StoreItem, int, List[AppliedCoupon], float]] = {}
+    item_assignments: Dict[str, Tuple[str, Purchase]] = {}
     
     for requested in request.shopping_list:
         best_store = None
-        best_product = None
-        best_cost = float('inf')
-        best_coupons = []
-        best_qty = 1
+        best_purchase = None
         
         for store in stores:
-            items_at_store = [i for i in store_items if i.store_name == store]
-            matches = match_items(requested, items_at_store)
+            items_at_store = items_by_store.get(store, [])
+            purchase = price_item(
+                requested, items_at_store, store, tiers[store], apps, net,
+                matcher, mixer, best_buys, request.alternatives
+            )
             
-            for product in matches:
-                qty_needed = calculate_packages_needed(requested, product)
-                base_cost = product.price * qty_needed
-                
-                applied_coupons, discount = calculate_best_coupon_stack(
-                    product, qty_needed, coupons
-                )
-                
-                final_cost = base_cost - discount
-                
-                if final_cost < best_cost:
-                    best_store = store
-                    best_product = product
-                    best_cost = final_cost
-                    best_coupons = applied_coupons
-                    best_qty = qty_needed
+            if purchase and (
+                best_purchase is None
+                or (purchase.net_cents < best_purchase.net_cents if net else purchase.final_cents < best_purchase.final_cents)
+            ):
+                best_store = store
+                best_purchase = purchase
         
-        if best_product:
-            item_assignments[requested.name] = (
-                best_product, best_qty, best_coupons, best_cost
-            )
+        if best_purchase:
+            item_assignments[requested.name] = (best_store, best_purchase)
     
-    # Group by store
+    return assignments_to_plans(request, item_assignments)
+
+
+def assignments_to_plans(
+    request: OptimizeRequest,
+    item_assignments: Dict[str, Tuple[str, Purchase]]
+) -> List[StorePlan]:
+    """Group per-item (store, purchase) choices, keyed by requested name, into store plans."""
+    
+    # Group by store, with (base, final) cents per store
     store_groups: Dict[str, List[OptimizedItem]] = {}
+    store_cents: Dict[str, List[int]] = {}
     
     for requested in request.shopping_list:
         if requested.name in item_assignments:
-            product, qty, coupons_applied, cost = item_assignments[requested.name]
-            store = product.store_name
+            store, purchase = item_assignments[requested.name]
             
             if store not in store_groups:
                 store_groups[store] = []
+                store_cents[store] = [0, 0]
             
-            base_cost = product.price * qty
-            store_groups[store].append(OptimizedItem(
-                requested_item=requested,
-                chosen_product=product,
-                quantity_to_buy=qty,
-                base_cost=round(base_cost, 2),
-                applied_coupons=coupons_applied,
-                final_cost=round(cost, 2),
-                savings=round(base_cost - cost, 2),
-                notes=[]
-            ))
+            store_groups[store].extend(purchase_to_items(requested, purchase))
+            store_cents[store][0] += purchase.base_cents
+            store_cents[store][1] += purchase.final_cents
     
     # Create store plans
     plans = []
     for store, items in store_groups.items():
-        subtotal = sum(i.base_cost for i in items)
-        final = sum(i.final_cost for i in items)
-        savings = sum(i.savings for i in items)
+        subtotal, final = store_cents[store]
         
         plans.append(StorePlan(
             store_name=store,
             items=items,
-            subtotal=round(subtotal, 2),
+            subtotal=to_dollars(subtotal),
             store_level_discounts=[],
-            final_total=round(final, 2),
-            estimated_savings=round(savings, 2)
+            final_total=to_dollars(final),
+            estimated_savings=to_dollars(subtotal - final)
         ))
     
     return plans
@@ -267,47 +324,110 @@ def generate_action_steps(plans: List[StorePlan]) -> List[str]:
     return steps
 
 
+def candidate_stores(
+    request: OptimizeRequest,
+    store_items: List[StoreItem],
+    locality: Optional[LocalityIndex] = None
+) -> List[str]:
+    """The preferred stores (or every store), restricted to those near the shopper."""
+    if request.preferred_stores:
+        stores = request.preferred_stores
+    else:
+        stores = list(set(i.store_name for i in store_items))
+    
+    # Restrict to stores near the shopper
+    if locality is not None:
+        nearby = locality.chains_near_zip(request.zip_code, request.radius_miles)
+        if nearby is not None:
+            stores = [s for s in stores if s.lower() in nearby]
+    
+    return stores
+
+
 def optimize_shopping_list(
     request: OptimizeRequest,
     store_items: List[StoreItem],
-    coupons: List[Coupon]
+    coupons: List[Coupon],
+    matcher: Optional[ItemMatcher] = None,
+    mixer: Optional[PackageMixer] = None,
+    predictions: Optional[Dict[str, Prediction]] = None,
+    locality: Optional[LocalityIndex] = None,
+    best_buys: Optional[BestBuyTable] = None
 ) -> OptimizeResponse:
     """
     Main optimization function.
     
     Takes a shopping list and finds the cheapest way to fulfill it
-    using available store items and coupons.
+    using available store items and coupons. Pass the catalog's prebuilt
+    `matcher` for fuzzy, synonym-aware item matching and its `mixer` to
+    reuse package-combination solutions across requests. `predictions`
+    (item id -> expected sale) adds "likely cheaper in N days" notes.
+    With a `locality` index, only stores with a location within the
+    request's radius of its zip code are considered (unknown zip codes
+    are not restricted). Rebates from the request's apps are found while
+    pricing each line; with `rank_by_net_cost` they also decide which
+    products and stores win. `best_buys` (the catalog's materialized
+    table, built with the same matcher and mixer) answers popular list
+    entries without matching or stacking. With `request.alternatives`,
+    each item also lists the cheapest other products at its store.
     """
     
+    if mixer is None:
+        mixer = PackageMixer(coupons)
+    
     # Determine which stores to consider
-    if request.preferred_stores:
-        stores = request.preferred_stores
-    else:
-        stores = list(set(i.store_name for i in store_items))
+    stores = candidate_stores(request, store_items, locality)
     
     # Filter items to preferred stores
     filtered_items = [i for i in store_items if i.store_name in stores]
     
     if request.allow_multi_store:
         # Optimize across multiple stores
-        plans = optimize_multi_store(request, filtered_items, coupons, stores)
+        plans = optimize_multi_store(
+            request, filtered_items, coupons, stores, matcher, mixer, best_buys
+        )
     else:
         # Find the single best store
         best_plan = None
-        best_total = float('inf')
+        best_total = None
         
         for store in stores:
-            plan = optimize_single_store(request, filtered_items, coupons, store)
-            if plan and plan.final_total < best_total:
+            plan = optimize_single_store(
+                request, filtered_items, coupons, store, matcher, mixer, best_buys
+            )
+            if not plan:
+                continue
+            total = to_cents(plan.final_total)
+            if request.rank_by_net_cost:
+                total -= plan_rebate_cents(plan)
+            if best_total is None or total < best_total:
                 best_plan = plan
-                best_total = plan.final_total
+                best_total = total
         
         plans = [best_plan] if best_plan else []
     
-    # Calculate totals
-    grand_total = sum(p.final_total for p in plans)
-    total_base = sum(p.subtotal for p in plans)
-    total_savings = sum(p.estimated_savings for p in plans)
+    return build_response(request, plans, predictions)
+
+
+def build_response(
+    request: OptimizeRequest,
+    plans: List[StorePlan],
+    predictions: Optional[Dict[str, Prediction]] = None
+) -> OptimizeResponse:
+    """Totals, unfulfilled items, action steps and rebates for a set of store plans."""
+    
+    # Flag items that are likely to go on sale soon
+    if predictions:
+        for plan in plans:
+            for item in plan.items:
+                prediction = predictions.get(item.chosen_product.item_id)
+                if prediction is not None:
+                    item.notes.append(prediction_note(prediction))
+    
+    # Calculate totals, in cents
+    grand_total = sum(to_cents(p.final_total) for p in plans)
+    total_base = sum(to_cents(p.subtotal) for p in plans)
+    total_savings = total_base - grand_total
     savings_pct = (total_savings / total_base * 100) if total_base > 0 else 0
     
     # Find unfulfilled items
@@ -324,14 +444,11 @@ def optimize_shopping_list(
     # Generate action steps
     action_steps = generate_action_steps(plans)
     
-    # Find rebate opportunities
+    # Rebate opportunities were found while pricing each line
     rebates = []
     for plan in plans:
         for item in plan.items:
-            opps = find_rebate_opportunities(
-                item.chosen_product, coupons, request.rebate_apps
-            )
-            for app, amount in opps:
+            for app, amount in item._rebates:
                 rebates.append(RebateOpportunity(
                     app=app,
                     item=item.chosen_product.item_name,
@@ -341,11 +458,41 @@ def optimize_shopping_list(
     
     return OptimizeResponse(
         plans=plans,
-        grand_total=round(grand_total, 2),
-        total_base_cost=round(total_base, 2),
-        total_savings=round(total_savings, 2),
+        grand_total=to_dollars(grand_total),
+        total_base_cost=to_dollars(total_base),
+        total_savings=to_dollars(total_savings),
         savings_percentage=round(savings_pct, 1),
         unfulfilled_items=unfulfilled,
         action_steps=action_steps,
         rebate_opportunities=rebates
     )
+
+
+async def optimize_as_available(
+    request: OptimizeRequest,
+    batches: AsyncIterable[Tuple[List[StoreItem], List[Coupon]]],
+    locality: Optional[LocalityIndex] = None
+) -> AsyncIterator[OptimizeResponse]:
+    """
+    Optimize as store data streams in from providers.
+    
+    Yields an updated response each time another store's (items, coupons)
+    batch arrives, so a first answer is ready before the slowest provider
+    returns. The last response yielded covers every store.
+    """
+    store_items: List[StoreItem] = []
+    coupons: Dict[str, Coupon] = {}
+    
+    async for items, batch_coupons in batches:
+        store_items.extend(items)
+        for coupon in batch_coupons:
+            coupons.setdefault(coupon.id, coupon)
+        if not items:
+            continue
+        
+        coupon_list = list(coupons.values())
+        yield optimize_shopping_list(
+            request, store_items, coupon_list,
+            matcher=ItemMatcher(store_items), mixer=PackageMixer(coupon_list),
+            locality=locality
+        )
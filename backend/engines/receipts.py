@@ -0,0 +1,477 @@
+"""
+Coupon Sentinel - Receipt Ingestion
+
+Turns uploaded receipts into price observations and rebate claims:
+1. Uploads are queued in the receipt store and answered with a job id
+2. A dispatcher thread feeds queued jobs to a process pool, where OCR
+   (a pluggable local engine) and line parsing run off the API workers
+3. Parsed lines are matched to catalog products with the catalog's
+   prebuilt matcher, in the dispatcher, against the live catalog
+4. Matched lines feed the price history and open rebate claims for
+   rebate offers on the purchased products
+
+OCR engines are named in COUPON_SENTINEL_OCR_ENGINE: a built-in name
+("tesseract", which needs the optional pytesseract and Pillow packages)
+or "package.module:ClassName" for a custom OcrEngine subclass.
+"""
+
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Type
+from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+import importlib
+import io
+import logging
+import multiprocessing
+import os
+import re
+import threading
+import time
+from ..models import CouponType, StoreItem
+from ..storage.price_history import PriceHistory, optional_cents
+from ..storage.receipts import ReceiptStore
+from .catalog_index import CatalogIndex
+from .stacking_logic import matches_item
+from ..money import to_cents
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_OCR_ENGINE = os.environ.get("COUPON_SENTINEL_OCR_ENGINE", "tesseract")
+
+# OCR/parse processes; OCR is CPU-bound, so one per core by default
+RECEIPT_WORKERS = int(os.environ.get("COUPON_SENTINEL_RECEIPT_WORKERS", "0")) or (os.cpu_count() or 2)
+
+# How often the dispatcher looks for new jobs while others are running
+POLL_SECONDS = 0.5
+
+# Largest upload accepted
+MAX_RECEIPT_BYTES = 10 * 1024 * 1024
+
+# Below this coverage score a receipt line is left unmatched
+MIN_LINE_SCORE = 0.5
+
+TEXT_TYPES = ("text/plain",)
+IMAGE_TYPES = ("image/png", "image/jpeg", "image/tiff", "image/webp", "image/bmp")
+
+# Receipt shorthand expanded before matching
+ABBREVIATIONS: Dict[str, str] = {
+    "gv": "great value",
+    "gg": "good & gather",
+    "ks": "kirkland signature",
+    "org": "organic",
+    "whl": "whole",
+    "mlk": "milk",
+    "lg": "large",
+    "grd": "ground",
+    "bf": "beef",
+    "chkn": "chicken",
+    "brst": "breast",
+    "brd": "bread",
+    "wht": "white",
+    "ckn": "chicken",
+    "pb": "peanut butter",
+    "tp": "toilet paper",
+    "oj": "orange juice",
+    "yog": "yogurt",
+    "bnls": "boneless",
+}
+
+# Lines that are never purchased items
+_SKIP_WORDS = re.compile(
+    r"\b(sub\s*total|total|tax|change|cash|visa|mastercard|amex|debit|credit|"
+    r"balance|tend(er)?|auth|approval|items sold|card)\b",
+    re.IGNORECASE,
+)
+_DISCOUNT_WORDS = re.compile(r"\b(coupon|savings|disc(ount)?|circle|rollback|instant)\b", re.IGNORECASE)
+_AMOUNT = r"-?\$?\d{1,5}\.\d{2}-?"
+_PRICED_LINE = re.compile(rf"^(?P<desc>.*?\S)\s+(?P<amount>{_AMOUNT})(\s+[A-Z]{{1,2}})?$")
+_QUANTITY = re.compile(r"(?P<qty>\d{1,3})\s*(@|x|at)\s*\$?(?P<each>\d{1,5}\.\d{2})", re.IGNORECASE)
+_WORD = re.compile(r"[A-Za-z]{2,}")
+_LEADING_CODE = re.compile(r"^\d{6,14}\s+")
+_DATE = re.compile(r"\b(?P<m>\d{1,2})/(?P<d>\d{1,2})/(?P<y>\d{2}|\d{4})\b")
+_TOTAL = re.compile(rf"^\s*(?P<label>sub\s*total|total|tax)\b.*?(?P<amount>{_AMOUNT})\s*$", re.IGNORECASE)
+
+
+# ============================================================================
+# OCR engines
+# ============================================================================
+
+class OcrEngine(ABC):
+    """A local OCR engine. Instances are built inside the worker processes."""
+
+    name: str = "ocr"
+
+    @abstractmethod
+    def image_to_text(self, image: bytes) -> str:
+        """Recognized text of a receipt image, one receipt line per line."""
+
+
+class TesseractEngine(OcrEngine):
+    """Tesseract through the optional pytesseract and Pillow packages."""
+
+    name = "tesseract"
+
+    def __init__(self):
+        try:
+            import pytesseract
+            from PIL import Image
+        except ImportError:  # Optional dependency
+            raise RuntimeError("The tesseract OCR engine needs the pytesseract and Pillow packages")
+        self._pytesseract = pytesseract
+        self._image = Image
+
+    def image_to_text(self, image: bytes) -> str:
+        with self._image.open(io.BytesIO(image)) as img:
+            # psm 4: a single column of variable-size text, i.e. a receipt
+            return self._pytesseract.image_to_string(img.convert("L"), config="--psm 4")
+
+
+OCR_ENGINES: Dict[str, Type[OcrEngine]] = {
+    "tesseract": TesseractEngine,
+}
+
+
+def load_ocr_engine(spec: str) -> OcrEngine:
+    """Build an engine from a built-in name or a "module:ClassName" path."""
+    if spec in OCR_ENGINES:
+        return OCR_ENGINES[spec]()
+    module_name, _, class_name = spec.partition(":")
+    if not class_name:
+        raise ValueError(f"Unknown OCR engine: {spec}")
+    engine_cls = getattr(importlib.import_module(module_name), class_name)
+    if not (isinstance(engine_cls, type) and issubclass(engine_cls, OcrEngine)):
+        raise ValueError(f"{spec} is not an OcrEngine")
+    return engine_cls()
+
+
+# ============================================================================
+# Parsing (runs in the worker processes)
+# ============================================================================
+
+class ReceiptLine(NamedTuple):
+    line_no: int
+    description: str
+    quantity: int
+    unit_price: float
+    total: float
+    discount: float
+
+
+class ParsedReceipt(NamedTuple):
+    store: Optional[str]
+    purchased_at: Optional[str]
+    lines: List[ReceiptLine]
+    subtotal: Optional[float]
+    tax: Optional[float]
+    total: Optional[float]
+
+
+def _amount(text: str) -> float:
+    """'3.48', '$3.48', '-1.00' or '1.00-' (a credit) as a float."""
+    negative = text.startswith("-") or text.endswith("-")
+    value = float(text.strip("-").lstrip("$"))
+    return -value if negative else value
+
+
+def _purchase_date(text: str) -> Optional[str]:
+    match = _DATE.search(text)
+    if match is None:
+        return None
+    year = int(match["y"])
+    year += 2000 if year < 100 else 0
+    try:
+        return datetime(year, int(match["m"]), int(match["d"]), tzinfo=timezone.utc).isoformat()
+    except ValueError:
+        return None
+
+
+def parse_receipt_text(text: str, chains: Sequence[str] = (), store_hint: Optional[str] = None) -> ParsedReceipt:
+    """
+    Parse receipt text into purchased lines.
+
+    Recognizes "DESCRIPTION  3.48" item lines (with optional trailing tax
+    flags and leading UPC codes), quantities written inline or on their
+    own line ("2 @ 1.99"), and coupon/discount lines, which are credited
+    to the item above them.
+    """
+    store = store_hint
+    raw_lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if store is None:
+        lowered = [c.lower() for c in chains]
+        for line in raw_lines[:8]:
+            for chain, key in zip(chains, lowered):
+                if key in line.lower():
+                    store = chain
+                    break
+            if store is not None:
+                break
+
+    lines: List[ReceiptLine] = []
+    pending_quantity: Optional[Tuple[int, float]] = None
+    totals: Dict[str, float] = {}
+
+    for raw in raw_lines:
+        total_match = _TOTAL.match(raw)
+        if total_match:
+            label = re.sub(r"\s+", "", total_match["label"].lower())
+            totals.setdefault(label, _amount(total_match["amount"]))
+            continue
+        if _SKIP_WORDS.search(raw):
+            continue
+
+        quantity = _QUANTITY.search(raw)
+        if quantity is not None and not _WORD.search(raw[:quantity.start()] + raw[quantity.end():]):
+            # A quantity line of its own ("2 @ 1.99"), for the item above or below it
+            pending_quantity = (int(quantity["qty"]), float(quantity["each"]))
+            if lines and lines[-1].quantity == 1 and abs(lines[-1].total - pending_quantity[0] * pending_quantity[1]) < 0.01:
+                lines[-1] = lines[-1]._replace(quantity=pending_quantity[0], unit_price=pending_quantity[1])
+                pending_quantity = None
+            continue
+
+        priced = _PRICED_LINE.match(raw)
+        if priced is None:
+            continue
+
+        description = _LEADING_CODE.sub("", priced["desc"]).strip()
+        amount = _amount(priced["amount"])
+
+        if amount < 0 or _DISCOUNT_WORDS.search(description):
+            if lines:
+                last = lines[-1]
+                lines[-1] = last._replace(discount=round(last.discount + abs(amount), 2))
+            continue
+
+        quantity_count, each = 1, amount
+        inline = _QUANTITY.search(description)
+        if inline is not None:
+            quantity_count, each = int(inline["qty"]), float(inline["each"])
+            description = (description[:inline.start()] + description[inline.end():]).strip()
+        elif pending_quantity is not None and abs(pending_quantity[0] * pending_quantity[1] - amount) < 0.01:
+            quantity_count, each = pending_quantity
+        pending_quantity = None
+
+        if description:
+            lines.append(ReceiptLine(len(lines), description, quantity_count, each, amount, 0.0))
+
+    return ParsedReceipt(
+        store,
+        _purchase_date(text),
+        lines,
+        totals.get("subtotal"),
+        totals.get("tax"),
+        totals.get("total"),
+    )
+
+
+def extract_receipt(
+    content_type: str,
+    payload: bytes,
+    engine_spec: str,
+    chains: Sequence[str],
+    store_hint: Optional[str]
+) -> ParsedReceipt:
+    """OCR (for images) and parse one upload. Runs in a worker process."""
+    if content_type in TEXT_TYPES:
+        text = payload.decode("utf-8", errors="replace")
+    else:
+        text = load_ocr_engine(engine_spec).image_to_text(payload)
+    return parse_receipt_text(text, chains, store_hint)
+
+
+# ============================================================================
+# Matching and recording (runs in the dispatcher, against the live catalog)
+# ============================================================================
+
+def expand_abbreviations(description: str) -> str:
+    words = re.findall(r"[\w%&']+", description.lower())
+    return " ".join(ABBREVIATIONS.get(w, w) for w in words)
+
+
+def match_line(line: ReceiptLine, store: Optional[str], catalog: CatalogIndex) -> Optional[Tuple[StoreItem, float]]:
+    """Best catalog product for a receipt line, with its coverage score."""
+    ranked = catalog.matcher.rank(expand_abbreviations(line.description), store=store)
+    if not ranked or ranked[0][1] < MIN_LINE_SCORE:
+        return None
+    # Among equally good matches, prefer the one priced like the receipt
+    top_score = ranked[0][1]
+    tied = [item for item, score in ranked if score >= top_score - 1e-9]
+    best = min(tied, key=lambda item: abs(item.price - line.unit_price))
+    return best, round(top_score, 3)
+
+
+def observed_price_key(product: StoreItem, paid_cents: int) -> Tuple[int, Optional[int], Optional[int]]:
+    """
+    Price history key for a receipt observation.
+
+    A receipt paying the catalog's shelf or loyalty price confirms the
+    current run; any other price is recorded as a new shelf price.
+    """
+    catalog_key = (to_cents(product.price), optional_cents(product.loyalty_price), optional_cents(product.regular_price))
+    if paid_cents in (catalog_key[0], catalog_key[1]):
+        return catalog_key
+    return (paid_cents, None, None)
+
+
+def ingest_receipt(
+    parsed: ParsedReceipt,
+    catalog: CatalogIndex,
+    history: PriceHistory
+) -> Tuple[Dict[str, object], List[Tuple[int, str, str, str, int]]]:
+    """
+    Match a parsed receipt and record its prices.
+
+    Returns the receipt as stored on the job and the rebate claims
+    (line_no, app, coupon_id, item_id, amount_cents) it qualifies for.
+    """
+    rebates = [c for c in catalog.coupons if c.coupon_type == CouponType.REBATE]
+    observed_at = datetime.now(timezone.utc)
+    # Prices are recorded when they were paid, between the runs seen since
+    if parsed.purchased_at:
+        observed_at = min(observed_at, datetime.fromisoformat(parsed.purchased_at))
+
+    lines = []
+    observations = []
+    claims = []
+    for line in parsed.lines:
+        matched = match_line(line, parsed.store, catalog)
+        row: Dict[str, object] = {**line._asdict(), "item_id": None, "item_name": None, "match_score": None}
+        if matched is not None:
+            product, score = matched
+            row.update(item_id=product.item_id, item_name=product.item_name, match_score=score)
+            observations.append((product.item_id, observed_price_key(product, to_cents(line.unit_price))))
+            for rebate in rebates:
+                if matches_item(rebate, product):
+                    claims.append((line.line_no, rebate.source, rebate.id, product.item_id, to_cents(rebate.value)))
+        lines.append(row)
+
+    recorded, new_runs = history.record_at(observations, observed_at) if observations else (0, 0)
+    receipt = {
+        "store": parsed.store,
+        "purchased_at": parsed.purchased_at,
+        "subtotal": parsed.subtotal,
+        "tax": parsed.tax,
+        "total": parsed.total,
+        "lines": lines,
+        "recorded_lines": recorded,
+        "price_changes": new_runs,
+        "rebate_claims": len(claims),
+    }
+    return receipt, claims
+
+
+# ============================================================================
+# Worker
+# ============================================================================
+
+class ReceiptWorker:
+    """Dispatcher thread that runs queued receipt jobs through a process pool."""
+
+    def __init__(
+        self,
+        store: ReceiptStore,
+        catalog_source: Callable[[], CatalogIndex],
+        history: PriceHistory,
+        engine_spec: str = DEFAULT_OCR_ENGINE,
+        max_workers: int = RECEIPT_WORKERS
+    ):
+        self.store = store
+        self._catalog_source = catalog_source
+        self.history = history
+        self.engine_spec = engine_spec
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[Future, Tuple[str, Optional[str]]] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def start(self) -> None:
+        if self._thread is None:
+            requeued = self.store.requeue_processing()
+            if requeued:
+                logger.info("Re-queued %d unfinished receipt jobs", requeued)
+            self._stopping = False
+            # spawn: forking a process that runs threads is unsafe
+            self._pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+            self._thread = threading.Thread(target=self._run, name="receipt-dispatcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._pool is not None:
+            # Jobs still processing are re-queued on the next start
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def notify(self) -> None:
+        """Wake the dispatcher after a job is queued."""
+        with self._cond:
+            self._cond.notify()
+
+    def submit(
+        self,
+        content_type: str,
+        payload: bytes,
+        owner: Optional[str] = None,
+        store_hint: Optional[str] = None
+    ) -> str:
+        """Validate and queue an upload. Returns its job id."""
+        if content_type not in TEXT_TYPES + IMAGE_TYPES:
+            raise ValueError(f"Unsupported receipt type: {content_type}")
+        if not payload:
+            raise ValueError("Receipt is empty")
+        if len(payload) > MAX_RECEIPT_BYTES:
+            raise ValueError(f"Receipt is larger than {MAX_RECEIPT_BYTES} bytes")
+        job_id = self.store.enqueue(content_type, payload, owner, store_hint)
+        self.notify()
+        return job_id
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return
+                if not self._inflight and not self.store.queued_count():
+                    self._cond.wait(POLL_SECONDS)
+                    continue
+
+            try:
+                self._dispatch()
+            except Exception:
+                logger.exception("Dispatching receipt jobs failed")
+                time.sleep(POLL_SECONDS)
+            if self._inflight:
+                done, _ = wait(list(self._inflight), timeout=POLL_SECONDS, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._finish(future)
+
+    def _dispatch(self) -> None:
+        room = self.max_workers * 2 - len(self._inflight)
+        if room <= 0:
+            return
+        chains = self._catalog_source().stores
+        for job_id, content_type, payload, hint, owner in self.store.claim(room):
+            try:
+                future = self._pool.submit(extract_receipt, content_type, payload, self.engine_spec, chains, hint)
+            except Exception as e:
+                logger.warning("Could not start receipt job %s: %s", job_id, e)
+                self.store.fail(job_id, str(e) or type(e).__name__)
+                continue
+            self._inflight[future] = (job_id, owner)
+
+    def _finish(self, future: Future) -> None:
+        job_id, owner = self._inflight.pop(future)
+        try:
+            receipt, claims = ingest_receipt(future.result(), self._catalog_source(), self.history)
+            self.store.add_claims(job_id, owner, claims)
+            self.store.complete(job_id, receipt)
+        except Exception as e:
+            logger.warning("Receipt job %s failed: %s", job_id, e)
+            self.store.fail(job_id, str(e) or type(e).__name__)
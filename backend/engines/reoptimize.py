@@ -0,0 +1,236 @@
+"""
+Coupon Sentinel - Saved List Re-optimization
+
+Keeps saved lists' results current as the catalog changes:
+1. Each list's result records its dependency keys: every candidate
+   product at every store it considers ("item:<id>") and its search
+   terms with their fuzzy expansions ("term:<token>")
+2. A catalog delta maps to keys (touched item ids, tokens of newly added
+   products) and the store's reverse index returns only affected lists
+3. A background worker re-optimizes queued lists in batches and stores
+   a diff whenever a list's result actually changes
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from datetime import datetime, timezone
+import logging
+import threading
+from ..models import OptimizeRequest, OptimizeResponse
+from ..storage.saved_lists import SavedListStore
+from .catalog_delta import CatalogDelta
+from .catalog_index import CatalogIndex
+from .locality import LocalityIndex
+from .matching import normalize, query_tokens
+from .price_prediction import get_prediction_table
+from .pricing_engine import optimize_shopping_list
+
+
+logger = logging.getLogger(__name__)
+
+
+ITEM_KEY = "item:"
+TERM_KEY = "term:"
+
+# How long the worker waits for more deltas before running a batch
+BATCH_DELAY_SECONDS = 1.0
+
+
+# ============================================================================
+# Dependencies
+# ============================================================================
+
+def list_dependencies(request: OptimizeRequest, catalog: CatalogIndex) -> Set[str]:
+    """Reverse index keys whose change could alter a list's result."""
+    stores = request.preferred_stores or catalog.stores
+    keys: Set[str] = set()
+
+    for requested in request.shopping_list:
+        for token in query_tokens(requested.name):
+            keys.add(TERM_KEY + token)
+            for variant, _ in catalog.matcher.expand(token):
+                keys.add(TERM_KEY + variant)
+        for store in stores:
+            for product in catalog.matcher.match_items(requested, store=store):
+                keys.add(ITEM_KEY + product.item_id)
+
+    return keys
+
+
+def delta_keys(delta: CatalogDelta, catalog: CatalogIndex) -> Set[str]:
+    """Reverse index keys a catalog delta touches."""
+    keys = {ITEM_KEY + item_id for item_id in delta.touched_items}
+
+    # New products can match lists that never saw them as candidates
+    for item_id in delta.added_items:
+        item = catalog.items_by_id[item_id]
+        for text in (item.item_name, item.brand or "", item.category):
+            keys.update(TERM_KEY + token for token in normalize(text))
+
+    return keys
+
+
+# ============================================================================
+# Result diffs
+# ============================================================================
+
+def _summarize(result: Optional[OptimizeResponse]) -> Dict[str, Dict[str, object]]:
+    """Requested item name -> where and what is bought for it."""
+    summary: Dict[str, Dict[str, object]] = {}
+    if result is None:
+        return summary
+
+    for plan in result.plans:
+        for item in plan.items:
+            entry = summary.setdefault(item.requested_item.name.lower(), {
+                "store": plan.store_name,
+                "products": [],
+                "final_cost": 0.0,
+            })
+            entry["products"].append({
+                "id": item.chosen_product.item_id,
+                "name": item.chosen_product.item_name,
+                "quantity": item.quantity_to_buy,
+            })
+            entry["final_cost"] = round(entry["final_cost"] + item.final_cost, 2)
+    return summary
+
+
+def diff_results(
+    old: Optional[OptimizeResponse],
+    new: OptimizeResponse
+) -> Optional[Dict[str, object]]:
+    """What changed between two results of one list, or None if nothing did."""
+    before = _summarize(old)
+    after = _summarize(new)
+
+    items = [
+        {"item": name, "before": before.get(name), "after": after.get(name)}
+        for name in sorted(before.keys() | after.keys())
+        if before.get(name) != after.get(name)
+    ]
+    old_total = old.grand_total if old else None
+    if not items and old_total == new.grand_total:
+        return None
+
+    return {
+        "grand_total": {"before": old_total, "after": new.grand_total},
+        "total_savings": {"before": old.total_savings if old else None, "after": new.total_savings},
+        "items": items,
+    }
+
+
+# ============================================================================
+# Scheduler
+# ============================================================================
+
+class ReoptimizeScheduler:
+    """Background worker that re-optimizes saved lists affected by catalog deltas."""
+
+    def __init__(
+        self,
+        store: SavedListStore,
+        catalog_source: Callable[[], CatalogIndex],
+        locality: Optional[LocalityIndex] = None
+    ):
+        self.store = store
+        self._catalog_source = catalog_source
+        self.locality = locality
+        self._pending: Set[str] = set()
+        self._cond = threading.Condition()
+        self._run_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="list-reoptimizer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    # ------------------------------------------------------------------------
+    # Queueing
+    # ------------------------------------------------------------------------
+
+    def on_catalog_delta(self, delta: CatalogDelta, catalog: CatalogIndex) -> None:
+        """Catalog subscriber: queue only the lists the delta affects."""
+        affected = self.store.lists_depending_on(delta_keys(delta, catalog))
+        if affected:
+            logger.info("Catalog %s affects %d saved lists", delta.new_version, len(affected))
+            self.enqueue(affected)
+
+    def enqueue(self, list_ids: Iterable[str]) -> None:
+        with self._cond:
+            self._pending.update(list_ids)
+            self._cond.notify()
+
+    def _take_pending(self) -> List[str]:
+        with self._cond:
+            batch = list(self._pending)
+            self._pending.clear()
+        return batch
+
+    def run_pending(self) -> int:
+        """Re-optimize every queued list now. Returns lists whose result changed."""
+        changed = 0
+        catalog = self._catalog_source()
+        for list_id in self._take_pending():
+            try:
+                before = self.store.version(list_id)
+                after = self.reoptimize(list_id, reason="catalog", catalog=catalog)
+                if after is not None and after != before:
+                    changed += 1
+            except Exception:
+                logger.exception("Re-optimizing saved list %s failed", list_id)
+        return changed
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                # Let a burst of deltas collapse into one batch
+                self._cond.wait(BATCH_DELAY_SECONDS)
+            self.run_pending()
+
+    # ------------------------------------------------------------------------
+    # Re-optimization
+    # ------------------------------------------------------------------------
+
+    def reoptimize(
+        self,
+        list_id: str,
+        reason: str,
+        catalog: Optional[CatalogIndex] = None
+    ) -> Optional[int]:
+        """Re-run one saved list and store its result. Returns its version, or None if unknown."""
+        with self._run_lock:
+            request = self.store.get_request(list_id)
+            if request is None:
+                return None
+            catalog = catalog or self._catalog_source()
+            view = catalog.zones.for_request(request, self.locality)
+
+            result = optimize_shopping_list(
+                request, view.store_items, view.coupons,
+                matcher=view.matcher, mixer=view.mixer,
+                predictions=get_prediction_table(), locality=self.locality,
+                best_buys=view.best_buys
+            )
+            diff = diff_results(self.store.get_result(list_id), result)
+            if diff is not None:
+                diff = {"reason": reason, **diff}
+
+            return self.store.save_result(
+                list_id, result, list_dependencies(request, catalog),
+                catalog.version, diff, datetime.now(timezone.utc),
+            )
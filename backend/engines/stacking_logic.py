@@ -6,10 +6,13 @@ Implements US grocery coupon stacking rules:
 - Store coupons can stack with manufacturer coupons
 - Rebates stack with everything (applied post-purchase)
 - BOGO and threshold coupons have special rules
+
+Discounts are computed in integer cents (backend/money.py).
 """
 
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from ..models import Coupon, CouponType, DiscountType, StoreItem, AppliedCoupon
+from ..money import percent_of, to_cents, to_dollars
 
 
 def matches_item(coupon: Coupon, item: StoreItem) -> bool:
@@ -36,36 +39,64 @@ def matches_item(coupon: Coupon, item: StoreItem) -> bool:
     return False
 
 
-def calculate_discount(coupon: Coupon, item: StoreItem, quantity: int) -> float:
-    """Calculate the discount amount for a coupon on an item."""
+def discount_cents(coupon: Coupon, quantity: int, unit_cents: int) -> int:
+    """
+    Discount a coupon gives on `quantity` units at `unit_cents` each, in cents.
+    
+    Rounding rules per discount type:
+    - AMOUNT_OFF: the coupon value, capped at the line total (exact)
+    - PERCENT_OFF: the percentage of the line total, half up to the cent
+    - BOGO_FREE: one unit's price (exact)
+    - BOGO_HALF: half of one unit's price, half up to the cent
+    """
+    if quantity < coupon.min_quantity:
+        return 0
+    
     if coupon.discount_type == DiscountType.AMOUNT_OFF:
         # Fixed amount off
-        return min(coupon.value, item.price * quantity)
+        return min(to_cents(coupon.value), unit_cents * quantity)
     
     elif coupon.discount_type == DiscountType.PERCENT_OFF:
         # Percentage off
-        return item.price * quantity * coupon.value
+        return percent_of(unit_cents * quantity, coupon.value)
     
     elif coupon.discount_type == DiscountType.BOGO_FREE:
         # Buy one get one free
         if quantity >= 2:
-            return item.price  # One item free
-        return 0.0
+            return unit_cents  # One item free
+        return 0
     
     elif coupon.discount_type == DiscountType.BOGO_HALF:
         # Buy one get one 50% off
         if quantity >= 2:
-            return item.price * 0.5
-        return 0.0
+            return percent_of(unit_cents, 0.5)
+        return 0
     
-    return 0.0
+    return 0
 
 
-def calculate_best_coupon_stack(
+def calculate_discount(
+    coupon: Coupon,
     item: StoreItem,
     quantity: int,
-    available_coupons: List[Coupon]
-) -> Tuple[List[AppliedCoupon], float]:
+    unit_price: Optional[float] = None
+) -> float:
+    """
+    Calculate the discount amount for a coupon on an item, in dollars.
+    
+    `unit_price` is the shelf price actually paid (e.g. a loyalty price);
+    defaults to the item's listed price.
+    """
+    price = item.price if unit_price is None else unit_price
+    return to_dollars(discount_cents(coupon, quantity, to_cents(price)))
+
+
+def best_coupon_stack_cents(
+    item: StoreItem,
+    quantity: int,
+    available_coupons: List[Coupon],
+    unit_cents: int
+) -> Tuple[List[AppliedCoupon], int]:
     """
     Find the best valid coupon combination for an item.
     
@@ -74,10 +105,12 @@ def calculate_best_coupon_stack(
     - Multiple store coupons allowed (unless store restricts)
     - Rebates tracked separately (post-purchase)
     
-    Returns: (applied_coupons, total_discount)
+    `unit_cents` is the shelf price actually paid, in cents.
+    
+    Returns: (applied_coupons, total_discount_cents)
     """
     applied: List[AppliedCoupon] = []
-    total_discount = 0.0
+    total_discount = 0
     
     # Filter to applicable coupons
     applicable = [c for c in available_coupons if matches_item(c, item)]
@@ -85,71 +118,55 @@ def calculate_best_coupon_stack(
     # Separate by type
     manufacturer_coupons = [c for c in applicable if c.coupon_type == CouponType.MANUFACTURER]
     store_coupons = [c for c in applicable if c.coupon_type == CouponType.STORE]
-    rebates = [c for c in applicable if c.coupon_type == CouponType.REBATE]
     bogo_coupons = [c for c in applicable if c.coupon_type == CouponType.BOGO]
     
-    # Apply best manufacturer coupon (max 1)
+    def apply(coupon: Coupon, discount: int) -> None:
+        nonlocal total_discount
+        applied.append(AppliedCoupon(
+            coupon_id=coupon.id,
+            description=coupon.description,
+            coupon_type=coupon.coupon_type,
+            discount_amount=to_dollars(discount)
+        ))
+        total_discount += discount
+    
+    # Apply best manufacturer coupon (max 1); the first listed wins ties
     if manufacturer_coupons:
-        best_mfr = max(manufacturer_coupons, key=lambda c: calculate_discount(c, item, quantity))
-        discount = calculate_discount(best_mfr, item, quantity)
-        if discount > 0:
-            applied.append(AppliedCoupon(
-                coupon_id=best_mfr.id,
-                description=best_mfr.description,
-                coupon_type=best_mfr.coupon_type,
-                discount_amount=discount
-            ))
-            total_discount += discount
-    
-    # Apply store coupons (can stack multiple, usually)
-    for coupon in store_coupons:
-        discount = calculate_discount(coupon, item, quantity)
+        best_mfr = max(manufacturer_coupons, key=lambda c: discount_cents(c, quantity, unit_cents))
+        discount = discount_cents(best_mfr, quantity, unit_cents)
         if discount > 0:
-            applied.append(AppliedCoupon(
-                coupon_id=coupon.id,
-                description=coupon.description,
-                coupon_type=coupon.coupon_type,
-                discount_amount=discount
-            ))
-            total_discount += discount
-    
-    # Apply BOGO if beneficial
-    for coupon in bogo_coupons:
-        discount = calculate_discount(coupon, item, quantity)
+            apply(best_mfr, discount)
+    
+    # Apply store coupons (can stack multiple, usually), then BOGO if beneficial
+    for coupon in store_coupons + bogo_coupons:
+        discount = discount_cents(coupon, quantity, unit_cents)
         if discount > 0:
-            applied.append(AppliedCoupon(
-                coupon_id=coupon.id,
-                description=coupon.description,
-                coupon_type=coupon.coupon_type,
-                discount_amount=discount
-            ))
-            total_discount += discount
+            apply(coupon, discount)
     
     # Note: Rebates are tracked but not applied to in-store total
     # They're returned separately in the optimization result
     
     # Ensure we don't discount below $0
-    base_price = item.price * quantity
-    total_discount = min(total_discount, base_price)
+    total_discount = min(total_discount, unit_cents * quantity)
     
     return applied, total_discount
 
 
-def find_rebate_opportunities(
+def calculate_best_coupon_stack(
     item: StoreItem,
+    quantity: int,
     available_coupons: List[Coupon],
-    rebate_apps: List[str]
-) -> List[Tuple[str, float]]:
-    """Find rebate opportunities for an item after purchase."""
-    opportunities = []
-    
-    rebates = [c for c in available_coupons if c.coupon_type == CouponType.REBATE]
+    unit_price: Optional[float] = None
+) -> Tuple[List[AppliedCoupon], float]:
+    """
+    Find the best valid coupon combination for an item, in dollars.
     
-    for rebate in rebates:
-        if matches_item(rebate, item):
-            # Check if user has this rebate app
-            app_name = rebate.source
-            if app_name.lower() in [a.lower() for a in rebate_apps]:
-                opportunities.append((app_name, rebate.value))
+    `unit_price` is the shelf price actually paid; defaults to item.price.
+    See best_coupon_stack_cents for the rules.
     
-    return opportunities
+    Returns: (applied_coupons, total_discount)
+    """
+    price = item.price if unit_price is None else unit_price
+    applied, discount = best_coupon_stack_cents(item, quantity, available_coupons, to_cents(price))
+    return applied, to_dollars(discount)
+
@@ -0,0 +1,109 @@
+"""
+Coupon Sentinel - Search Suggestions
+
+Autocomplete over product names, categories and brands:
+- A prefix trie keyed on every word start of each suggestion
+- Each node keeps its top-k suggestions by popularity, computed at build
+- A lookup walks len(prefix) nodes and returns a precomputed list
+
+Built once per catalog version so it can be queried on every keystroke.
+"""
+
+from typing import Dict, List, Tuple
+import re
+from ..models import StoreItem, Coupon
+
+
+# Most suggestions any node keeps (and any request may ask for)
+MAX_SUGGESTIONS = 10
+
+# Popularity boost per coupon referencing a suggestion's text
+COUPON_BOOST = 2
+
+_WORD_START_RE = re.compile(r"(?:^|(?<=\s))\S")
+
+
+class Suggestion:
+    """One autocomplete entry."""
+
+    __slots__ = ("text", "kind", "weight")
+
+    def __init__(self, text: str, kind: str, weight: int):
+        self.text = text
+        self.kind = kind
+        self.weight = weight
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"text": self.text, "kind": self.kind, "weight": self.weight}
+
+
+class _TrieNode:
+    __slots__ = ("children", "top")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.top: List[Suggestion] = []
+
+
+class SuggestionIndex:
+    """Prefix trie with per-node precomputed top-k suggestions."""
+
+    def __init__(self, suggestions: List[Suggestion], k: int = MAX_SUGGESTIONS):
+        self.k = k
+        self._root = _TrieNode()
+
+        # Insert heaviest first so each node's list is already ranked
+        ordered = sorted(suggestions, key=lambda s: (-s.weight, s.text.lower()))
+        for suggestion in ordered:
+            text = suggestion.text.lower()
+            # Index every word start so 'egg' finds 'Large Grade A Eggs'
+            starts = [m.start() for m in _WORD_START_RE.finditer(text)]
+            visited = set()
+            for start in starts:
+                node = self._root
+                for ch in text[start:]:
+                    node = node.children.setdefault(ch, _TrieNode())
+                    if id(node) in visited:
+                        continue
+                    visited.add(id(node))
+                    if len(node.top) < k:
+                        node.top.append(suggestion)
+
+    @classmethod
+    def from_catalog(cls, store_items: List[StoreItem], coupons: List[Coupon]) -> "SuggestionIndex":
+        """Build suggestions weighted by how many listings and coupons mention them."""
+        weights: Dict[Tuple[str, str], int] = {}
+        display: Dict[Tuple[str, str], str] = {}
+
+        def add(text: str, kind: str, weight: int) -> None:
+            key = (text.lower(), kind)
+            weights[key] = weights.get(key, 0) + weight
+            display.setdefault(key, text)
+
+        for item in store_items:
+            add(item.item_name, "product", 1)
+            add(item.category, "category", 1)
+            if item.brand:
+                add(item.brand, "brand", 1)
+
+        coupon_counts: Dict[str, int] = {}
+        for coupon in coupons:
+            item_filter = coupon.item_filter.lower()
+            coupon_counts[item_filter] = coupon_counts.get(item_filter, 0) + 1
+
+        for key in weights:
+            terms = set(key[0].split()) | {key[0]}
+            weights[key] += COUPON_BOOST * sum(coupon_counts.get(t, 0) for t in terms)
+
+        return cls([Suggestion(display[key], key[1], w) for key, w in weights.items()])
+
+    def suggest(self, prefix: str, limit: int = MAX_SUGGESTIONS) -> List[Suggestion]:
+        """Top suggestions whose text has a word starting with `prefix`."""
+        node = self._root
+        for ch in prefix.lower().lstrip():
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        if node is self._root:
+            return []
+        return node.top[:min(limit, self.k)]
@@ -0,0 +1,143 @@
+"""
+Coupon Sentinel - Unit Normalization
+
+Converts quantities to canonical base units per dimension:
+- mass:   ounces (oz, lb, g, kg)
+- volume: fluid ounces (fl oz, cup, pint, quart, gallon, ml, l)
+- count:  items (count, each, dozen, pair)
+
+A bare "oz" is ambiguous between mass and fluid ounces; both base units
+are 1 oz, so an "oz" quantity is allowed to bridge mass and volume.
+
+Each StoreItem's canonical size is computed once at catalog load, so the
+engine gets packages needed and comparable unit prices with one multiply.
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from functools import lru_cache
+import math
+from ..models import ShoppingItem, StoreItem
+
+
+MASS = "mass"
+VOLUME = "volume"
+COUNT = "count"
+
+BASE_UNITS: Dict[str, str] = {MASS: "oz", VOLUME: "fl oz", COUNT: "count"}
+
+# unit -> (dimension, factor to base unit)
+UNITS: Dict[str, Tuple[str, float]] = {
+    # Mass
+    "oz": (MASS, 1.0),
+    "ounce": (MASS, 1.0),
+    "lb": (MASS, 16.0),
+    "pound": (MASS, 16.0),
+    "g": (MASS, 0.035274),
+    "gram": (MASS, 0.035274),
+    "kg": (MASS, 35.274),
+    # Volume
+    "fl oz": (VOLUME, 1.0),
+    "fl_oz": (VOLUME, 1.0),
+    "cup": (VOLUME, 8.0),
+    "pint": (VOLUME, 16.0),
+    "quart": (VOLUME, 32.0),
+    "gallon": (VOLUME, 128.0),
+    "half gallon": (VOLUME, 64.0),
+    "ml": (VOLUME, 0.033814),
+    "l": (VOLUME, 33.814),
+    "liter": (VOLUME, 33.814),
+    # Count
+    "count": (COUNT, 1.0),
+    "ct": (COUNT, 1.0),
+    "each": (COUNT, 1.0),
+    "pair": (COUNT, 2.0),
+    "dozen": (COUNT, 12.0),
+}
+
+# Units whose quantity may be read as either mass or volume
+AMBIGUOUS_UNITS = frozenset({"oz", "ounce"})
+
+# Absorbs float noise so 12 eggs from a 12-count is one package, not two
+_EPSILON = 1e-9
+
+
+class CanonicalQuantity(NamedTuple):
+    """A quantity expressed in its dimension's base unit."""
+    dimension: str
+    amount: float
+    ambiguous: bool
+
+
+def _normalize_unit(unit: str) -> str:
+    unit = unit.strip().lower()
+    if unit.endswith("s") and unit[:-1] in UNITS:
+        return unit[:-1]
+    return unit
+
+
+@lru_cache(maxsize=4096)
+def to_base(quantity: float, unit: str) -> Optional[CanonicalQuantity]:
+    """Express a quantity in base units, or None for unknown units."""
+    key = _normalize_unit(unit)
+    entry = UNITS.get(key)
+    if entry is None:
+        return None
+    dimension, factor = entry
+    return CanonicalQuantity(dimension, quantity * factor, key in AMBIGUOUS_UNITS)
+
+
+def compatible(a: CanonicalQuantity, b: CanonicalQuantity) -> bool:
+    """Whether two quantities can be compared in base units."""
+    if a.dimension == b.dimension:
+        return True
+    return (a.ambiguous or b.ambiguous) and {a.dimension, b.dimension} == {MASS, VOLUME}
+
+
+def annotate_canonical_size(item: StoreItem) -> Optional[CanonicalQuantity]:
+    """Compute and cache an item's canonical package size."""
+    size = to_base(item.package_size, item.package_unit)
+    item._canonical_size = size
+    item._inverse_size = 1.0 / size.amount if size and size.amount > 0 else None
+    item._units_annotated = True
+    return size
+
+
+def annotate_catalog(store_items: List[StoreItem]) -> None:
+    """Precompute canonical sizes for every item at catalog load."""
+    for item in store_items:
+        annotate_canonical_size(item)
+
+
+def canonical_size(item: StoreItem) -> Optional[CanonicalQuantity]:
+    """An item's canonical package size, computed on first use if needed."""
+    if not item._units_annotated:
+        return annotate_canonical_size(item)
+    return item._canonical_size
+
+
+def packages_needed(requested: ShoppingItem, product: StoreItem) -> int:
+    """
+    How many packages of `product` cover the requested quantity.
+
+    Falls back to one package per requested unit when the units cannot be
+    compared (e.g. a count of chicken breasts vs. a package sold by lb).
+    """
+    wanted = to_base(requested.quantity, requested.unit)
+    size = canonical_size(product)
+    if wanted is None or size is None or product._inverse_size is None or not compatible(wanted, size):
+        return max(1, int(requested.quantity))
+    return max(1, math.ceil(wanted.amount * product._inverse_size - _EPSILON))
+
+
+def comparable_unit_price(item: StoreItem) -> float:
+    """Price per base unit (per oz, fl oz or count), comparable across pack sizes."""
+    canonical_size(item)
+    if item._inverse_size is None:
+        return item.unit_price
+    return item.price * item._inverse_size
+
+
+def base_unit(item: StoreItem) -> str:
+    """Name of the base unit an item's comparable unit price is quoted in."""
+    size = canonical_size(item)
+    return BASE_UNITS[size.dimension] if size else item.package_unit
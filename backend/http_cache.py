@@ -0,0 +1,153 @@
+"""
+Coupon Sentinel - HTTP Caching
+
+Conditional-request support for catalog listing endpoints:
+- Strong ETags derived from the catalog version, the request query and
+  the negotiated content-encoding, so every variant has its own ETag
+- If-None-Match / If-Modified-Since answered with 304 before any work,
+  with the same ETag and Vary headers the full response would carry
+- Serialized (and precompressed) bodies for unfiltered queries kept per
+  catalog version; filtered bodies are compressed here as well, so these
+  routes are excluded from the compression middleware
+"""
+
+from typing import Any, Callable, Dict, Optional, Tuple
+from email.utils import format_datetime, parsedate_to_datetime
+import hashlib
+import json
+import threading
+from fastapi import Request
+from fastapi.responses import Response
+
+from .engines.catalog_index import CatalogIndex
+from .compression import COMPRESS_MIN_SIZE, DYNAMIC_LEVELS, choose_encoding, compress
+
+
+CATALOG_CACHE_CONTROL = "public, max-age=60, must-revalidate"
+
+# (catalog version, path, content-encoding) -> body for the unfiltered query
+_body_cache: Dict[Tuple[str, str, Optional[str]], bytes] = {}
+_body_cache_lock = threading.Lock()
+
+
+def serialize_body(body: Any) -> bytes:
+    """Compact JSON encoding, matching FastAPI's default JSONResponse."""
+    return json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def make_etag(version: str, request: Request) -> str:
+    """Strong ETag for a request against one catalog version."""
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    digest = hashlib.sha1(f"{version}|{request.url.path}?{query}".encode()).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    """
+    ETag for the variant served to a client that negotiated `encoding`.
+
+    The suffix depends on the negotiation only, not on whether the body
+    turned out large enough to compress, so a 304 can be answered without
+    building the body.
+    """
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against one variant's ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def not_modified_since(if_modified_since: Optional[str], catalog: CatalogIndex) -> bool:
+    """Check an If-Modified-Since header against the catalog load time."""
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    # HTTP dates have one-second resolution
+    return catalog.loaded_at.replace(microsecond=0) <= since
+
+
+def _store_body(key: Tuple[str, str, Optional[str]], body: bytes) -> None:
+    with _body_cache_lock:
+        # Drop bodies from older catalog versions
+        for stale in [k for k in _body_cache if k[0] != key[0]]:
+            del _body_cache[stale]
+        _body_cache[key] = body
+
+
+def _cached_body(
+    catalog: CatalogIndex,
+    path: str,
+    build_body: Callable[[], Any],
+    encoding: Optional[str]
+) -> Tuple[bytes, Optional[str]]:
+    """Identity or precompressed body, built at most once per catalog version."""
+    identity_key = (catalog.version, path, None)
+    body = _body_cache.get(identity_key)
+    if body is None:
+        body = serialize_body(build_body())
+        _store_body(identity_key, body)
+
+    if encoding is None or len(body) < COMPRESS_MIN_SIZE:
+        return body, None
+
+    encoded_key = (catalog.version, path, encoding)
+    encoded = _body_cache.get(encoded_key)
+    if encoded is None:
+        encoded = compress(body, encoding)
+        _store_body(encoded_key, encoded)
+    return encoded, encoding
+
+
+def catalog_response(
+    request: Request,
+    catalog: CatalogIndex,
+    build_body: Callable[[], Any]
+) -> Response:
+    """
+    Serve a catalog listing with HTTP caching and compression.
+
+    `build_body` is only called when the client's copy is stale; bodies
+    for unfiltered queries are serialized and compressed once per catalog
+    version, filtered bodies on every request.
+    """
+    negotiated = choose_encoding(request.headers.get("accept-encoding"))
+    headers = {
+        "ETag": encoded_etag(make_etag(catalog.version, request), negotiated),
+        "Last-Modified": format_datetime(catalog.loaded_at, usegmt=True),
+        "Cache-Control": CATALOG_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+    elif not_modified_since(request.headers.get("if-modified-since"), catalog):
+        return Response(status_code=304, headers=headers)
+
+    if not request.query_params:
+        body, encoding = _cached_body(catalog, request.url.path, build_body, negotiated)
+    else:
+        body, encoding = serialize_body(build_body()), None
+        if negotiated and len(body) >= COMPRESS_MIN_SIZE:
+            body, encoding = compress(body, negotiated, DYNAMIC_LEVELS[negotiated]), negotiated
+    if encoding:
+        headers["Content-Encoding"] = encoding
+
+    return Response(content=body, media_type="application/json", headers=headers)
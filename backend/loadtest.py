@@ -0,0 +1,469 @@
+"""
+Coupon Sentinel - Load Test
+
+Drives the HTTP API with a realistic traffic mix and reports throughput,
+latency percentiles and error rates per endpoint and per worker count:
+1. For each worker count, a uvicorn server is started locally (against a
+   throwaway data directory) and polled until /health answers; with
+   --url an already running deployment is targeted instead
+2. A fixed number of asyncio clients send requests back to back for the
+   run duration, each picking an endpoint from the weighted mix
+3. Shopping lists are drawn from the mock catalog: list sizes follow a
+   weighted distribution, entries are catalog products asked for by a
+   short name, in their package unit and a realistic quantity
+4. A warm-up period (excluded from the results) fills the catalog caches
+   before measuring
+
+Run from the repo root:
+
+    python -m backend.loadtest --workers 1,2,4 --duration 30 --concurrency 64
+    python -m backend.loadtest --url http://localhost:8000 --mix optimize=1,quick=1
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from dataclasses import dataclass, field
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from .models import StoreItem
+from .providers.locations import SAMPLE_ZIP_CENTROIDS
+from .providers.mock_data import get_mock_store_items, SUPPORTED_STORES
+from .engines.loyalty import LOYALTY_PROGRAMS
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Relative weight of each call in the default mix
+DEFAULT_MIX: Dict[str, float] = {
+    "optimize": 4,
+    "optimize_multi": 2,
+    "quick": 2,
+    "items": 1,
+    "coupons": 1,
+    "stores": 0.5,
+    "categories": 0.5,
+}
+
+# Items per shopping list -> relative weight
+DEFAULT_LIST_SIZES: Dict[int, float] = {1: 1, 3: 2, 5: 3, 8: 3, 12: 2, 20: 1, 40: 0.5}
+
+DEFAULT_WORKERS = (1, 2, 4)
+DEFAULT_CONCURRENCY = 32
+DEFAULT_DURATION_SECONDS = 20.0
+DEFAULT_WARMUP_SECONDS = 3.0
+
+REQUEST_TIMEOUT_SECONDS = 30.0
+STARTUP_TIMEOUT_SECONDS = 60.0
+
+PERCENTILES = (50, 90, 99)
+
+
+# ============================================================================
+# Synthetic Traffic
+# ============================================================================
+
+@dataclass(frozen=True)
+class Call:
+    """One HTTP request to replay."""
+    endpoint: str
+    method: str
+    path: str
+    params: Optional[Dict[str, object]] = None
+    body: Optional[Dict[str, object]] = None
+
+
+# Words shoppers leave out of a list entry
+QUALIFIERS = {"a", "boneless", "cage", "fat", "free", "grade", "large", "organic", "reduced", "skinless"}
+
+
+def short_name(item: StoreItem) -> str:
+    """What a shopper would type for a product: the last words of its name, without qualifiers."""
+    words = [w for w in item.item_name.split() if w.isalpha() and w.lower() not in QUALIFIERS]
+    return " ".join(words[-2:]) if words else item.item_name
+
+
+class TrafficGenerator:
+    """Random API calls drawn from the mock catalog."""
+
+    def __init__(
+        self,
+        mix: Dict[str, float],
+        list_sizes: Dict[int, float],
+        seed: Optional[int] = None
+    ):
+        self._builders: Dict[str, Callable[[], Call]] = {
+            "optimize": lambda: self._optimize(multi_store=False),
+            "optimize_multi": lambda: self._optimize(multi_store=True),
+            "quick": self._quick,
+            "items": self._items,
+            "coupons": self._coupons,
+            "stores": lambda: Call("stores", "GET", "/api/stores"),
+            "categories": lambda: Call("categories", "GET", "/api/categories"),
+        }
+        unknown = set(mix) - set(self._builders)
+        if unknown:
+            raise ValueError(f"Unknown endpoints in mix: {', '.join(sorted(unknown))}")
+        if not any(weight > 0 for weight in mix.values()):
+            raise ValueError("The traffic mix needs at least one positive weight")
+
+        self.random = random.Random(seed)
+        self._endpoints = list(mix)
+        self._weights = [mix[e] for e in self._endpoints]
+        self._sizes = list(list_sizes)
+        self._size_weights = [list_sizes[s] for s in self._sizes]
+
+        items = get_mock_store_items()
+        self._products = items
+        self._categories = sorted({i.category for i in items if i.category})
+        self._zips = sorted(SAMPLE_ZIP_CENTROIDS)
+
+    def next_call(self) -> Call:
+        endpoint = self.random.choices(self._endpoints, self._weights)[0]
+        return self._builders[endpoint]()
+
+    def list_size(self) -> int:
+        return self.random.choices(self._sizes, self._size_weights)[0]
+
+    def shopping_list(self) -> List[Dict[str, object]]:
+        size = min(self.list_size(), len(self._products))
+        entries = []
+        for product in self.random.sample(self._products, size):
+            entry: Dict[str, object] = {"name": short_name(product), "flexible": True}
+            if product.package_unit == "count":
+                entry["quantity"] = self.random.choice((1, 1, 2, 3, 6, 12))
+            else:
+                entry["quantity"] = round(product.package_size * self.random.choice((1, 1, 2)), 2)
+                entry["unit"] = product.package_unit
+            if product.brand and self.random.random() < 0.15:
+                entry["brand_preference"] = product.brand
+                entry["flexible"] = self.random.random() < 0.5
+            entries.append(entry)
+        return entries
+
+    def _optimize(self, multi_store: bool) -> Call:
+        stores = list(SUPPORTED_STORES)
+        body = {
+            "shopping_list": self.shopping_list(),
+            "zip_code": self.random.choice(self._zips),
+            "allow_multi_store": multi_store,
+            "loyalty_memberships": [
+                program for program in LOYALTY_PROGRAMS.values() if self.random.random() < 0.4
+            ],
+            "rebate_apps": ["Ibotta"] if self.random.random() < 0.3 else [],
+        }
+        if self.random.random() < 0.3:
+            body["preferred_stores"] = self.random.sample(stores, self.random.randint(1, len(stores)))
+        return Call("optimize_multi" if multi_store else "optimize", "POST", "/api/optimize", body=body)
+
+    def _quick(self) -> Call:
+        names = [entry["name"] for entry in self.shopping_list()]
+        params: Dict[str, object] = {"items": names, "multi_store": self.random.random() < 0.5}
+        return Call("quick", "POST", "/api/quick-optimize", params=params)
+
+    def _items(self) -> Call:
+        params: Dict[str, object] = {"limit": self.random.choice((20, 50, 100))}
+        if self.random.random() < 0.5:
+            params["store"] = self.random.choice(SUPPORTED_STORES)
+        if self._categories and self.random.random() < 0.5:
+            params["category"] = self.random.choice(self._categories)
+        if self.random.random() < 0.5:
+            params["sort"] = self.random.choice(("unit_price", "price", "name"))
+        return Call("items", "GET", "/api/items", params=params)
+
+    def _coupons(self) -> Call:
+        params: Dict[str, object] = {"limit": self.random.choice((20, 50))}
+        if self.random.random() < 0.5:
+            params["store"] = self.random.choice(SUPPORTED_STORES)
+        if self.random.random() < 0.3:
+            params["sort"] = "value"
+        return Call("coupons", "GET", "/api/coupons", params=params)
+
+
+# ============================================================================
+# Measurement
+# ============================================================================
+
+@dataclass
+class EndpointStats:
+    """Latencies and failures for one endpoint in one run."""
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: Dict[str, int] = field(default_factory=dict)
+
+    def record(self, seconds: float, status: str, ok: bool) -> None:
+        self.latencies.append(seconds)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if not ok:
+            self.errors += 1
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(name: str, stats: EndpointStats, seconds: float) -> Dict[str, object]:
+    latencies = sorted(stats.latencies)
+    count = len(latencies)
+    summary: Dict[str, object] = {
+        "endpoint": name,
+        "requests": count,
+        "rps": round(count / seconds, 1) if seconds else 0.0,
+        "error_rate": round(stats.errors / count, 4) if count else 0.0,
+        "statuses": dict(sorted(stats.statuses.items())),
+    }
+    for pct in PERCENTILES:
+        summary[f"p{pct}_ms"] = round(percentile(latencies, pct) * 1000, 1)
+    summary["max_ms"] = round(latencies[-1] * 1000, 1) if latencies else 0.0
+    return summary
+
+
+async def _client(
+    http: httpx.AsyncClient,
+    traffic: TrafficGenerator,
+    stats: Optional[Dict[str, EndpointStats]],
+    deadline: float
+) -> None:
+    while time.perf_counter() < deadline:
+        call = traffic.next_call()
+        started = time.perf_counter()
+        try:
+            response = await http.request(call.method, call.path, params=call.params, json=call.body)
+            await response.aread()
+            status, ok = str(response.status_code), response.status_code < 400
+        except httpx.HTTPError as e:
+            status, ok = type(e).__name__, False
+        if stats is not None:
+            stats.setdefault(call.endpoint, EndpointStats()).record(time.perf_counter() - started, status, ok)
+
+
+async def drive(
+    base_url: str,
+    traffic: TrafficGenerator,
+    concurrency: int,
+    duration: float,
+    warmup: float
+) -> Tuple[Dict[str, EndpointStats], float]:
+    """Run `concurrency` clients against a server; returns per-endpoint stats and the measured seconds."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=REQUEST_TIMEOUT_SECONDS) as http:
+        if warmup > 0:
+            deadline = time.perf_counter() + warmup
+            await asyncio.gather(*(_client(http, traffic, None, deadline) for _ in range(concurrency)))
+
+        stats: Dict[str, EndpointStats] = {}
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(_client(http, traffic, stats, deadline) for _ in range(concurrency)))
+        return stats, time.perf_counter() - started
+
+
+def run_report(label: str, stats: Dict[str, EndpointStats], seconds: float) -> Dict[str, object]:
+    """Summary of one run: per endpoint and across all of them."""
+    total = EndpointStats()
+    for endpoint_stats in stats.values():
+        total.latencies.extend(endpoint_stats.latencies)
+        total.errors += endpoint_stats.errors
+        for status, n in endpoint_stats.statuses.items():
+            total.statuses[status] = total.statuses.get(status, 0) + n
+    return {
+        "workers": label,
+        "seconds": round(seconds, 2),
+        "endpoints": [summarize(name, stats[name], seconds) for name in sorted(stats)],
+        "total": summarize("all", total, seconds),
+    }
+
+
+# ============================================================================
+# Local Server
+# ============================================================================
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class LocalServer:
+    """uvicorn serving the app with a given number of worker processes."""
+
+    def __init__(self, workers: int, data_dir: Path):
+        self.workers = workers
+        self.port = _free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        env = dict(os.environ)
+        env["COUPON_SENTINEL_DATA_DIR"] = str(data_dir)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(REPO_ROOT), env.get("PYTHONPATH")]))
+        self._process = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "backend.app:app",
+                "--host", "127.0.0.1", "--port", str(self.port),
+                "--workers", str(workers), "--log-level", "warning", "--no-access-log",
+            ],
+            cwd=REPO_ROOT, env=env
+        )
+
+    async def wait_ready(self, timeout: float = STARTUP_TIMEOUT_SECONDS) -> None:
+        deadline = time.monotonic() + timeout
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=5.0) as http:
+            while time.monotonic() < deadline:
+                if self._process.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with status {self._process.returncode}")
+                try:
+                    if (await http.get("/health")).status_code == 200:
+                        return
+                except httpx.HTTPError:
+                    pass
+                await asyncio.sleep(0.2)
+        raise RuntimeError(f"uvicorn did not answer /health within {timeout:.0f}s")
+
+    def stop(self) -> None:
+        self._process.terminate()
+        try:
+            self._process.wait(10)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, object]]:
+    traffic = TrafficGenerator(args.mix, args.list_sizes, seed=args.seed)
+    reports = []
+
+    if args.url:
+        stats, seconds = await drive(args.url, traffic, args.concurrency, args.duration, args.warmup)
+        reports.append(run_report("external", stats, seconds))
+        return reports
+
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory(prefix="coupon-sentinel-load-") as data_dir:
+            server = LocalServer(workers, Path(data_dir))
+            try:
+                await server.wait_ready()
+                stats, seconds = await drive(server.base_url, traffic, args.concurrency, args.duration, args.warmup)
+            finally:
+                server.stop()
+        reports.append(run_report(str(workers), stats, seconds))
+        print_report(reports[-1])
+    return reports
+
+
+# ============================================================================
+# Command Line
+# ============================================================================
+
+def _weights(text: str) -> Dict[str, float]:
+    """Parse "optimize=4,quick=2" into weights."""
+    weights: Dict[str, float] = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        name, sep, weight = part.partition("=")
+        try:
+            weights[name.strip()] = float(weight) if sep else 1.0
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Bad weight in {part!r}")
+    if not weights:
+        raise argparse.ArgumentTypeError("Expected name=weight pairs")
+    return weights
+
+
+def _list_sizes(text: str) -> Dict[int, float]:
+    try:
+        sizes = {int(size): weight for size, weight in _weights(text).items()}
+    except ValueError:
+        raise argparse.ArgumentTypeError("List sizes must be integers, e.g. 1=1,5=3,20=1")
+    if any(size < 1 for size in sizes):
+        raise argparse.ArgumentTypeError("List sizes must be at least 1")
+    return sizes
+
+
+def _worker_counts(text: str) -> List[int]:
+    try:
+        counts = [int(n) for n in text.split(",") if n.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError("Worker counts must be integers, e.g. 1,2,4")
+    if not counts or any(n < 1 for n in counts):
+        raise argparse.ArgumentTypeError("Worker counts must be at least 1")
+    return counts
+
+
+def print_report(report: Dict[str, object]) -> None:
+    header = (
+        f"{'endpoint':<16}{'requests':>10}{'rps':>10}"
+        + "".join(f"{f'p{pct} ms':>10}" for pct in PERCENTILES)
+        + f"{'max ms':>10}{'errors':>9}"
+    )
+    print(f"\nworkers={report['workers']}  measured {report['seconds']}s")
+    print(header)
+    print("-" * len(header))
+    for row in [*report["endpoints"], report["total"]]:
+        print(
+            f"{row['endpoint']:<16}{row['requests']:>10}{row['rps']:>10}"
+            + "".join(f"{row[f'p{pct}_ms']:>10}" for pct in PERCENTILES)
+            + f"{row['max_ms']:>10}{row['error_rate']:>9.2%}"
+        )
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m backend.loadtest",
+        description="Load test the Coupon Sentinel API with a realistic traffic mix."
+    )
+    parser.add_argument("--url", help="Target a running server instead of starting uvicorn locally")
+    parser.add_argument(
+        "--workers", type=_worker_counts, default=list(DEFAULT_WORKERS),
+        help="Comma-separated uvicorn worker counts to test (default: 1,2,4)"
+    )
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION_SECONDS, help="Measured seconds per run")
+    parser.add_argument("--warmup", type=float, default=DEFAULT_WARMUP_SECONDS, help="Unmeasured seconds before each run")
+    parser.add_argument(
+        "--mix", type=_weights, default=dict(DEFAULT_MIX),
+        help=f"Endpoint weights, e.g. optimize=4,quick=2,items=1 (endpoints: {', '.join(DEFAULT_MIX)})"
+    )
+    parser.add_argument(
+        "--list-sizes", type=_list_sizes, default=dict(DEFAULT_LIST_SIZES),
+        help="Shopping list size weights, e.g. 1=1,5=3,20=1"
+    )
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible traffic")
+    parser.add_argument("--json", type=Path, help="Also write the reports to this file")
+    args = parser.parse_args(argv)
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.duration <= 0:
+        parser.error("--duration must be positive")
+    return args
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    try:
+        reports = asyncio.run(run(args))
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    if args.url:
+        print_report(reports[0])
+    if args.json:
+        args.json.write_text(json.dumps(reports, indent=2))
+
+    total_errors = sum(r["total"]["error_rate"] for r in reports)
+    return 1 if total_errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
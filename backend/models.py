@@ -3,8 +3,9 @@ Coupon Sentinel - Data Models
 Pydantic models for items, coupons, stores, and optimization results.
 """
 
-from pydantic import BaseModel, Field
-from typing import List, Optional
+import re
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import Any, List, Literal, Optional, Tuple
 from enum import Enum
 
 
@@ -44,9 +45,76 @@ class OptimizeRequest(BaseModel):
     """Request to optimize a shopping list."""
     shopping_list: List[ShoppingItem]
     zip_code: str = Field(..., description="User's zip code for store selection")
+    radius_miles: float = Field(25.0, gt=0, le=100, description="Only consider stores this close to the zip code")
     preferred_stores: List[str] = Field(default_factory=list, description="Preferred stores")
     allow_multi_store: bool = Field(False, description="Allow splitting across stores")
     rebate_apps: List[str] = Field(default_factory=list, description="Rebate apps user has")
+    loyalty_memberships: List[str] = Field(
+        default_factory=list,
+        description="Loyalty programs or stores the user is a member of (e.g., 'Target Circle')"
+    )
+    rank_by_net_cost: bool = Field(
+        False, description="Choose products and stores by cost after rebates from rebate_apps"
+    )
+    alternatives: int = Field(
+        0, ge=0, le=10, description="Also return up to this many cheapest alternative products per item"
+    )
+
+
+class SaveListRequest(BaseModel):
+    """A shopping list to save and keep optimized."""
+    name: str = Field("My list", description="Display name for the list")
+    request: OptimizeRequest
+
+
+class WatchRule(BaseModel):
+    """A deal a user wants to be alerted about."""
+    item_filter: str = Field(..., description="Item name or category to watch (e.g., 'coffee')")
+    brand: Optional[str] = Field(None, description="Only alert for this brand")
+    store: Optional[str] = Field(None, description="Only alert for this store")
+    max_unit_price: Optional[float] = Field(
+        None, gt=0, description="Max price per base unit (oz, fl oz or count) after coupons"
+    )
+    min_savings_pct: Optional[float] = Field(
+        None, ge=0, le=100, description="Minimum savings vs. regular price, in percent"
+    )
+    owner: Optional[str] = Field(None, description="Who to deliver alerts to")
+
+
+class AckAlertsRequest(BaseModel):
+    """Alerts a delivery worker has sent."""
+    alert_ids: List[int]
+
+
+class PriceSubmission(BaseModel):
+    """A price a shopper saw on the shelf."""
+    item_id: str = Field(..., description="Catalog item id")
+    price: float = Field(..., gt=0, le=10_000, description="Shelf price seen")
+    submitter: str = Field(..., min_length=1, max_length=128, description="Submitting user or device")
+    store_id: Optional[str] = Field(None, description="Store location the price was seen at")
+
+
+class PriceSubmissionBatch(BaseModel):
+    """Price reports sent together."""
+    submissions: List[PriceSubmission] = Field(..., min_length=1, max_length=1000)
+
+
+class ListEdit(BaseModel):
+    """One change to an optimization session's shopping list."""
+    op: Literal["add", "remove", "set_quantity"]
+    item: Optional[ShoppingItem] = Field(None, description="Item to add (op 'add')")
+    name: Optional[str] = Field(None, description="Item to remove or re-quantify")
+    quantity: Optional[float] = Field(None, gt=0, description="New quantity (op 'set_quantity')")
+
+
+class ListEditBatch(BaseModel):
+    """List edits applied together, in order."""
+    edits: List[ListEdit] = Field(..., min_length=1, max_length=100)
+
+
+class RebateClaimUpdate(BaseModel):
+    """Where a rebate claim stands."""
+    status: Literal["eligible", "submitted", "paid", "rejected"]
 
 
 # ============================================================================
@@ -67,11 +135,30 @@ class StoreItem(BaseModel):
     loyalty_price: Optional[float] = Field(None, description="Price with loyalty card")
     in_stock: bool = True
 
+    # Canonical size in base units, precomputed at catalog load (engines/units.py)
+    _units_annotated: bool = PrivateAttr(default=False)
+    _canonical_size: Optional[Any] = PrivateAttr(default=None)
+    _inverse_size: Optional[float] = PrivateAttr(default=None)
+
+    # Per-tier shelf prices in cents, precomputed at catalog load (engines/loyalty.py)
+    _tier_cents: Optional[Tuple[int, int]] = PrivateAttr(default=None)
+    _regular_cents: Optional[int] = PrivateAttr(default=None)
+
     @property
     def unit_price(self) -> float:
         """Price per unit (e.g., per oz, per count)."""
         return self.price / self.package_size if self.package_size > 0 else self.price
 
+    @property
+    def item_id(self) -> str:
+        """Stable identifier: store plus UPC, or store/brand/name/size when no UPC."""
+        if self.upc:
+            parts = [self.store_name, self.upc]
+        else:
+            size = f"{self.package_size:g}{self.package_unit}"
+            parts = [self.store_name, self.brand or "", self.item_name, size]
+        return ":".join(re.sub(r"[^a-z0-9]+", "-", p.lower()).strip("-") for p in parts)
+
 
 # ============================================================================
 # Coupon Models
@@ -107,6 +194,15 @@ class AppliedCoupon(BaseModel):
     discount_amount: float
 
 
+class ItemAlternative(BaseModel):
+    """Another product that would fulfill a requested item, with its own coupon stack."""
+    product: StoreItem
+    quantity_to_buy: int
+    applied_coupons: List[AppliedCoupon] = Field(default_factory=list)
+    final_cost: float
+    savings: float
+
+
 class OptimizedItem(BaseModel):
     """An item in the optimized plan."""
     requested_item: ShoppingItem
@@ -117,6 +213,13 @@ class OptimizedItem(BaseModel):
     final_cost: float
     savings: float
     notes: List[str] = Field(default_factory=list)
+    alternatives: List[ItemAlternative] = Field(
+        default_factory=list,
+        description="Cheapest other products for this item, when requested (on the first line of a mix)"
+    )
+
+    # ((app, amount), ...) rebates from the user's apps, set by the optimizer
+    _rebates: Tuple[Tuple[str, float], ...] = PrivateAttr(default=())
 
 
 class StorePlan(BaseModel):
@@ -147,3 +250,16 @@ class OptimizeResponse(BaseModel):
     unfulfilled_items: List[ShoppingItem] = Field(default_factory=list)
     action_steps: List[str] = Field(default_factory=list)
     rebate_opportunities: List[RebateOpportunity] = Field(default_factory=list)
+
+
+class FrontierPlan(BaseModel):
+    """One plan on the cost / stores / brand-preference frontier."""
+    grand_total: float
+    store_count: int = Field(..., description="Stores visited")
+    brand_violations: int = Field(..., description="Items bought outside their preferred brand")
+    result: OptimizeResponse
+
+
+class FrontierResponse(BaseModel):
+    """Pareto-optimal plans, cheapest first; none is better on every objective."""
+    plans: List[FrontierPlan]
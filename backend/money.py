@@ -0,0 +1,32 @@
+"""
+Coupon Sentinel - Money
+
+Fixed-point money for the pricing engine and the price stores:
+1. Amounts are integer cents from the catalog boundary on; catalog and
+   coupon dollar values are converted once, rounding half up
+2. Sums and comparisons are exact integers, so a total does not depend
+   on the order lines were added in, and cached, parallel and fresh
+   computations agree bit for bit
+3. Only percentage-based discounts produce fractions of a cent; they are
+   rounded half up (see stacking_logic.discount_cents for the rule per
+   discount type)
+4. Dollars are produced for responses only, as cents / 100
+"""
+
+import math
+
+
+def to_cents(amount: float) -> int:
+    """Dollars to integer cents, rounding half up."""
+    return math.floor(amount * 100 + 0.5)
+
+
+def to_dollars(cents: int) -> float:
+    return cents / 100
+
+
+def percent_of(cents: int, rate: float) -> int:
+    """`rate` (a fraction, e.g. 0.25) of an amount, rounded half up to the cent."""
+    # Rates are exact to a basis point, so the product is an exact integer
+    basis_points = math.floor(rate * 10_000 + 0.5)
+    return (cents * basis_points + 5_000) // 10_000
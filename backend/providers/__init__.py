@@ -1,4 +1,16 @@
 # Coupon Sentinel - Data Providers
 from .mock_data import get_mock_store_items, get_mock_coupons, SUPPORTED_STORES
+from .catalog import get_catalog, current_catalog, reload_catalog, apply_item_prices, subscribe, unsubscribe
+from .base import (
+    StoreProvider, MockProvider, HttpProvider, StoreData, StoreFailure,
+    ProviderError, ProviderUnavailable,
+)
+from .fetcher import ProviderHub, get_provider_hub, current_provider_hub, get_http_client, close_http_client
 
-__all__ = ["get_mock_store_items", "get_mock_coupons", "SUPPORTED_STORES"]
+__all__ = [
+    "get_mock_store_items", "get_mock_coupons", "SUPPORTED_STORES",
+    "get_catalog", "current_catalog", "reload_catalog", "apply_item_prices", "subscribe", "unsubscribe",
+    "StoreProvider", "MockProvider", "HttpProvider", "StoreData", "StoreFailure",
+    "ProviderError", "ProviderUnavailable",
+    "ProviderHub", "get_provider_hub", "current_provider_hub", "get_http_client", "close_http_client",
+]
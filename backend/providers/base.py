@@ -0,0 +1,116 @@
+"""
+Coupon Sentinel - Provider Interface
+
+A provider fetches one store's items and coupons for a zip code:
+- `MockProvider` serves the bundled mock data (no network)
+- `HttpProvider` fetches JSON over the shared pooled HTTP client
+
+Each provider declares its own rate limit; the fetcher (fetcher.py)
+applies rate limiting, retries and circuit breaking around these calls.
+"""
+
+from typing import List, NamedTuple, Optional
+from abc import ABC, abstractmethod
+import httpx
+from ..models import StoreItem, Coupon
+from .mock_data import get_mock_store_items, get_mock_coupons, SUPPORTED_STORES
+
+
+class ProviderError(Exception):
+    """A provider could not return data for a store."""
+
+
+class ProviderUnavailable(ProviderError):
+    """The provider's circuit is open; it is not being called right now."""
+
+
+class StoreData(NamedTuple):
+    """One store's catalog as returned by a provider."""
+    provider: str
+    store: str
+    zip_code: str
+    items: List[StoreItem]
+    coupons: List[Coupon]
+
+
+class StoreFailure(NamedTuple):
+    """A store no provider could return data for."""
+    store: str
+    error: str
+
+
+class StoreProvider(ABC):
+    """Source of store items and coupons for some set of stores."""
+
+    name: str = "provider"
+    stores: List[str] = []
+
+    # Token bucket: sustained requests per second and burst size
+    rate_per_second: float = 10.0
+    burst: int = 10
+
+    @abstractmethod
+    async def fetch_items(self, client: httpx.AsyncClient, store: str, zip_code: str) -> List[StoreItem]:
+        """Items on sale at one store near a zip code."""
+
+    @abstractmethod
+    async def fetch_coupons(self, client: httpx.AsyncClient, store: str, zip_code: str) -> List[Coupon]:
+        """Coupons valid at one store (including manufacturer coupons)."""
+
+
+class MockProvider(StoreProvider):
+    """The bundled mock data, served through the provider interface."""
+
+    name = "mock"
+    stores = SUPPORTED_STORES
+    rate_per_second = 1000.0
+    burst = 1000
+
+    async def fetch_items(self, client: httpx.AsyncClient, store: str, zip_code: str) -> List[StoreItem]:
+        return [i for i in get_mock_store_items() if i.store_name == store]
+
+    async def fetch_coupons(self, client: httpx.AsyncClient, store: str, zip_code: str) -> List[Coupon]:
+        return [
+            c for c in get_mock_coupons()
+            if not c.store_scope or c.store_scope.lower() in ("any", store.lower())
+        ]
+
+
+class HttpProvider(StoreProvider):
+    """
+    A JSON API with one endpoint per store for items and coupons:
+
+        GET {base_url}/stores/{store}/items?zip={zip_code}
+        GET {base_url}/stores/{store}/coupons?zip={zip_code}
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        stores: List[str],
+        rate_per_second: float = 5.0,
+        burst: int = 5,
+        headers: Optional[dict] = None
+    ):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.stores = stores
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.headers = headers or {}
+
+    async def _get(self, client: httpx.AsyncClient, store: str, resource: str, zip_code: str) -> list:
+        response = await client.get(
+            f"{self.base_url}/stores/{store}/{resource}",
+            params={"zip": zip_code},
+            headers=self.headers,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def fetch_items(self, client: httpx.AsyncClient, store: str, zip_code: str) -> List[StoreItem]:
+        return [StoreItem(**row) for row in await self._get(client, store, "items", zip_code)]
+
+    async def fetch_coupons(self, client: httpx.AsyncClient, store: str, zip_code: str) -> List[Coupon]:
+        return [Coupon(**row) for row in await self._get(client, store, "coupons", zip_code)]
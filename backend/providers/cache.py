@@ -0,0 +1,146 @@
+"""
+Coupon Sentinel - Provider Cache
+
+Stale-while-revalidate cache in front of the provider fetches:
+1. Keyed by (provider, store, zip); fresh for a per-store TTL
+2. Past its TTL, an entry is still served (up to MAX_STALE_SECONDS) while
+   one background fetch refreshes it
+3. Concurrent misses for a key share a single upstream fetch
+4. Every fetched payload is persisted to disk, so a restart serves the
+   last known data instead of cold-starting every store
+"""
+
+from typing import Awaitable, Callable, Dict, Optional, Set
+import asyncio
+import logging
+import time
+from ..models import StoreItem, Coupon
+from ..storage.provider_cache import CacheKey, ProviderCacheStore
+from .base import StoreData
+
+
+logger = logging.getLogger(__name__)
+
+
+# How long fetched data is fresh, unless a store overrides it
+DEFAULT_TTL_SECONDS = 15 * 60
+
+# Per-store freshness overrides, e.g. {"costco": 60 * 60}
+STORE_TTL_SECONDS: Dict[str, float] = {}
+
+# Older than this, cached data is not served even while revalidating
+MAX_STALE_SECONDS = 24 * 60 * 60
+
+Fetch = Callable[[], Awaitable[StoreData]]
+
+
+def _to_payload(data: StoreData) -> dict:
+    return {
+        "store": data.store,
+        "items": [i.model_dump(mode="json") for i in data.items],
+        "coupons": [c.model_dump(mode="json") for c in data.coupons],
+    }
+
+
+def _from_payload(key: CacheKey, payload: dict) -> StoreData:
+    provider, store, zip_code = key
+    return StoreData(
+        provider, payload.get("store", store), zip_code,
+        [StoreItem(**row) for row in payload["items"]],
+        [Coupon(**row) for row in payload["coupons"]],
+    )
+
+
+class ProviderCache:
+    """In-memory SWR cache over provider results, optionally persisted to disk."""
+
+    def __init__(
+        self,
+        store: Optional[ProviderCacheStore] = None,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = DEFAULT_TTL_SECONDS,
+        max_stale: float = MAX_STALE_SECONDS
+    ):
+        self.store = store
+        self.ttls = {k.lower(): v for k, v in (ttls if ttls is not None else STORE_TTL_SECONDS).items()}
+        self.default_ttl = default_ttl
+        self.max_stale = max_stale
+
+        # key -> (fetched_at wall time, data)
+        self._entries: Dict[CacheKey, tuple] = {}
+        self._checked_disk: Set[CacheKey] = set()
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+        # Entries fetched before these times are treated as missing
+        self._expired_before: Dict[CacheKey, float] = {}
+        self._all_expired_before = 0.0
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "refresh_errors": 0}
+
+    def ttl_for(self, store: str) -> float:
+        return self.ttls.get(store.lower(), self.default_ttl)
+
+    def _entry(self, key: CacheKey) -> Optional[tuple]:
+        entry = self._entries.get(key)
+        if entry is None and self.store is not None and key not in self._checked_disk:
+            self._checked_disk.add(key)
+            persisted = self.store.load(key)
+            if persisted is not None:
+                fetched_at, payload = persisted
+                entry = (fetched_at, _from_payload(key, payload))
+                self._entries[key] = entry
+
+        if entry is not None:
+            expired_before = max(self._all_expired_before, self._expired_before.get(key, 0.0))
+            if entry[0] <= expired_before:
+                return None
+        return entry
+
+    async def get(self, key: CacheKey, fetch: Fetch) -> StoreData:
+        """Cached data for a key, fetching (or revalidating) through `fetch` as needed."""
+        entry = self._entry(key)
+        if entry is not None:
+            fetched_at, data = entry
+            age = time.time() - fetched_at
+            if age < self.ttl_for(key[1]):
+                self.stats["hits"] += 1
+                return data
+            if age < self.max_stale:
+                self.stats["stale_hits"] += 1
+                self._refresh(key, fetch, background=True)
+                return data
+
+        self.stats["misses"] += 1
+        return await asyncio.shield(self._refresh(key, fetch))
+
+    def _refresh(self, key: CacheKey, fetch: Fetch, background: bool = False) -> asyncio.Future:
+        """The in-flight fetch for a key, starting one if none is running."""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            return task
+
+        task = asyncio.ensure_future(self._fetch_and_store(key, fetch))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        if background:
+            task.add_done_callback(self._log_refresh_error)
+        return task
+
+    async def _fetch_and_store(self, key: CacheKey, fetch: Fetch) -> StoreData:
+        data = await fetch()
+        fetched_at = time.time()
+        self._entries[key] = (fetched_at, data)
+        if self.store is not None:
+            await asyncio.to_thread(self.store.save, key, fetched_at, _to_payload(data))
+        return data
+
+    def _log_refresh_error(self, task: asyncio.Future) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            self.stats["refresh_errors"] += 1
+            logger.warning("Background provider refresh failed: %s", task.exception())
+
+    def invalidate(self, key: Optional[CacheKey] = None) -> None:
+        """Make the next lookup of one key (or every key) fetch upstream."""
+        if key is None:
+            self._all_expired_before = time.time()
+        else:
+            self._expired_before[key] = time.time()
@@ -0,0 +1,110 @@
+"""
+Coupon Sentinel - Catalog Loader
+
+Loads store items and coupons from the configured providers and keeps a
+single indexed catalog in memory. The index is rebuilt only when the
+catalog is reloaded, never per request. Each reload is diffed against
+the previous catalog and the delta is published to subscribers. Store
+locations and their price overrides are read on each load (zones.py).
+"""
+
+from typing import Callable, Dict, List, Optional
+import logging
+import sqlite3
+import threading
+from ..models import StoreItem, Coupon
+from ..engines.best_buys import POPULAR_TERMS
+from ..engines.catalog_index import CatalogIndex
+from ..engines.catalog_delta import CatalogDelta, compute_delta
+from ..storage.price_history import get_price_history
+from .mock_data import get_mock_store_items, get_mock_coupons
+from .zones import zone_layout
+
+
+logger = logging.getLogger(__name__)
+
+
+_catalog: Optional[CatalogIndex] = None
+_lock = threading.Lock()
+
+DeltaListener = Callable[[CatalogDelta, CatalogIndex], None]
+_listeners: List[DeltaListener] = []
+
+
+def subscribe(listener: DeltaListener) -> None:
+    """Call `listener(delta, catalog)` after every catalog reload that changes something."""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def unsubscribe(listener: DeltaListener) -> None:
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def _publish(delta: CatalogDelta, catalog: CatalogIndex) -> None:
+    for listener in list(_listeners):
+        try:
+            listener(delta, catalog)
+        except Exception:
+            logger.exception("Catalog delta listener failed")
+
+
+def _record_history(catalog: CatalogIndex) -> None:
+    """Append this version's prices to the price history once (best effort)."""
+    try:
+        get_price_history().record_items(catalog.store_items, catalog.loaded_at, catalog.version)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning("Could not record price history: %s", e)
+
+
+def get_catalog() -> CatalogIndex:
+    """Return the current catalog index, loading it on first use."""
+    global _catalog
+    if _catalog is None:
+        with _lock:
+            if _catalog is None:
+                catalog = CatalogIndex(get_mock_store_items(), get_mock_coupons(), **zone_layout())
+                _record_history(catalog)
+                _catalog = catalog
+    return _catalog
+
+
+def current_catalog() -> Optional[CatalogIndex]:
+    """The catalog index if it has been loaded, without loading it."""
+    return _catalog
+
+
+def reload_catalog(
+    store_items: Optional[List[StoreItem]] = None,
+    coupons: Optional[List[Coupon]] = None
+) -> CatalogIndex:
+    """Rebuild the catalog index, optionally from explicit data."""
+    global _catalog
+    # Materialize what shoppers asked for under the previous version
+    current = _catalog
+    catalog = CatalogIndex(
+        store_items if store_items is not None else get_mock_store_items(),
+        coupons if coupons is not None else get_mock_coupons(),
+        current.best_buys.next_terms() if current is not None else POPULAR_TERMS,
+        **zone_layout(),
+    )
+    _record_history(catalog)
+    with _lock:
+        previous, _catalog = _catalog, catalog
+
+    delta = compute_delta(previous, catalog)
+    if not delta.empty:
+        _publish(delta, catalog)
+    return catalog
+
+
+def apply_item_prices(prices: Dict[str, float]) -> CatalogIndex:
+    """Reload the catalog with some items repriced (item id -> price), publishing the delta."""
+    current = get_catalog()
+    store_items = [
+        item.model_copy(update={"price": prices[item.item_id]})
+        if item.item_id in prices and prices[item.item_id] != item.price else item
+        for item in current.store_items
+    ]
+    return reload_catalog(store_items, current.coupons)
@@ -0,0 +1,119 @@
+"""
+Coupon Sentinel - Fake Store Server
+
+A local HTTP server speaking the HttpProvider API, backed by the mock
+data, for exercising the real HTTP path in tests and load runs:
+
+    with FakeStoreServer(latency=0.05, failure_rate=0.1) as server:
+        hub = ProviderHub([server.provider()])
+
+Latency, random 503s and hard-down stores can be injected per server.
+"""
+
+from typing import Dict, Iterable, Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+import json
+import random
+import threading
+import time
+from .base import HttpProvider
+from .mock_data import get_mock_store_items, get_mock_coupons, SUPPORTED_STORES
+
+
+class FakeStoreServer:
+    """Threaded HTTP server serving mock store data on localhost."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        down_stores: Iterable[str] = (),
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.down_stores = {s.lower() for s in down_stores}
+        self.request_count = 0
+        self._count_lock = threading.Lock()
+
+        items = get_mock_store_items()
+        coupons = get_mock_coupons()
+        self._payloads: Dict[str, Dict[str, bytes]] = {}
+        for store in SUPPORTED_STORES:
+            store_coupons = [
+                c for c in coupons
+                if not c.store_scope or c.store_scope.lower() in ("any", store.lower())
+            ]
+            self._payloads[store.lower()] = {
+                "items": json.dumps(
+                    [i.model_dump(mode="json") for i in items if i.store_name == store]
+                ).encode(),
+                "coupons": json.dumps([c.model_dump(mode="json") for c in store_coupons]).encode(),
+            }
+
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def provider(self, name: str = "fake", **kwargs) -> HttpProvider:
+        """An HttpProvider pointed at this server, serving every mock store."""
+        return HttpProvider(name, self.base_url, list(SUPPORTED_STORES), **kwargs)
+
+    def start(self) -> "FakeStoreServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeStoreServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _respond(self, path: str):
+        """(status, body) for a request path."""
+        with self._count_lock:
+            self.request_count += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        parts = [unquote(p) for p in urlparse(path).path.strip("/").split("/")]
+        if len(parts) != 3 or parts[0] != "stores":
+            return 404, b'{"detail": "Not found"}'
+        store, resource = parts[1].lower(), parts[2]
+        if store in self.down_stores or random.random() < self.failure_rate:
+            return 503, b'{"detail": "Service unavailable"}'
+        payload = self._payloads.get(store, {}).get(resource)
+        if payload is None:
+            return 404, b'{"detail": "Not found"}'
+        return 200, payload
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                status, body = server._respond(self.path)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
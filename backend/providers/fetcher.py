@@ -0,0 +1,272 @@
+"""
+Coupon Sentinel - Provider Fetcher
+
+Concurrent, resilient fetching from store providers:
+1. One pooled httpx.AsyncClient shared by every provider
+2. Fan-out across stores, yielding each store's data as it arrives so
+   the optimizer can start before the slowest provider returns
+3. A token-bucket rate limit per provider
+4. Retries with exponential backoff and jitter for transient errors
+5. A circuit breaker per (provider, store), so a failing upstream is
+   skipped instead of slowing every request down
+6. An optional stale-while-revalidate cache in front of it all (cache.py)
+"""
+
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+import asyncio
+import logging
+import random
+import time
+import httpx
+from ..storage import data_path
+from ..storage.provider_cache import ProviderCacheStore
+from .base import (
+    MockProvider, ProviderError, ProviderUnavailable, StoreData, StoreFailure, StoreProvider
+)
+from .cache import ProviderCache
+
+
+logger = logging.getLogger(__name__)
+
+
+# Connection pool shared by all providers
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 20
+REQUEST_TIMEOUT = httpx.Timeout(10.0, connect=3.0)
+
+# Retries for transient failures (network errors, 429 and 5xx)
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.2
+RETRY_MAX_DELAY = 2.0
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+# Consecutive failures that open a provider's circuit, and how long it stays open
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 30.0
+
+StoreResult = Union[StoreData, StoreFailure]
+
+
+# ============================================================================
+# Shared HTTP client
+# ============================================================================
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """The pooled client every provider fetches through."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            timeout=REQUEST_TIMEOUT,
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+# ============================================================================
+# Rate limiting and circuit breaking
+# ============================================================================
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class CircuitBreaker:
+    """Closed -> open after repeated failures -> half-open trial after a cooldown."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_seconds: float = BREAKER_RESET_SECONDS
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+
+    def allow(self) -> bool:
+        """Whether a call may go through now."""
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.reset_seconds:
+                return False
+            # Let one trial call through
+            self.state = self.HALF_OPEN
+            return True
+        return True
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS
+    return isinstance(error, httpx.TransportError)
+
+
+def _describe(error: Exception) -> str:
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"HTTP {error.response.status_code}"
+    return str(error) or type(error).__name__
+
+
+def _backoff(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+# ============================================================================
+# Hub
+# ============================================================================
+
+class ProviderHub:
+    """Registered providers with per-provider rate limits and per-store circuit breakers."""
+
+    def __init__(self, providers: Iterable[StoreProvider] = (), cache: Optional[ProviderCache] = None):
+        self.cache = cache
+        self._providers: Dict[str, StoreProvider] = {}
+        self._by_store: Dict[str, StoreProvider] = {}
+        self._limiters: Dict[str, TokenBucket] = {}
+        self.breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+        for provider in providers:
+            self.register(provider)
+
+    def register(self, provider: StoreProvider) -> None:
+        """Add a provider; it takes over any stores it shares with earlier ones."""
+        self._providers[provider.name] = provider
+        self._limiters[provider.name] = TokenBucket(provider.rate_per_second, provider.burst)
+        for store in provider.stores:
+            self._by_store[store.lower()] = provider
+
+    @property
+    def stores(self) -> List[str]:
+        """Every store some provider serves."""
+        stores = []
+        for provider in self._providers.values():
+            stores.extend(s for s in provider.stores if self._by_store[s.lower()] is provider)
+        return stores
+
+    def provider_for(self, store: str) -> Optional[StoreProvider]:
+        return self._by_store.get(store.lower())
+
+    async def _call(self, provider: StoreProvider, fetch, store: str, zip_code: str):
+        await self._limiters[provider.name].acquire()
+        return await fetch(get_http_client(), store, zip_code)
+
+    async def fetch_store(self, store: str, zip_code: str) -> StoreData:
+        """One store's items and coupons, from the cache when one is configured."""
+        provider = self.provider_for(store)
+        if provider is None:
+            raise ProviderError(f"No provider for store: {store}")
+        if self.cache is None:
+            return await self._fetch_upstream(provider, store, zip_code)
+        return await self.cache.get(
+            (provider.name, store.lower(), zip_code),
+            lambda: self._fetch_upstream(provider, store, zip_code),
+        )
+
+    async def _fetch_upstream(self, provider: StoreProvider, store: str, zip_code: str) -> StoreData:
+        """Fetch from the provider with rate limiting, retries and circuit breaking."""
+        breaker = self.breakers.setdefault((provider.name, store.lower()), CircuitBreaker())
+        if not breaker.allow():
+            raise ProviderUnavailable(f"{provider.name} is unavailable for {store} (circuit open)")
+
+        for attempt in range(RETRY_ATTEMPTS):
+            try:
+                items, coupons = await asyncio.gather(
+                    self._call(provider, provider.fetch_items, store, zip_code),
+                    self._call(provider, provider.fetch_coupons, store, zip_code),
+                )
+            except Exception as e:
+                if _is_retryable(e) and attempt < RETRY_ATTEMPTS - 1:
+                    await asyncio.sleep(_backoff(attempt))
+                    continue
+                breaker.record_failure()
+                raise ProviderError(f"{provider.name} failed for {store}: {_describe(e)}") from e
+
+            breaker.record_success()
+            return StoreData(provider.name, store, zip_code, items, coupons)
+
+    async def _fetch_or_fail(self, store: str, zip_code: str) -> StoreResult:
+        try:
+            return await self.fetch_store(store, zip_code)
+        except ProviderError as e:
+            logger.warning("%s", e)
+            return StoreFailure(store, str(e))
+
+    async def iter_stores(self, stores: Iterable[str], zip_code: str) -> AsyncIterator[StoreResult]:
+        """Fetch every store concurrently, yielding results in completion order."""
+        tasks = [asyncio.ensure_future(self._fetch_or_fail(s, zip_code)) for s in stores]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def fetch_all(self, stores: Iterable[str], zip_code: str) -> Tuple[List[StoreData], List[StoreFailure]]:
+        """Every store's data once all providers have answered."""
+        loaded: List[StoreData] = []
+        failed: List[StoreFailure] = []
+        async for result in self.iter_stores(stores, zip_code):
+            (failed if isinstance(result, StoreFailure) else loaded).append(result)
+        return loaded, failed
+
+
+_hub: Optional[ProviderHub] = None
+
+
+def get_provider_hub() -> ProviderHub:
+    """Shared, disk-cached provider hub; the mock provider is registered by default."""
+    global _hub
+    if _hub is None:
+        cache = ProviderCache(ProviderCacheStore(data_path("provider_cache.db")))
+        _hub = ProviderHub([MockProvider()], cache=cache)
+    return _hub
+
+
+def current_provider_hub() -> Optional[ProviderHub]:
+    """The provider hub if it has been created, without creating it."""
+    return _hub
@@ -0,0 +1,118 @@
+"""
+Coupon Sentinel - Store Locations
+
+Store locations and zip code centroids for the locality index.
+Coordinates are approximate sample data for development; drop a full
+centroid table at `<data dir>/zip_centroids.csv` (zip,lat,lon) to cover
+every zip code.
+"""
+
+from typing import Dict, List, Optional, Tuple
+from pathlib import Path
+import csv
+import logging
+import threading
+from ..engines.locality import LocalityIndex, StoreLocation
+from ..storage import DATA_DIR
+
+
+logger = logging.getLogger(__name__)
+
+
+ZIP_CENTROIDS_FILE = "zip_centroids.csv"
+
+# zip -> (lat, lon)
+SAMPLE_ZIP_CENTROIDS: Dict[str, Tuple[float, float]] = {
+    # Long Island / New York City
+    "11566": (40.663, -73.553),
+    "11530": (40.726, -73.634),
+    "11501": (40.747, -73.640),
+    "11590": (40.755, -73.574),
+    "11801": (40.765, -73.525),
+    "10001": (40.750, -73.997),
+    # Capital Region, NY
+    "12345": (42.814, -73.940),
+    "12205": (42.717, -73.828),
+    # San Francisco Bay Area
+    "94105": (37.789, -122.395),
+    "94103": (37.773, -122.411),
+    "94607": (37.806, -122.292),
+    "94577": (37.715, -122.160),
+    # Chicago
+    "60601": (41.886, -87.622),
+    "60614": (41.922, -87.652),
+    # Los Angeles
+    "90012": (34.062, -118.240),
+    "90028": (34.100, -118.326),
+    # Austin
+    "78701": (30.271, -97.742),
+    "78745": (30.207, -97.796),
+}
+
+
+def get_store_locations() -> List[StoreLocation]:
+    """Sample store locations for the supported chains."""
+    return [
+        # Long Island / New York City
+        StoreLocation("target-westbury", "Target", "Target Westbury", "11590", 40.754, -73.598),
+        StoreLocation("target-valley-stream", "Target", "Target Valley Stream", "11581", 40.668, -73.720),
+        StoreLocation("target-manhattan-herald-sq", "Target", "Target Herald Square", "10001", 40.749, -73.988),
+        StoreLocation("walmart-westbury", "Walmart", "Walmart Westbury", "11590", 40.757, -73.590),
+        StoreLocation("walmart-levittown", "Walmart", "Walmart Levittown", "11756", 40.720, -73.511),
+        StoreLocation("costco-westbury", "Costco", "Costco Westbury", "11590", 40.759, -73.579),
+        StoreLocation("costco-oceanside", "Costco", "Costco Oceanside", "11572", 40.637, -73.643),
+        # Capital Region, NY
+        StoreLocation("target-niskayuna", "Target", "Target Niskayuna", "12309", 42.789, -73.867),
+        StoreLocation("walmart-rotterdam", "Walmart", "Walmart Rotterdam", "12306", 42.787, -74.004),
+        StoreLocation("costco-colonie", "Costco", "Costco Colonie", "12205", 42.718, -73.806),
+        # San Francisco Bay Area
+        StoreLocation("target-sf-mission", "Target", "Target SF Mission St", "94103", 37.784, -122.405),
+        StoreLocation("target-oakland", "Target", "Target Oakland", "94608", 37.834, -122.292),
+        StoreLocation("walmart-san-leandro", "Walmart", "Walmart San Leandro", "94577", 37.705, -122.127),
+        StoreLocation("costco-sf", "Costco", "Costco SF 10th St", "94103", 37.771, -122.412),
+        StoreLocation("costco-richmond", "Costco", "Costco Richmond", "94806", 37.969, -122.333),
+        # Chicago
+        StoreLocation("target-chicago-state", "Target", "Target State St", "60603", 41.881, -87.627),
+        StoreLocation("walmart-chicago-broadway", "Walmart", "Walmart Chicago Broadway", "60640", 41.962, -87.658),
+        StoreLocation("costco-chicago-clybourn", "Costco", "Costco Lincoln Park", "60614", 41.917, -87.655),
+        # Los Angeles
+        StoreLocation("target-la-westlake", "Target", "Target Westlake", "90057", 34.058, -118.274),
+        StoreLocation("walmart-la-crenshaw", "Walmart", "Walmart Crenshaw", "90008", 34.011, -118.335),
+        StoreLocation("costco-la", "Costco", "Costco Los Angeles", "90007", 34.028, -118.276),
+        # Austin
+        StoreLocation("target-austin-downtown", "Target", "Target Austin Downtown", "78701", 30.268, -97.743),
+        StoreLocation("walmart-austin-south", "Walmart", "Walmart Austin South", "78745", 30.199, -97.801),
+        StoreLocation("costco-austin", "Costco", "Costco Austin", "78759", 30.393, -97.726),
+    ]
+
+
+def load_zip_centroids(path: Optional[Path] = None) -> Dict[str, Tuple[float, float]]:
+    """Sample centroids, extended by a zip,lat,lon CSV in the data directory if present."""
+    centroids = dict(SAMPLE_ZIP_CENTROIDS)
+    path = path or DATA_DIR / ZIP_CENTROIDS_FILE
+    if not path.exists():
+        return centroids
+
+    try:
+        with open(path, newline="") as f:
+            for row in csv.reader(f):
+                if len(row) < 3 or not row[0].strip().isdigit():
+                    continue  # header or malformed line
+                centroids[row[0].strip().zfill(5)] = (float(row[1]), float(row[2]))
+    except (OSError, ValueError) as e:
+        logger.warning("Could not load zip centroids from %s: %s", path, e)
+    return centroids
+
+
+_locality: Optional[LocalityIndex] = None
+_lock = threading.Lock()
+
+
+def get_locality_index() -> LocalityIndex:
+    """Shared locality index, built on first use."""
+    global _locality
+    if _locality is None:
+        with _lock:
+            if _locality is None:
+                _locality = LocalityIndex(get_store_locations(), load_zip_centroids())
+    return _locality
@@ -0,0 +1,79 @@
+"""
+Coupon Sentinel - Price Zone Layout
+
+Where each store location sits relative to the chain-level catalog: one
+price zone per chain, every store location mapped to its chain's zone,
+and price overrides read from the data directory when present:
+
+    zone_price_overrides.json   {"<zone id>": {"<item id>": {"price": 3.49}}}
+    store_price_overrides.json  {"<store id>": {"<item id>": {"price": 3.49}, "<item id>": null}}
+
+A null entry means the zone's (or store's) shelves do not carry the item.
+The layout is read on every catalog load and handed to CatalogIndex;
+overrides that fail validation are logged and skipped there, so a bad
+entry never reaches a request.
+"""
+
+from typing import Any, Dict, Optional
+from pathlib import Path
+import json
+import logging
+from ..engines.price_zones import StoreOverrides, validate_override, zone_of_chain
+from ..storage import DATA_DIR
+from .locations import get_store_locations
+
+
+logger = logging.getLogger(__name__)
+
+
+ZONE_OVERRIDES_FILE = "zone_price_overrides.json"
+STORE_OVERRIDES_FILE = "store_price_overrides.json"
+
+
+def load_overrides(path: Path) -> Dict[str, StoreOverrides]:
+    """Valid overrides by zone or store id from a JSON file, or none."""
+    if not path.exists():
+        return {}
+
+    try:
+        with open(path) as f:
+            raw = json.load(f)
+        entries = {key: dict(items) for key, items in raw.items()}
+    except (OSError, ValueError, AttributeError, TypeError) as e:
+        logger.warning("Could not load price overrides from %s: %s", path, e)
+        return {}
+
+    overrides: Dict[str, StoreOverrides] = {}
+    for key, items in entries.items():
+        valid: StoreOverrides = {}
+        for item_id, updates in items.items():
+            try:
+                valid[item_id] = validate_override(updates)
+            except ValueError as e:
+                logger.warning("Skipping price override for %s at %s in %s: %s", item_id, key, path.name, e)
+        overrides[key] = valid
+    return overrides
+
+
+def load_store_overrides(path: Optional[Path] = None) -> Dict[str, StoreOverrides]:
+    """Per-store overrides from the data directory, or none."""
+    return load_overrides(path or DATA_DIR / STORE_OVERRIDES_FILE)
+
+
+def load_zone_overrides(path: Optional[Path] = None) -> Dict[str, StoreOverrides]:
+    """Per-zone overrides from the data directory, or none."""
+    return load_overrides(path or DATA_DIR / ZONE_OVERRIDES_FILE)
+
+
+def zone_layout() -> Dict[str, Any]:
+    """CatalogIndex keyword arguments describing every store location."""
+    store_zones = {loc.store_id: zone_of_chain(loc.chain) for loc in get_store_locations()}
+    store_overrides = load_store_overrides()
+    unknown = set(store_overrides) - store_zones.keys()
+    if unknown:
+        logger.warning("Ignoring price overrides for unknown stores: %s", ", ".join(sorted(unknown)))
+    return {
+        "store_zones": store_zones,
+        "zone_overrides": load_zone_overrides(),
+        "store_overrides": {k: v for k, v in store_overrides.items() if k in store_zones},
+    }
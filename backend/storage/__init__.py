@@ -0,0 +1,12 @@
+# Coupon Sentinel - Local Persistence
+import os
+from pathlib import Path
+
+# Directory for local databases; override with COUPON_SENTINEL_DATA_DIR
+DATA_DIR = Path(os.environ.get("COUPON_SENTINEL_DATA_DIR", "data"))
+
+
+def data_path(filename: str) -> Path:
+    """Path of a local data file, creating the data directory if needed."""
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    return DATA_DIR / filename
@@ -0,0 +1,105 @@
+"""
+Coupon Sentinel - Community Price Store
+
+SQLite store of crowd-sourced price reports (engines/community_prices.py):
+1. Reports are written in batches, one transaction per flush
+2. Keyed by (item, time, reporter), so a window query for an item is a
+   primary-key range scan. The reporter is assigned by the server (the
+   client's address, or the request's batch id); the free-text submitter
+   is kept for auditing only
+3. Window reads return each reporter's latest report only, so one
+   reporter re-reporting, or one request naming many submitters, cannot
+   outvote everyone else
+
+Prices are stored as integer cents.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from pathlib import Path
+import sqlite3
+import threading
+from . import data_path
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS price_reports (
+    item_id     TEXT    NOT NULL,
+    reported_at INTEGER NOT NULL,
+    reporter    TEXT    NOT NULL,
+    submitter   TEXT    NOT NULL,
+    price_cents INTEGER NOT NULL,
+    store_id    TEXT,
+    PRIMARY KEY (item_id, reported_at, reporter)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS price_reports_by_time ON price_reports (reported_at);
+"""
+
+# (item_id, reported_at, reporter, submitter, price_cents, store_id)
+Report = Tuple[str, int, str, str, int, Optional[str]]
+
+# Max host parameters per IN (...) list
+_CHUNK = 500
+
+
+class CommunityPriceStore:
+    """Append-mostly table of community price reports."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def insert_reports(self, reports: Sequence[Report]) -> int:
+        """Write a batch of reports in one transaction."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO price_reports VALUES (?, ?, ?, ?, ?, ?)",
+                reports,
+            )
+        return len(reports)
+
+    def window_prices(self, item_ids: Iterable[str], since: int) -> Dict[str, List[Tuple[int, int]]]:
+        """Each reporter's latest (reported_at, price cents) per item since a time."""
+        ids = list(item_ids)
+        prices: Dict[str, List[Tuple[int, int]]] = {}
+        with self._lock:
+            for start in range(0, len(ids), _CHUNK):
+                chunk = ids[start:start + _CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                # SQLite takes bare columns from the row holding the MAX()
+                rows = self._conn.execute(
+                    f"SELECT item_id, price_cents, MAX(reported_at) FROM price_reports "
+                    f"WHERE item_id IN ({placeholders}) AND reported_at >= ? "
+                    f"GROUP BY item_id, reporter",
+                    (*chunk, since),
+                )
+                for item_id, price_cents, reported_at in rows:
+                    prices.setdefault(item_id, []).append((reported_at, price_cents))
+        return prices
+
+    def prune(self, before: int) -> int:
+        """Drop reports older than every aggregation window."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM price_reports WHERE reported_at < ?", (before,))
+        return cursor.rowcount
+
+
+_store: Optional[CommunityPriceStore] = None
+_store_lock = threading.Lock()
+
+
+def get_community_prices() -> CommunityPriceStore:
+    """Shared community price store in the local data directory."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CommunityPriceStore(data_path("community_prices.db"))
+    return _store
@@ -0,0 +1,250 @@
+"""
+Coupon Sentinel - Deal Alert Store
+
+SQLite store of watch rules and the alerts they produce:
+1. Watch rules plus an inverted index from rule term to rule; each row
+   names the rule token it spells (a token may have alternatives) and
+   carries the rule's token count, so "all tokens present" is a GROUP BY
+2. Deal matching as one indexed statement per deal: candidate rules come
+   from the term index, thresholds are checked in the same query
+3. An outbox table of undelivered alerts; a (rule, item, price) key
+   keeps a deal from alerting the same rule twice
+"""
+
+from typing import Dict, List, Optional, Sequence
+from datetime import datetime, timezone
+from pathlib import Path
+import json
+import sqlite3
+import threading
+import uuid
+from ..models import WatchRule
+from . import data_path
+from .price_history import from_epoch, to_epoch
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS watch_rules (
+    rule_id         TEXT    PRIMARY KEY,
+    owner           TEXT,
+    item_filter     TEXT    NOT NULL,
+    brand           TEXT,
+    brand_key       TEXT,
+    store           TEXT,
+    max_unit_price  REAL,
+    min_savings_pct REAL,
+    created_at      INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS rule_terms (
+    term    TEXT    NOT NULL,
+    rule_id TEXT    NOT NULL,
+    slot    INTEGER NOT NULL,
+    n_terms INTEGER NOT NULL,
+    PRIMARY KEY (term, rule_id, slot)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS rule_terms_by_rule ON rule_terms (rule_id);
+
+CREATE TABLE IF NOT EXISTS alert_outbox (
+    alert_id     INTEGER PRIMARY KEY AUTOINCREMENT,
+    rule_id      TEXT    NOT NULL,
+    owner        TEXT,
+    item_id      TEXT    NOT NULL,
+    price_cents  INTEGER NOT NULL,
+    created_at   INTEGER NOT NULL,
+    payload_json TEXT    NOT NULL,
+    delivered_at INTEGER,
+    UNIQUE (rule_id, item_id, price_cents)
+);
+
+CREATE INDEX IF NOT EXISTS alert_outbox_pending ON alert_outbox (alert_id) WHERE delivered_at IS NULL;
+"""
+
+# Candidate rules have some alternative of every one of their tokens among
+# the deal's tokens; thresholds are checked against the rule row in the
+# same statement.
+_MATCH_DEAL = """
+INSERT OR IGNORE INTO alert_outbox
+    (rule_id, owner, item_id, price_cents, created_at, payload_json)
+SELECT r.rule_id, r.owner, ?, ?, ?, ?
+FROM (
+    SELECT rule_id FROM rule_terms
+    WHERE term IN ({placeholders})
+    GROUP BY rule_id
+    HAVING COUNT(DISTINCT slot) = MAX(n_terms)
+) t
+JOIN watch_rules r ON r.rule_id = t.rule_id
+WHERE (r.store IS NULL OR r.store = ?)
+  AND (r.brand_key IS NULL OR instr(?, r.brand_key) > 0)
+  AND (r.max_unit_price IS NULL OR r.max_unit_price >= ?)
+  AND (r.min_savings_pct IS NULL OR r.min_savings_pct <= ?)
+"""
+
+
+class DealAlertStore:
+    """Watch rules, their term index and the alert outbox."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    # ------------------------------------------------------------------------
+    # Rules
+    # ------------------------------------------------------------------------
+
+    def add_rule(
+        self,
+        rule: WatchRule,
+        terms: Sequence[Sequence[str]],
+        brand_key: Optional[str]
+    ) -> str:
+        """
+        Store a rule indexed under its terms and brand; returns its id.
+
+        `terms` holds the accepted spellings of each rule token; a deal
+        must contain at least one spelling of every token.
+        """
+        if not terms:
+            raise ValueError("Watch rule needs at least one searchable term")
+        rule_id = uuid.uuid4().hex
+        now = to_epoch(datetime.now(timezone.utc))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO watch_rules VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    rule_id, rule.owner, rule.item_filter, rule.brand, brand_key,
+                    rule.store.lower() if rule.store else None,
+                    rule.max_unit_price, rule.min_savings_pct, now,
+                ),
+            )
+            self._conn.executemany(
+                "INSERT INTO rule_terms VALUES (?, ?, ?, ?)",
+                (
+                    (term, rule_id, slot, len(terms))
+                    for slot, alternatives in enumerate(terms)
+                    for term in set(alternatives)
+                ),
+            )
+        return rule_id
+
+    def get_rule(self, rule_id: str) -> Optional[Dict[str, object]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT owner, item_filter, brand, store, max_unit_price, min_savings_pct, created_at "
+                "FROM watch_rules WHERE rule_id = ?",
+                (rule_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        owner, item_filter, brand, store, max_unit_price, min_savings_pct, created = row
+        return {
+            "rule_id": rule_id,
+            "owner": owner,
+            "item_filter": item_filter,
+            "brand": brand,
+            "store": store,
+            "max_unit_price": max_unit_price,
+            "min_savings_pct": min_savings_pct,
+            "created_at": from_epoch(created),
+        }
+
+    def delete_rule(self, rule_id: str) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM watch_rules WHERE rule_id = ?", (rule_id,))
+            self._conn.execute("DELETE FROM rule_terms WHERE rule_id = ?", (rule_id,))
+        return cursor.rowcount > 0
+
+    # ------------------------------------------------------------------------
+    # Matching
+    # ------------------------------------------------------------------------
+
+    def match_deals(self, deals: Sequence[Dict[str, object]], created_at: datetime) -> int:
+        """
+        Queue alerts for every rule each deal satisfies. Returns alerts queued.
+
+        Each deal is a payload dict with at least: item_id, tokens,
+        brand_key, store, final_price, unit_price and savings_pct.
+        """
+        ts = to_epoch(created_at)
+        queued = 0
+        with self._lock, self._conn:
+            for deal in deals:
+                tokens = sorted(set(deal["tokens"]))
+                if not tokens:
+                    continue
+                payload = {k: v for k, v in deal.items() if k not in ("tokens", "brand_key")}
+                cursor = self._conn.execute(
+                    _MATCH_DEAL.format(placeholders=", ".join("?" * len(tokens))),
+                    (
+                        deal["item_id"], round(deal["final_price"] * 100), ts, json.dumps(payload),
+                        *tokens,
+                        deal["store"].lower(),
+                        deal["brand_key"],
+                        deal["unit_price"],
+                        deal["savings_pct"],
+                    ),
+                )
+                queued += cursor.rowcount
+        return queued
+
+    # ------------------------------------------------------------------------
+    # Outbox
+    # ------------------------------------------------------------------------
+
+    def pending(self, limit: int = 100, owner: Optional[str] = None) -> List[Dict[str, object]]:
+        """Undelivered alerts, oldest first."""
+        query = (
+            "SELECT alert_id, rule_id, owner, created_at, payload_json FROM alert_outbox "
+            "WHERE delivered_at IS NULL"
+        )
+        params: List[object] = []
+        if owner is not None:
+            query += " AND owner = ?"
+            params.append(owner)
+        query += " ORDER BY alert_id LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [
+            {
+                "alert_id": alert_id,
+                "rule_id": rule_id,
+                "owner": alert_owner,
+                "created_at": from_epoch(created),
+                "deal": json.loads(payload),
+            }
+            for alert_id, rule_id, alert_owner, created, payload in rows
+        ]
+
+    def mark_delivered(self, alert_ids: Sequence[int]) -> int:
+        """Acknowledge delivered alerts so they leave the outbox."""
+        now = to_epoch(datetime.now(timezone.utc))
+        with self._lock, self._conn:
+            cursor = self._conn.executemany(
+                "UPDATE alert_outbox SET delivered_at = ? WHERE alert_id = ? AND delivered_at IS NULL",
+                ((now, alert_id) for alert_id in alert_ids),
+            )
+        return cursor.rowcount
+
+
+_store: Optional[DealAlertStore] = None
+_store_lock = threading.Lock()
+
+
+def get_deal_alerts() -> DealAlertStore:
+    """Shared deal alert store in the local data directory."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = DealAlertStore(data_path("deal_alerts.db"))
+    return _store
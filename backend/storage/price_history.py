@@ -0,0 +1,489 @@
+"""
+Coupon Sentinel - Price History Store
+
+Append-only SQLite store of StoreItem price observations:
+1. Run-length compaction: consecutive identical prices extend one run
+   (first_seen .. last_seen) instead of adding a row per catalog load.
+   Runs are extended in SQL, so every process sharing the file compacts
+   against the same newest run
+2. Each catalog version is recorded once, however many processes load it
+3. Backdated observations (receipts) are placed among an item's runs
+   instead of being dropped as out of order
+4. Daily and weekly rollups (min / max / mean / close) maintained on write
+5. Range queries served from primary-key ranges, never table scans
+6. A predictions table written by the batch job in engines/price_prediction.py
+
+Prices are stored as integer cents.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from datetime import datetime, timezone
+from pathlib import Path
+import sqlite3
+import threading
+from ..models import StoreItem
+from ..money import to_cents, to_dollars
+from . import data_path
+
+
+DAY = 86_400
+WEEK = 7 * DAY
+
+# Rollup period name -> bucket width in seconds
+ROLLUP_PERIODS: Dict[str, int] = {"day": DAY, "week": WEEK}
+
+RESOLUTIONS = ("raw", *ROLLUP_PERIODS)
+
+# Epoch day 0 was a Thursday; shift so weekly buckets start on Monday
+_BUCKET_OFFSETS: Dict[str, int] = {"day": 0, "week": 4 * DAY}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS price_runs (
+    item_id       TEXT    NOT NULL,
+    first_seen    INTEGER NOT NULL,
+    last_seen     INTEGER NOT NULL,
+    price_cents   INTEGER NOT NULL,
+    loyalty_cents INTEGER,
+    regular_cents INTEGER,
+    observations  INTEGER NOT NULL,
+    PRIMARY KEY (item_id, first_seen)
+) WITHOUT ROWID;
+
+-- An item's newest run is the one seen last (backdated runs may start later)
+CREATE INDEX IF NOT EXISTS price_runs_by_last_seen ON price_runs (item_id, last_seen);
+
+CREATE TABLE IF NOT EXISTS price_rollups (
+    item_id     TEXT    NOT NULL,
+    period      TEXT    NOT NULL,
+    bucket      INTEGER NOT NULL,
+    min_cents   INTEGER NOT NULL,
+    max_cents   INTEGER NOT NULL,
+    sum_cents   INTEGER NOT NULL,
+    n           INTEGER NOT NULL,
+    close_cents INTEGER NOT NULL,
+    PRIMARY KEY (item_id, period, bucket)
+) WITHOUT ROWID;
+
+-- The catalog version recorded last; a load of the same version is skipped
+CREATE TABLE IF NOT EXISTS recorded_version (
+    id              INTEGER PRIMARY KEY CHECK (id = 1),
+    catalog_version TEXT    NOT NULL,
+    recorded_at     INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS price_predictions (
+    item_id        TEXT    PRIMARY KEY,
+    days_until     INTEGER NOT NULL,
+    current_cents  INTEGER NOT NULL,
+    expected_cents INTEGER NOT NULL,
+    confidence     REAL    NOT NULL,
+    computed_at    INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+# One write's observations, at most one per item (per connection)
+_OBSERVED_SCHEMA = """
+CREATE TEMP TABLE IF NOT EXISTS observed (
+    item_id       TEXT    PRIMARY KEY,
+    price_cents   INTEGER NOT NULL,
+    loyalty_cents INTEGER,
+    regular_cents INTEGER
+) WITHOUT ROWID
+"""
+
+# record() appends: drop items observed after this write (see record_at)
+_DROP_OUT_OF_ORDER = """
+DELETE FROM observed
+WHERE (SELECT MAX(last_seen) FROM price_runs r WHERE r.item_id = observed.item_id) > ?
+"""
+
+# Observations whose newest run has the same prices
+_SAME_AS_NEWEST_RUN = """
+SELECT r.item_id, r.first_seen
+FROM observed o JOIN price_runs r ON r.item_id = o.item_id
+WHERE r.first_seen = (
+    SELECT first_seen FROM price_runs WHERE item_id = o.item_id
+    ORDER BY last_seen DESC, first_seen DESC LIMIT 1
+)
+  AND r.price_cents = o.price_cents
+  AND r.loyalty_cents IS o.loyalty_cents
+  AND r.regular_cents IS o.regular_cents
+"""
+
+_EXTEND_RUNS = f"""
+UPDATE price_runs SET last_seen = ?, observations = observations + 1
+WHERE (item_id, first_seen) IN ({_SAME_AS_NEWEST_RUN})
+"""
+
+_START_RUNS = f"""
+INSERT OR IGNORE INTO price_runs
+SELECT item_id, ?, ?, price_cents, loyalty_cents, regular_cents, 1
+FROM observed
+WHERE item_id NOT IN (SELECT item_id FROM ({_SAME_AS_NEWEST_RUN}))
+"""
+
+_UPSERT_ROLLUPS = """
+INSERT INTO price_rollups
+    (item_id, period, bucket, min_cents, max_cents, sum_cents, n, close_cents)
+SELECT item_id, ?, ?, price_cents, price_cents, price_cents, 1, price_cents
+FROM observed WHERE true
+ON CONFLICT (item_id, period, bucket) DO UPDATE SET
+    min_cents = MIN(min_cents, excluded.min_cents),
+    max_cents = MAX(max_cents, excluded.max_cents),
+    sum_cents = sum_cents + excluded.sum_cents,
+    n = n + 1,
+    close_cents = excluded.close_cents
+"""
+
+# One backdated observation's rollup; the close only moves for the latest one
+_UPSERT_ROLLUP_AT = """
+INSERT INTO price_rollups
+    (item_id, period, bucket, min_cents, max_cents, sum_cents, n, close_cents)
+VALUES (?, ?, ?, ?, ?, ?, 1, ?)
+ON CONFLICT (item_id, period, bucket) DO UPDATE SET
+    min_cents = MIN(min_cents, excluded.min_cents),
+    max_cents = MAX(max_cents, excluded.max_cents),
+    sum_cents = sum_cents + excluded.sum_cents,
+    n = n + 1,
+    close_cents = CASE WHEN ? THEN excluded.close_cents ELSE close_cents END
+"""
+
+_RUN_PRICES = "price_cents = ? AND loyalty_cents IS ? AND regular_cents IS ?"
+
+# (price, loyalty, regular) in cents
+PriceKey = Tuple[int, Optional[int], Optional[int]]
+
+
+def optional_cents(amount: Optional[float]) -> Optional[int]:
+    """Dollars to integer cents (money.to_cents), keeping None."""
+    return None if amount is None else to_cents(amount)
+
+
+def optional_dollars(cents: Optional[int]) -> Optional[float]:
+    """Integer cents to dollars (money.to_dollars), keeping None."""
+    return None if cents is None else to_dollars(cents)
+
+
+def unique_batches(observations: Iterable[Tuple[str, PriceKey]]) -> List[Dict[str, PriceKey]]:
+    """Split observations into batches holding each item at most once, in order."""
+    batches: List[Dict[str, PriceKey]] = []
+    for item_id, key in observations:
+        for batch in batches:
+            if item_id not in batch:
+                batch[item_id] = key
+                break
+        else:
+            batches.append({item_id: key})
+    return batches
+
+
+def to_epoch(moment: datetime) -> int:
+    """Aware or naive-UTC datetime to epoch seconds."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+def bucket_start(ts: int, period: str) -> int:
+    """Start of the rollup bucket containing an epoch timestamp."""
+    return ts - (ts - _BUCKET_OFFSETS[period]) % ROLLUP_PERIODS[period]
+
+
+def from_epoch(seconds: int) -> str:
+    """Epoch seconds to an ISO-8601 UTC timestamp."""
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).isoformat()
+
+
+class PriceHistory:
+    """Run-length compacted price observations with rollups."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.execute(_OBSERVED_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    # ------------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------------
+
+    def record(
+        self,
+        observations: Iterable[Tuple[str, PriceKey]],
+        observed_at: datetime,
+        catalog_version: Optional[str] = None
+    ) -> int:
+        """
+        Record (item_id, (price, loyalty, regular) cents) observations.
+
+        With a catalog version, nothing is recorded if that version was the
+        last one recorded (another process already loaded it). Returns the
+        number of new runs started (i.e. price changes).
+        """
+        ts = to_epoch(observed_at)
+        started = 0
+
+        with self._lock, self._conn:
+            # Take the write lock up front so concurrent loads serialize
+            self._conn.execute("BEGIN IMMEDIATE")
+            if catalog_version is not None:
+                row = self._conn.execute("SELECT catalog_version FROM recorded_version").fetchone()
+                if row is not None and row[0] == catalog_version:
+                    return 0
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO recorded_version VALUES (1, ?, ?)", (catalog_version, ts)
+                )
+
+            for batch in unique_batches(observations):
+                self._conn.execute("DELETE FROM observed")
+                self._conn.executemany(
+                    "INSERT INTO observed VALUES (?, ?, ?, ?)",
+                    ((item_id, *key) for item_id, key in batch.items()),
+                )
+                self._conn.execute(_DROP_OUT_OF_ORDER, (ts,))
+                self._conn.execute(_EXTEND_RUNS, (ts,))
+                started += self._conn.execute(_START_RUNS, (ts, ts)).rowcount
+                for period in ROLLUP_PERIODS:
+                    self._conn.execute(_UPSERT_ROLLUPS, (period, bucket_start(ts, period)))
+            self._conn.execute("DELETE FROM observed")
+
+        return started
+
+    def record_at(self, observations: Iterable[Tuple[str, PriceKey]], observed_at: datetime) -> Tuple[int, int]:
+        """
+        Record observations made at a possibly past moment (a receipt's
+        purchase), which record() would drop once the item has been seen since.
+
+        Each observation lands in the item's runs where it happened: it
+        counts towards a run with the same prices covering that moment,
+        extends the neighbouring run across a gap when their prices match,
+        and otherwise becomes a run of its own. Returns (observations
+        recorded, new runs started).
+        """
+        ts = to_epoch(observed_at)
+        recorded = started = 0
+
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            for item_id, key in observations:
+                (last_seen,) = self._conn.execute(
+                    "SELECT MAX(last_seen) FROM price_runs WHERE item_id = ?", (item_id,)
+                ).fetchone()
+                placed = self._place_observation(item_id, key, ts)
+                if placed is None:
+                    continue
+                recorded += 1
+                started += placed
+                is_latest = last_seen is None or ts >= last_seen
+                for period in ROLLUP_PERIODS:
+                    self._conn.execute(
+                        _UPSERT_ROLLUP_AT,
+                        (item_id, period, bucket_start(ts, period), key[0], key[0], key[0], key[0], is_latest),
+                    )
+
+        return recorded, started
+
+    def _place_observation(self, item_id: str, key: PriceKey, ts: int) -> Optional[int]:
+        """Add one observation to an item's runs; 1 if it started a run, None if it conflicts."""
+        covering = self._conn.execute(
+            f"UPDATE price_runs SET observations = observations + 1 "
+            f"WHERE item_id = ? AND first_seen <= ? AND last_seen >= ? AND {_RUN_PRICES}",
+            (item_id, ts, ts, *key),
+        )
+        if covering.rowcount:
+            return 0
+
+        inside = self._conn.execute(
+            "SELECT 1 FROM price_runs WHERE item_id = ? AND first_seen <= ? AND last_seen >= ? LIMIT 1",
+            (item_id, ts, ts),
+        ).fetchone()
+        if inside is None:
+            # In a gap (or after every run): grow a neighbour with the same prices
+            extended = self._conn.execute(
+                f"""
+                UPDATE price_runs SET last_seen = ?, observations = observations + 1
+                WHERE item_id = ? AND first_seen = (
+                    SELECT first_seen FROM price_runs WHERE item_id = ? AND last_seen < ?
+                    ORDER BY last_seen DESC LIMIT 1
+                ) AND {_RUN_PRICES}
+                """,
+                (ts, item_id, item_id, ts, *key),
+            )
+            if extended.rowcount:
+                return 0
+            extended = self._conn.execute(
+                f"""
+                UPDATE price_runs SET first_seen = ?, observations = observations + 1
+                WHERE item_id = ? AND first_seen = (
+                    SELECT MIN(first_seen) FROM price_runs WHERE item_id = ? AND first_seen > ?
+                ) AND {_RUN_PRICES}
+                """,
+                (ts, item_id, item_id, ts, *key),
+            )
+            if extended.rowcount:
+                return 0
+
+        # A different price than the run in effect (e.g. a clearance markdown)
+        inserted = self._conn.execute(
+            "INSERT OR IGNORE INTO price_runs VALUES (?, ?, ?, ?, ?, ?, 1)", (item_id, ts, ts, *key)
+        )
+        return 1 if inserted.rowcount else None
+
+    def record_items(
+        self,
+        store_items: List[StoreItem],
+        observed_at: datetime,
+        catalog_version: Optional[str] = None
+    ) -> int:
+        """Record one observation per item from a catalog load."""
+        return self.record(
+            (
+                (i.item_id, (to_cents(i.price), optional_cents(i.loyalty_price), optional_cents(i.regular_price)))
+                for i in store_items
+            ),
+            observed_at,
+            catalog_version,
+        )
+
+    # ------------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------------
+
+    def has_item(self, item_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM price_runs WHERE item_id = ? LIMIT 1", (item_id,)
+            ).fetchone() is not None
+
+    def runs(self, item_id: str, start: int, end: int) -> List[Dict[str, object]]:
+        """Price runs overlapping [start, end] (epoch seconds), oldest first."""
+        with self._lock:
+            # Runs in effect at `start` (backdated runs overlap), then runs starting inside the range
+            rows = self._conn.execute(
+                """
+                SELECT first_seen, last_seen, price_cents, loyalty_cents, regular_cents, observations
+                FROM price_runs
+                WHERE item_id = ? AND last_seen >= ? AND first_seen < ?
+                UNION ALL
+                SELECT first_seen, last_seen, price_cents, loyalty_cents, regular_cents, observations
+                FROM price_runs
+                WHERE item_id = ? AND first_seen BETWEEN ? AND ?
+                ORDER BY first_seen
+                """,
+                (item_id, start, start, item_id, start, end),
+            ).fetchall()
+
+        return [
+            {
+                "from": from_epoch(first),
+                "to": from_epoch(last),
+                "price": to_dollars(price),
+                "loyalty_price": optional_dollars(loyalty),
+                "regular_price": optional_dollars(regular),
+                "observations": n,
+            }
+            for first, last, price, loyalty, regular, n in rows
+        ]
+
+    def rollups(self, item_id: str, period: str, start: int, end: int) -> List[Dict[str, object]]:
+        """Downsampled price buckets covering [start, end], oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT bucket, min_cents, max_cents, sum_cents, n, close_cents
+                FROM price_rollups
+                WHERE item_id = ? AND period = ? AND bucket BETWEEN ? AND ?
+                ORDER BY bucket
+                """,
+                (item_id, period, bucket_start(start, period), end),
+            ).fetchall()
+
+        return [
+            {
+                "from": from_epoch(bucket),
+                "min": to_dollars(lo),
+                "max": to_dollars(hi),
+                "mean": round(to_dollars(total) / n, 2),
+                "close": to_dollars(close),
+                "observations": n,
+            }
+            for bucket, lo, hi, total, n, close in rows
+        ]
+
+    def iter_daily_closes(self, since: int = 0) -> Iterator[Tuple[str, int, int]]:
+        """
+        Every (item_id, day bucket, close cents) since a timestamp, ordered
+        by item then day. Uses its own connection so writers aren't blocked.
+        """
+        conn = sqlite3.connect(str(self.path))
+        try:
+            cursor = conn.execute(
+                """
+                SELECT item_id, bucket, close_cents FROM price_rollups
+                WHERE period = 'day' AND bucket >= ?
+                ORDER BY item_id, bucket
+                """,
+                (since,),
+            )
+            while True:
+                rows = cursor.fetchmany(10_000)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
+
+    def replace_predictions(self, predictions: Iterable[Tuple], computed_at: int) -> None:
+        """Atomically swap in a new predictions table."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM price_predictions")
+            self._conn.executemany(
+                "INSERT INTO price_predictions VALUES (?, ?, ?, ?, ?, ?)",
+                (tuple(p) + (computed_at,) for p in predictions),
+            )
+
+    def load_predictions(self) -> List[Tuple[str, int, int, int, float]]:
+        """All stored predictions as (item_id, days_until, current, expected, confidence)."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT item_id, days_until, current_cents, expected_cents, confidence "
+                "FROM price_predictions"
+            ).fetchall()
+
+    def history(
+        self,
+        item_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        resolution: str = "raw"
+    ) -> List[Dict[str, object]]:
+        """Price history for an item at the requested resolution."""
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unsupported resolution: {resolution}")
+        start_ts = to_epoch(start) if start else 0
+        end_ts = to_epoch(end) if end else 2**62
+        if start_ts > end_ts:
+            raise ValueError("start must not be after end")
+        if resolution == "raw":
+            return self.runs(item_id, start_ts, end_ts)
+        return self.rollups(item_id, resolution, start_ts, end_ts)
+
+
+_history: Optional[PriceHistory] = None
+_history_lock = threading.Lock()
+
+
+def get_price_history() -> PriceHistory:
+    """Shared price history store in the local data directory."""
+    global _history
+    if _history is None:
+        with _history_lock:
+            if _history is None:
+                _history = PriceHistory(data_path("price_history.db"))
+    return _history
@@ -0,0 +1,60 @@
+"""
+Coupon Sentinel - Provider Cache Store
+
+Disk persistence for the provider cache (providers/cache.py): the last
+payload fetched per (provider, store, zip), so a restart starts warm.
+Entries are read on first use of a key, not loaded up front.
+"""
+
+from typing import Optional, Tuple
+from pathlib import Path
+import json
+import sqlite3
+import threading
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS provider_cache (
+    provider     TEXT NOT NULL,
+    store        TEXT NOT NULL,
+    zip_code     TEXT NOT NULL,
+    fetched_at   REAL NOT NULL,
+    payload_json TEXT NOT NULL,
+    PRIMARY KEY (provider, store, zip_code)
+) WITHOUT ROWID;
+"""
+
+# (provider, store, zip)
+CacheKey = Tuple[str, str, str]
+
+
+class ProviderCacheStore:
+    """Last fetched payload per cache key, as JSON."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def load(self, key: CacheKey) -> Optional[Tuple[float, dict]]:
+        """(fetched_at, payload) for a key, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at, payload_json FROM provider_cache "
+                "WHERE provider = ? AND store = ? AND zip_code = ?",
+                key,
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def save(self, key: CacheKey, fetched_at: float, payload: dict) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO provider_cache VALUES (?, ?, ?, ?, ?)",
+                (*key, fetched_at, json.dumps(payload)),
+            )
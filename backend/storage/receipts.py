@@ -0,0 +1,258 @@
+"""
+Coupon Sentinel - Receipt Store
+
+SQLite store behind receipt ingestion (engines/receipts.py):
+1. A job queue table: uploads are queued with their raw payload, claimed
+   by the worker in submission order and finished with a parsed receipt
+   or an error. Jobs left mid-flight by a restart are re-queued
+2. Rebate claims found on parsed receipts, one per (job, line, rebate),
+   with a status a user moves along as they submit and get paid
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+from datetime import datetime, timezone
+from pathlib import Path
+import json
+import sqlite3
+import threading
+import uuid
+from ..money import to_dollars
+from . import data_path
+from .price_history import from_epoch, to_epoch
+
+
+JOB_STATUSES = ("queued", "processing", "done", "failed")
+TERMINAL_STATUSES = ("done", "failed")
+
+CLAIM_STATUSES = ("eligible", "submitted", "paid", "rejected")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS receipt_jobs (
+    job_id       TEXT    PRIMARY KEY,
+    owner        TEXT,
+    store_hint   TEXT,
+    content_type TEXT    NOT NULL,
+    payload      BLOB,
+    status       TEXT    NOT NULL,
+    submitted_at INTEGER NOT NULL,
+    updated_at   INTEGER NOT NULL,
+    error        TEXT,
+    receipt_json TEXT
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS receipt_jobs_queued ON receipt_jobs (submitted_at) WHERE status = 'queued';
+
+CREATE TABLE IF NOT EXISTS rebate_claims (
+    claim_id     INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id       TEXT    NOT NULL,
+    line_no      INTEGER NOT NULL,
+    owner        TEXT,
+    app          TEXT    NOT NULL,
+    coupon_id    TEXT    NOT NULL,
+    item_id      TEXT    NOT NULL,
+    amount_cents INTEGER NOT NULL,
+    status       TEXT    NOT NULL,
+    created_at   INTEGER NOT NULL,
+    updated_at   INTEGER NOT NULL,
+    UNIQUE (job_id, line_no, coupon_id)
+);
+
+CREATE INDEX IF NOT EXISTS rebate_claims_by_owner ON rebate_claims (owner, status);
+"""
+
+# (job_id, content_type, payload, store_hint, owner)
+ClaimedJob = Tuple[str, str, bytes, Optional[str], Optional[str]]
+
+
+def _now() -> int:
+    return to_epoch(datetime.now(timezone.utc))
+
+
+class ReceiptStore:
+    """Receipt jobs and the rebate claims found on them."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    # ------------------------------------------------------------------------
+    # Jobs
+    # ------------------------------------------------------------------------
+
+    def enqueue(
+        self,
+        content_type: str,
+        payload: bytes,
+        owner: Optional[str] = None,
+        store_hint: Optional[str] = None
+    ) -> str:
+        """Queue a receipt upload. Returns its job id."""
+        job_id = uuid.uuid4().hex
+        now = _now()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO receipt_jobs "
+                "(job_id, owner, store_hint, content_type, payload, status, submitted_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, 'queued', ?, ?)",
+                (job_id, owner, store_hint, content_type, payload, now, now),
+            )
+        return job_id
+
+    def claim(self, limit: int) -> List[ClaimedJob]:
+        """Move up to `limit` of the oldest queued jobs to processing and return them."""
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT job_id, content_type, payload, store_hint, owner FROM receipt_jobs "
+                "WHERE status = 'queued' ORDER BY submitted_at LIMIT ?",
+                (limit,),
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE receipt_jobs SET status = 'processing', updated_at = ? WHERE job_id = ?",
+                ((_now(), row[0]) for row in rows),
+            )
+        return [
+            (job_id, content_type, bytes(payload), hint, owner)
+            for job_id, content_type, payload, hint, owner in rows
+        ]
+
+    def requeue_processing(self) -> int:
+        """Re-queue jobs a previous worker claimed but never finished."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE receipt_jobs SET status = 'queued', updated_at = ? WHERE status = 'processing'",
+                (_now(),),
+            )
+        return cursor.rowcount
+
+    def complete(self, job_id: str, receipt: Dict[str, object]) -> None:
+        """Store a parsed receipt; the raw upload is no longer needed."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE receipt_jobs SET status = 'done', updated_at = ?, payload = NULL, "
+                "receipt_json = ? WHERE job_id = ?",
+                (_now(), json.dumps(receipt), job_id),
+            )
+
+    def fail(self, job_id: str, error: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE receipt_jobs SET status = 'failed', updated_at = ?, error = ? WHERE job_id = ?",
+                (_now(), error, job_id),
+            )
+
+    def job(self, job_id: str) -> Optional[Dict[str, object]]:
+        """A job's status, and its parsed receipt once done."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT owner, store_hint, status, submitted_at, updated_at, error, receipt_json "
+                "FROM receipt_jobs WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        owner, hint, status, submitted, updated, error, receipt = row
+        return {
+            "job_id": job_id,
+            "owner": owner,
+            "store_hint": hint,
+            "status": status,
+            "submitted_at": from_epoch(submitted),
+            "updated_at": from_epoch(updated),
+            "error": error,
+            "receipt": json.loads(receipt) if receipt else None,
+        }
+
+    def queued_count(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM receipt_jobs WHERE status = 'queued'"
+            ).fetchone()[0]
+
+    # ------------------------------------------------------------------------
+    # Rebate claims
+    # ------------------------------------------------------------------------
+
+    def add_claims(self, job_id: str, owner: Optional[str], claims: Sequence[Tuple[int, str, str, str, int]]) -> int:
+        """Record (line_no, app, coupon_id, item_id, amount_cents) claims found on a receipt."""
+        now = _now()
+        with self._lock, self._conn:
+            cursor = self._conn.executemany(
+                "INSERT OR IGNORE INTO rebate_claims "
+                "(job_id, line_no, owner, app, coupon_id, item_id, amount_cents, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, 'eligible', ?, ?)",
+                ((job_id, line_no, owner, app, coupon_id, item_id, cents, now, now)
+                 for line_no, app, coupon_id, item_id, cents in claims),
+            )
+        return cursor.rowcount
+
+    def claims(
+        self,
+        owner: Optional[str] = None,
+        status: Optional[str] = None,
+        limit: int = 100
+    ) -> List[Dict[str, object]]:
+        """Rebate claims, newest first."""
+        query = (
+            "SELECT claim_id, job_id, line_no, owner, app, coupon_id, item_id, amount_cents, "
+            "status, created_at, updated_at FROM rebate_claims WHERE 1 = 1"
+        )
+        params: List[object] = []
+        if owner is not None:
+            query += " AND owner = ?"
+            params.append(owner)
+        if status is not None:
+            query += " AND status = ?"
+            params.append(status)
+        query += " ORDER BY claim_id DESC LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [
+            {
+                "claim_id": claim_id,
+                "job_id": job_id,
+                "line_no": line_no,
+                "owner": claim_owner,
+                "app": app,
+                "coupon_id": coupon_id,
+                "item_id": item_id,
+                "amount": to_dollars(cents),
+                "status": claim_status,
+                "created_at": from_epoch(created),
+                "updated_at": from_epoch(updated),
+            }
+            for (claim_id, job_id, line_no, claim_owner, app, coupon_id, item_id,
+                 cents, claim_status, created, updated) in rows
+        ]
+
+    def set_claim_status(self, claim_id: int, status: str) -> bool:
+        if status not in CLAIM_STATUSES:
+            raise ValueError(f"Unknown claim status: {status}")
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE rebate_claims SET status = ?, updated_at = ? WHERE claim_id = ?",
+                (status, _now(), claim_id),
+            )
+        return cursor.rowcount > 0
+
+
+_store: Optional[ReceiptStore] = None
+_store_lock = threading.Lock()
+
+
+def get_receipt_store() -> ReceiptStore:
+    """Shared receipt store in the local data directory."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ReceiptStore(data_path("receipts.db"))
+    return _store
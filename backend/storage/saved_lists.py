@@ -0,0 +1,245 @@
+"""
+Coupon Sentinel - Saved Lists Store
+
+SQLite store of saved shopping lists:
+1. The saved OptimizeRequest and its latest OptimizeResponse
+2. A change log of result diffs, one row per version, so clients poll
+   with `since=<version>` instead of re-fetching whole results
+3. A reverse index from dependency keys (item ids, list terms) to the
+   lists that depend on them, so a catalog delta finds affected lists
+   with index lookups instead of re-running every list
+"""
+
+from typing import Dict, Iterable, List, Optional, Set
+from datetime import datetime, timezone
+from pathlib import Path
+import json
+import sqlite3
+import threading
+import uuid
+from ..models import OptimizeRequest, OptimizeResponse
+from . import data_path
+from .price_history import from_epoch, to_epoch
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS saved_lists (
+    list_id         TEXT    PRIMARY KEY,
+    name            TEXT    NOT NULL,
+    request_json    TEXT    NOT NULL,
+    created_at      INTEGER NOT NULL,
+    updated_at      INTEGER NOT NULL,
+    version         INTEGER NOT NULL DEFAULT 0,
+    result_json     TEXT,
+    computed_at     INTEGER,
+    catalog_version TEXT
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS list_changes (
+    list_id     TEXT    NOT NULL,
+    version     INTEGER NOT NULL,
+    computed_at INTEGER NOT NULL,
+    diff_json   TEXT    NOT NULL,
+    PRIMARY KEY (list_id, version)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS list_dependencies (
+    dep_key TEXT NOT NULL,
+    list_id TEXT NOT NULL,
+    PRIMARY KEY (dep_key, list_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS list_dependencies_by_list ON list_dependencies (list_id);
+"""
+
+# Keep IN (...) lists under SQLite's default variable limit
+_LOOKUP_CHUNK = 500
+
+
+class SavedListStore:
+    """Saved lists, their results, change log and dependency index."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    # ------------------------------------------------------------------------
+    # Lists
+    # ------------------------------------------------------------------------
+
+    def create(self, name: str, request: OptimizeRequest) -> str:
+        """Save a new list and return its id."""
+        list_id = uuid.uuid4().hex
+        now = to_epoch(datetime.now(timezone.utc))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO saved_lists (list_id, name, request_json, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (list_id, name, request.model_dump_json(), now, now),
+            )
+        return list_id
+
+    def update(self, list_id: str, name: str, request: OptimizeRequest) -> bool:
+        """Replace a list's name and request. Returns False for unknown lists."""
+        now = to_epoch(datetime.now(timezone.utc))
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE saved_lists SET name = ?, request_json = ?, updated_at = ? WHERE list_id = ?",
+                (name, request.model_dump_json(), now, list_id),
+            )
+        return cursor.rowcount > 0
+
+    def delete(self, list_id: str) -> bool:
+        """Delete a list with its change log and dependencies."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM saved_lists WHERE list_id = ?", (list_id,))
+            self._conn.execute("DELETE FROM list_changes WHERE list_id = ?", (list_id,))
+            self._conn.execute("DELETE FROM list_dependencies WHERE list_id = ?", (list_id,))
+        return cursor.rowcount > 0
+
+    def get_request(self, list_id: str) -> Optional[OptimizeRequest]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT request_json FROM saved_lists WHERE list_id = ?", (list_id,)
+            ).fetchone()
+        return OptimizeRequest.model_validate_json(row[0]) if row else None
+
+    def get_result(self, list_id: str) -> Optional[OptimizeResponse]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result_json FROM saved_lists WHERE list_id = ?", (list_id,)
+            ).fetchone()
+        return OptimizeResponse.model_validate_json(row[0]) if row and row[0] else None
+
+    def version(self, list_id: str) -> Optional[int]:
+        """A list's current result version, or None for unknown lists."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version FROM saved_lists WHERE list_id = ?", (list_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get(self, list_id: str) -> Optional[Dict[str, object]]:
+        """A saved list with its request and latest result, as a response body."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT name, request_json, created_at, updated_at, version, result_json, "
+                "computed_at, catalog_version FROM saved_lists WHERE list_id = ?",
+                (list_id,),
+            ).fetchone()
+        if row is None:
+            return None
+
+        name, request_json, created, updated, version, result_json, computed, catalog_version = row
+        return {
+            "list_id": list_id,
+            "name": name,
+            "version": version,
+            "created_at": from_epoch(created),
+            "updated_at": from_epoch(updated),
+            "computed_at": from_epoch(computed) if computed else None,
+            "catalog_version": catalog_version,
+            "request": json.loads(request_json),
+            "result": json.loads(result_json) if result_json else None,
+        }
+
+    # ------------------------------------------------------------------------
+    # Results and change log
+    # ------------------------------------------------------------------------
+
+    def save_result(
+        self,
+        list_id: str,
+        result: OptimizeResponse,
+        dependencies: Iterable[str],
+        catalog_version: str,
+        diff: Optional[Dict[str, object]],
+        computed_at: datetime
+    ) -> Optional[int]:
+        """
+        Store a list's latest result and dependency keys.
+
+        A non-empty `diff` bumps the list's version and is appended to its
+        change log. Returns the list's version, or None if it was deleted.
+        """
+        ts = to_epoch(computed_at)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT version FROM saved_lists WHERE list_id = ?", (list_id,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            version = row[0]
+            if diff:
+                version += 1
+                self._conn.execute(
+                    "INSERT INTO list_changes VALUES (?, ?, ?, ?)",
+                    (list_id, version, ts, json.dumps({"version": version, **diff})),
+                )
+            self._conn.execute(
+                "UPDATE saved_lists SET version = ?, result_json = ?, computed_at = ?, "
+                "catalog_version = ? WHERE list_id = ?",
+                (version, result.model_dump_json(), ts, catalog_version, list_id),
+            )
+
+            self._conn.execute("DELETE FROM list_dependencies WHERE list_id = ?", (list_id,))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO list_dependencies VALUES (?, ?)",
+                ((key, list_id) for key in set(dependencies)),
+            )
+        return version
+
+    def changes(self, list_id: str, since: int = 0) -> List[Dict[str, object]]:
+        """Result diffs recorded after version `since`, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT computed_at, diff_json FROM list_changes "
+                "WHERE list_id = ? AND version > ? ORDER BY version",
+                (list_id, since),
+            ).fetchall()
+        return [{"computed_at": from_epoch(ts), **json.loads(diff)} for ts, diff in rows]
+
+    # ------------------------------------------------------------------------
+    # Reverse index
+    # ------------------------------------------------------------------------
+
+    def lists_depending_on(self, keys: Iterable[str]) -> Set[str]:
+        """Ids of lists with any of the given dependency keys."""
+        keys = list(keys)
+        found: Set[str] = set()
+        with self._lock:
+            for i in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[i:i + _LOOKUP_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT DISTINCT list_id FROM list_dependencies "
+                    f"WHERE dep_key IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                )
+                found.update(r[0] for r in rows)
+        return found
+
+    def list_ids(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._conn.execute("SELECT list_id FROM saved_lists")]
+
+
+_store: Optional[SavedListStore] = None
+_store_lock = threading.Lock()
+
+
+def get_saved_lists() -> SavedListStore:
+    """Shared saved list store in the local data directory."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SavedListStore(data_path("saved_lists.db"))
+    return _store
@@ -0,0 +1 @@
+# Coupon Sentinel - Tests
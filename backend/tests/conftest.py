@@ -0,0 +1,69 @@
+"""
+Coupon Sentinel - Test Fixtures
+
+Points the data directory at a throwaway location before the backend is
+imported, and builds small catalogs from hand-written products.
+"""
+
+import os
+import tempfile
+
+# Must happen before backend.storage reads it
+os.environ["COUPON_SENTINEL_DATA_DIR"] = tempfile.mkdtemp(prefix="coupon-sentinel-tests-")
+
+from typing import List, Optional
+import pytest
+from fastapi.testclient import TestClient
+from backend.models import Coupon, CouponType, DiscountType, StoreItem
+from backend.engines.catalog_index import CatalogIndex
+from backend.app import app
+
+
+def make_item(
+    name: str,
+    size: float,
+    price: float,
+    store: str = "Walmart",
+    brand: Optional[str] = "Great Value",
+    unit: str = "count",
+    category: str = "dairy",
+    **fields
+) -> StoreItem:
+    return StoreItem(
+        store_name=store, item_name=name, brand=brand, package_size=size,
+        package_unit=unit, price=price, category=category, **fields
+    )
+
+
+def make_coupon(
+    coupon_id: str,
+    item_filter: str,
+    value: float,
+    discount_type: DiscountType = DiscountType.AMOUNT_OFF,
+    **fields
+) -> Coupon:
+    fields.setdefault("coupon_type", CouponType.STORE)
+    return Coupon(
+        id=coupon_id, discount_type=discount_type, description=coupon_id,
+        item_filter=item_filter, value=value, **fields
+    )
+
+
+def make_catalog(items: List[StoreItem], coupons: List[Coupon] = ()) -> CatalogIndex:
+    return CatalogIndex(items, list(coupons), best_buy_terms=())
+
+
+@pytest.fixture
+def eggs():
+    """Great Value eggs in 12 and 18 counts, plus a pricier brand."""
+    return [
+        make_item("Large Eggs", 12, 3.00),
+        make_item("Large Eggs", 18, 4.00),
+        make_item("Large Eggs", 12, 4.50, brand="Eggland's Best"),
+    ]
+
+
+@pytest.fixture(scope="module")
+def client():
+    """The app, without entering its lifespan, so background workers stay off."""
+    return TestClient(app)
@@ -0,0 +1,56 @@
+"""
+Coupon Sentinel - Alternative Products Tests
+
+The cheapest other ways to buy an item, kept in a bounded heap.
+"""
+
+from backend.models import OptimizeRequest, ShoppingItem
+from backend.engines.pricing_engine import optimize_shopping_list
+from .conftest import make_catalog, make_coupon, make_item
+
+
+EGGS = [
+    make_item("Large Eggs", 12, 3.00),
+    make_item("Large Eggs", 12, 4.50, brand="Eggland's Best"),
+    make_item("Large Eggs", 12, 3.80, brand="Vital Farms"),
+    make_item("Large Eggs", 12, 5.20, brand="Pete and Gerry's"),
+]
+
+
+def alternatives(catalog, quantity=12, k=2):
+    requested = ShoppingItem(name="eggs", quantity=quantity)
+    matches = catalog.matcher.match_items(requested, store="Walmart")
+    purchase = catalog.mixer.best_purchase(requested, matches, "Walmart", alternatives=k)
+    return purchase, [(alt.lines[0].product.brand, alt.final_cents) for alt in purchase.alternatives]
+
+
+def test_cheapest_alternatives_exclude_the_choice():
+    purchase, others = alternatives(make_catalog(EGGS))
+
+    assert purchase.lines[0].product.brand == "Great Value"
+    assert others == [("Vital Farms", 380), ("Eggland's Best", 450)]
+
+
+def test_alternatives_are_priced_with_their_coupons():
+    catalog = make_catalog(EGGS, [make_coupon("eb-off", "eggland", 1.00)])
+
+    _, others = alternatives(catalog, k=3)
+    assert others == [("Eggland's Best", 350), ("Vital Farms", 380), ("Pete and Gerry's", 520)]
+
+
+def test_no_more_alternatives_than_products():
+    _, others = alternatives(make_catalog(EGGS[:2]), k=5)
+
+    assert others == [("Eggland's Best", 450)]
+
+
+def test_optimizer_attaches_alternatives_to_items():
+    catalog = make_catalog(EGGS)
+    request = OptimizeRequest(
+        shopping_list=[ShoppingItem(name="eggs", quantity=12)], zip_code="94105", alternatives=1,
+    )
+
+    result = optimize_shopping_list(request, catalog.store_items, catalog.coupons, matcher=catalog.matcher)
+    [item] = result.plans[0].items
+    [alternative] = item.alternatives
+    assert (alternative.product.brand, alternative.final_cost) == ("Vital Farms", 3.80)
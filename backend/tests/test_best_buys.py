@@ -0,0 +1,78 @@
+"""
+Coupon Sentinel - Best Buy Table Tests
+
+Materialized purchases keyed by term and canonical quantity, and which
+entries the next catalog version materializes.
+"""
+
+from backend.models import ShoppingItem
+from backend.engines.best_buys import POPULAR_TERMS, PROMOTE_MIN_MISSES, BestBuyTable
+from .conftest import make_catalog, make_item
+
+
+ITEMS = [
+    make_item("Whole Milk", 1, 3.48, unit="gallon"),
+    make_item("Whole Milk", 0.5, 1.98, unit="gallon"),
+    make_item("Ground Coffee", 12, 6.00, brand="Folgers", unit="oz", category="pantry"),
+    make_item("Large Eggs", 12, 3.00),
+]
+
+
+def table(terms):
+    catalog = make_catalog(ITEMS)
+    return BestBuyTable(catalog.matcher, catalog.mixer, catalog.stores, terms), catalog
+
+
+def lookup(best_buys, name, quantity, unit="count"):
+    return best_buys.lookup(ShoppingItem(name=name, quantity=quantity, unit=unit), "Walmart")
+
+
+def test_quantities_share_entries_by_base_amount():
+    best_buys, _ = table(["milk"])
+
+    found, gallon = lookup(best_buys, "Milk", 1, "gallon")
+    assert found
+    assert lookup(best_buys, "milk", 128, "fl oz") == (True, gallon)
+    assert [(line.product.package_size, line.quantity) for line in gallon.lines] == [(1, 1)]
+
+
+def test_weights_and_counts_are_materialized():
+    best_buys, _ = table(["coffee", "eggs"])
+
+    found, coffee = lookup(best_buys, "coffee", 2, "lb")
+    assert found and coffee.lines[0].quantity == 3
+    assert lookup(best_buys, "eggs", 12)[0]
+    assert best_buys.stats()["hit_rate"] == 1.0
+
+
+def test_entries_match_the_full_solve():
+    best_buys, catalog = table(["milk", "coffee", "eggs"])
+    entries = [("milk", 0.5, "gallon"), ("milk", 2, "count"), ("coffee", 12, "oz"), ("eggs", 6, "count")]
+    for name, quantity, unit in entries:
+        requested = ShoppingItem(name=name, quantity=quantity, unit=unit)
+        found, purchase = best_buys.lookup(requested, "Walmart")
+        matches = catalog.matcher.match_items(requested, store="Walmart")
+        full = catalog.mixer.best_purchase(requested, matches, "Walmart")
+        assert found and purchase.final_cents == full.final_cents
+
+
+def test_missed_quantities_are_materialized_next_version():
+    best_buys, _ = table([("milk", 1, "gallon"), "folgers"])
+    for _ in range(PROMOTE_MIN_MISSES):
+        assert lookup(best_buys, "milk", 3, "gallon") == (False, None)
+    lookup(best_buys, "folgers", 12, "oz")
+
+    [(spec, misses)] = best_buys.top_misses()
+    assert (spec, misses) == (("milk", 3, "gallon"), PROMOTE_MIN_MISSES)
+    # Folgers was used and stays; the gallon of milk nobody asked for is dropped
+    assert best_buys.next_terms() == ["folgers", ("milk", 3, "gallon")]
+
+    promoted, _ = table(best_buys.next_terms())
+    assert lookup(promoted, "milk", 384, "fl oz")[0]
+    assert not lookup(promoted, "milk", 1, "gallon")[0]
+
+
+def test_popular_terms_are_always_kept():
+    best_buys, _ = table(POPULAR_TERMS)
+
+    assert best_buys.next_terms() == list(POPULAR_TERMS)
@@ -0,0 +1,101 @@
+"""
+Coupon Sentinel - Catalog Delta Tests
+
+What a reload changed, and which saved lists it re-optimizes.
+"""
+
+import pytest
+from backend.models import OptimizeRequest, ShoppingItem
+from backend.engines.catalog_delta import compute_delta
+from backend.engines.reoptimize import ReoptimizeScheduler
+from backend.storage.saved_lists import SavedListStore
+from .conftest import make_catalog, make_coupon, make_item
+
+
+MILK = make_item("Whole Milk", 1, 3.48, unit="gallon")
+BREAD = make_item("White Bread", 20, 1.50, unit="oz", category="bakery")
+EGGS = make_item("Large Eggs", 12, 3.00)
+BREAD_COUPON = make_coupon("bread-off", "bread", 0.25)
+
+
+def repriced(item, price):
+    return item.model_copy(update={"price": price})
+
+
+def test_unchanged_reload_is_empty():
+    delta = compute_delta(make_catalog([MILK, EGGS]), make_catalog([MILK, EGGS]))
+
+    assert delta.empty
+    assert not delta.touched_items
+
+
+def test_items_added_changed_and_removed():
+    old = make_catalog([MILK, BREAD])
+    new = make_catalog([repriced(MILK, 3.29), EGGS])
+    delta = compute_delta(old, new)
+
+    assert delta.changed_items == {MILK.item_id}
+    assert delta.added_items == {EGGS.item_id}
+    assert delta.removed_items == {BREAD.item_id}
+    assert delta.touched_items == {MILK.item_id, EGGS.item_id, BREAD.item_id}
+
+
+def test_coupon_changes_touch_the_items_they_match():
+    old = make_catalog([MILK, BREAD], [BREAD_COUPON])
+    new = make_catalog([MILK, BREAD], [BREAD_COUPON.model_copy(update={"value": 0.50})])
+    delta = compute_delta(old, new)
+
+    assert delta.changed_coupons == {"bread-off"}
+    assert delta.touched_items == {BREAD.item_id}
+
+    removed = compute_delta(old, make_catalog([MILK, BREAD]))
+    assert removed.removed_coupons == {"bread-off"}
+    assert removed.touched_items == {BREAD.item_id}
+
+
+@pytest.fixture
+def saved_lists(tmp_path):
+    store = SavedListStore(tmp_path / "lists.db")
+    yield store
+    store.close()
+
+
+def save(store, scheduler, catalog, name):
+    request = OptimizeRequest(
+        shopping_list=[ShoppingItem(name=name)], zip_code="94105", preferred_stores=["Walmart"]
+    )
+    list_id = store.create(name, request)
+    scheduler.reoptimize(list_id, reason="created", catalog=catalog)
+    return list_id
+
+
+def test_delta_reoptimizes_only_the_lists_it_affects(saved_lists):
+    old = make_catalog([MILK, BREAD, EGGS])
+    new = make_catalog([repriced(MILK, 2.98), BREAD, EGGS])
+    scheduler = ReoptimizeScheduler(saved_lists, lambda: new)
+    milk_list = save(saved_lists, scheduler, old, "milk")
+    bread_list = save(saved_lists, scheduler, old, "bread")
+    versions = {list_id: saved_lists.version(list_id) for list_id in (milk_list, bread_list)}
+
+    scheduler.on_catalog_delta(compute_delta(old, new), new)
+
+    assert scheduler.run_pending() == 1
+    assert saved_lists.version(milk_list) == versions[milk_list] + 1
+    assert saved_lists.version(bread_list) == versions[bread_list]
+    assert saved_lists.get_result(milk_list).grand_total == 2.98
+    [change] = saved_lists.changes(milk_list, since=versions[milk_list])
+    assert change["reason"] == "catalog"
+
+
+def test_new_products_reach_lists_that_never_matched_them(saved_lists):
+    old = make_catalog([MILK])
+    new = make_catalog([MILK, EGGS])
+    scheduler = ReoptimizeScheduler(saved_lists, lambda: new)
+    eggs_list = save(saved_lists, scheduler, old, "eggs")
+    before = saved_lists.version(eggs_list)
+
+    scheduler.on_catalog_delta(compute_delta(old, new), new)
+
+    assert scheduler.run_pending() == 1
+    assert saved_lists.version(eggs_list) == before + 1
+    assert saved_lists.get_result(eggs_list).grand_total == 3.00
@@ -0,0 +1,73 @@
+"""
+Coupon Sentinel - Community Price Tests
+
+Validating shelf price reports and accepting only independent consensus.
+"""
+
+from datetime import datetime, timedelta, timezone
+import pytest
+from backend.models import PriceSubmission
+from backend.engines.community_prices import CommunityPriceIngestor
+from backend.storage.community_prices import CommunityPriceStore
+from .conftest import make_catalog, make_item
+
+
+MILK = make_item("Whole Milk", 1, 3.48, unit="gallon")
+START = datetime(2026, 3, 2, 9, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def ingestor(tmp_path):
+    store = CommunityPriceStore(tmp_path / "community.db")
+    catalog = make_catalog([MILK])
+    yield CommunityPriceIngestor(store, lambda: catalog, lambda prices: None)
+    store.close()
+
+
+def report(price, submitter="shopper", item_id=MILK.item_id):
+    return PriceSubmission(item_id=item_id, price=price, submitter=submitter)
+
+
+def submit_and_flush(ingestor, submissions, minutes=0, source=None):
+    accepted, rejected = ingestor.submit(submissions, START + timedelta(minutes=minutes), source)
+    ingestor.flush()
+    return accepted, rejected
+
+
+def test_implausible_and_unknown_reports_are_rejected(ingestor):
+    accepted, rejected = submit_and_flush(ingestor, [report(3.29), report(30.00), report(1.00, item_id="x")])
+
+    assert accepted == 1
+    assert [(r["index"], r["reason"]) for r in rejected] == [
+        (1, "price is implausible for this item"), (2, "unknown item"),
+    ]
+
+
+def test_one_batch_cannot_publish_a_price(ingestor):
+    submit_and_flush(ingestor, [report(2.99, f"user-{n}") for n in range(10)])
+
+    assert ingestor.pending() == {}
+
+
+def test_one_client_cannot_publish_a_price(ingestor):
+    for n in range(5):
+        submit_and_flush(ingestor, [report(2.99, f"user-{n}")], minutes=20 * n, source="10.0.0.7")
+
+    assert ingestor.pending() == {}
+
+
+def test_agreeing_reports_spread_over_time_publish_their_median(ingestor):
+    for n, price in enumerate([2.99, 2.98, 2.99]):
+        submit_and_flush(ingestor, [report(price)], minutes=10 * n)
+    # Agreement within a few minutes is not enough
+    assert ingestor.pending() == {}
+
+    submit_and_flush(ingestor, [report(2.99)], minutes=45)
+    assert ingestor.pending() == {MILK.item_id: 2.99}
+
+
+def test_reports_that_disagree_are_not_consensus(ingestor):
+    for n, price in enumerate([2.99, 3.48, 1.99, 2.49]):
+        submit_and_flush(ingestor, [report(price)], minutes=20 * n)
+
+    assert ingestor.pending() == {}
@@ -0,0 +1,81 @@
+"""
+Coupon Sentinel - Compression Tests
+
+Encoding negotiation, precompressed listings and the gzip middleware.
+"""
+
+import gzip
+import pytest
+from backend import compression
+from backend.compression import choose_encoding, compress
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("deflate, gzip;q=0.5", "gzip"),
+    ("*", "gzip"),
+])
+def test_choose_encoding_without_brotli(monkeypatch, header, expected):
+    monkeypatch.setattr(compression, "brotli", None)
+
+    assert choose_encoding(header) == expected
+
+
+def test_gzip_output_is_deterministic():
+    body = b'{"items": []}' * 200
+
+    assert compress(body, "gzip") == compress(body, "gzip")
+    assert gzip.decompress(compress(body, "gzip")) == body
+
+
+def test_unknown_encoding_is_rejected():
+    with pytest.raises(ValueError):
+        compress(b"body", "zstd")
+
+
+def test_unfiltered_listing_is_served_precompressed(client):
+    first = client.get("/api/coupons", headers={"Accept-Encoding": "gzip"})
+    second = client.get("/api/coupons", headers={"Accept-Encoding": "gzip"})
+
+    assert first.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in first.headers["vary"]
+    assert first.json() == second.json()
+
+
+def test_small_bodies_are_not_compressed(client):
+    response = client.get("/api/categories", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+
+
+def test_each_encoding_has_its_own_etag(client):
+    plain = client.get("/api/coupons", headers={"Accept-Encoding": "identity"})
+    gzipped = client.get(
+        "/api/coupons",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": plain.headers["etag"]},
+    )
+
+    assert gzipped.status_code == 200
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.headers["etag"] != plain.headers["etag"]
+    assert gzipped.json() == plain.json()
+
+    cached = client.get(
+        "/api/coupons",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["etag"]},
+    )
+    assert cached.status_code == 304
+
+
+def test_dynamic_responses_go_through_the_middleware(client):
+    """The optimizer's JSON is gzipped by the middleware, listings are not double-encoded."""
+    body = {"shopping_list": [{"name": n} for n in ("milk", "eggs", "bread", "coffee", "chips")], "zip_code": "94105"}
+    response = client.post("/api/optimize", json=body, headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers.get("content-encoding") == "gzip"
+    assert response.json()["plans"]
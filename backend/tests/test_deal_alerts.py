@@ -0,0 +1,68 @@
+"""
+Coupon Sentinel - Deal Alert Tests
+
+Indexing watch rules by term and matching them against catalog deltas.
+"""
+
+import pytest
+from backend.models import WatchRule
+from backend.engines.catalog_delta import compute_delta
+from backend.engines.deal_alerts import DealAlertEngine, rule_terms
+from backend.storage.deal_alerts import DealAlertStore
+from .conftest import make_catalog, make_item
+
+
+GREAT_MILK = make_item("Whole Milk", 1, 3.48, unit="gallon", regular_price=3.98)
+GREEK_YOGURT = make_item("Greek Yogurt", 32, 4.00, brand="Chobani", unit="oz", regular_price=5.00)
+COFFEE = make_item("Ground Coffee", 12, 6.00, brand="Folgers", unit="oz", category="pantry")
+
+
+@pytest.fixture
+def engine(tmp_path):
+    store = DealAlertStore(tmp_path / "alerts.db")
+    yield DealAlertEngine(store)
+    store.close()
+
+
+def publish(engine, old_items, new_items):
+    """Reload from one catalog to another and return the alerts it queued."""
+    new = make_catalog(new_items)
+    engine.on_catalog_delta(compute_delta(make_catalog(old_items), new), new)
+    return engine.store.pending()
+
+
+def test_unknown_tokens_are_kept_rather_than_snapped():
+    catalog = make_catalog([GREAT_MILK])
+
+    assert rule_terms(WatchRule(item_filter="greek yogurt"), catalog.matcher) == [["greek"], ["yogurt"]]
+    assert rule_terms(WatchRule(item_filter="whole mlik"), catalog.matcher) == [["whole"], ["mlik", "milk"]]
+
+
+def test_rule_for_an_uncarried_product_waits_for_it(engine):
+    engine.add_rule(WatchRule(item_filter="greek yogurt"), make_catalog([GREAT_MILK]))
+
+    # 'greek' must not have become 'great', so Great Value milk is no match
+    assert publish(engine, [], [GREAT_MILK]) == []
+
+    [alert] = publish(engine, [GREAT_MILK], [GREAT_MILK, GREEK_YOGURT])
+    assert alert["deal"]["item_id"] == GREEK_YOGURT.item_id
+    assert alert["deal"]["savings_pct"] == 20.0
+
+
+def test_misspelled_rule_matches_the_catalog_spelling(engine):
+    engine.add_rule(WatchRule(item_filter="whole mlik"), make_catalog([GREAT_MILK]))
+
+    [alert] = publish(engine, [], [GREAT_MILK, COFFEE])
+    assert alert["deal"]["item_id"] == GREAT_MILK.item_id
+
+
+def test_thresholds_and_brand_filter_rules(engine):
+    catalog = make_catalog([GREEK_YOGURT, COFFEE])
+    engine.add_rule(WatchRule(item_filter="yogurt", min_savings_pct=25), catalog)
+    engine.add_rule(WatchRule(item_filter="coffee", brand="Maxwell House"), catalog)
+    cheap = engine.add_rule(WatchRule(item_filter="coffee", max_unit_price=0.60), catalog)
+
+    alerts = publish(engine, [], [GREEK_YOGURT, COFFEE])
+    assert [a["rule_id"] for a in alerts] == [cheap]
+    # The same deal is not alerted twice
+    assert publish(engine, [], [GREEK_YOGURT, COFFEE]) == alerts
@@ -0,0 +1,79 @@
+"""
+Coupon Sentinel - Provider Fetcher Tests
+
+The provider hub over real HTTP, against the local fake store server.
+"""
+
+import pytest
+import pytest_asyncio
+from backend.providers import ProviderHub, close_http_client
+from backend.providers import fetcher
+from backend.providers.fake_server import FakeStoreServer
+from backend.providers.fetcher import BREAKER_FAILURE_THRESHOLD, CircuitBreaker
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(fetcher, "RETRY_BASE_DELAY", 0.0)
+
+
+@pytest_asyncio.fixture
+async def http_client():
+    # The pooled client is bound to the event loop of the test that created it
+    yield
+    await close_http_client()
+
+
+@pytest.mark.asyncio
+async def test_fetches_items_and_coupons(http_client):
+    with FakeStoreServer() as server:
+        hub = ProviderHub([server.provider()])
+        loaded, failed = await hub.fetch_all(["Target", "Walmart"], "94105")
+
+    assert failed == []
+    assert sorted(data.store for data in loaded) == ["Target", "Walmart"]
+    for data in loaded:
+        assert data.items and all(item.store_name == data.store for item in data.items)
+        assert data.coupons
+
+
+@pytest.mark.asyncio
+async def test_down_store_fails_without_failing_the_rest(http_client, no_backoff):
+    with FakeStoreServer(down_stores=["Costco"]) as server:
+        hub = ProviderHub([server.provider()])
+        loaded, failed = await hub.fetch_all(["Costco", "Target"], "94105")
+
+    assert [data.store for data in loaded] == ["Target"]
+    [failure] = failed
+    assert failure.store == "Costco"
+    assert "HTTP 503" in failure.error
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_and_stops_calling_the_store(http_client, no_backoff):
+    with FakeStoreServer(down_stores=["Costco"]) as server:
+        hub = ProviderHub([server.provider(rate_per_second=1000, burst=100)])
+        for _ in range(BREAKER_FAILURE_THRESHOLD):
+            await hub.fetch_all(["Costco"], "94105")
+        breaker = hub.breakers[("fake", "costco")]
+        assert breaker.state == CircuitBreaker.OPEN
+
+        calls = server.request_count
+        _, [failure] = await hub.fetch_all(["Costco"], "94105")
+
+    assert "circuit open" in failure.error
+    assert server.request_count == calls
+
+
+@pytest.mark.asyncio
+async def test_retries_ride_out_flaky_responses(http_client, no_backoff, monkeypatch):
+    rolls = iter([0.0, 1.0, 1.0, 1.0])
+    monkeypatch.setattr("backend.providers.fake_server.random.random", lambda: next(rolls, 1.0))
+    with FakeStoreServer(failure_rate=0.5) as server:
+        hub = ProviderHub([server.provider()])
+        loaded, failed = await hub.fetch_all(["Target"], "94105")
+
+    assert failed == []
+    assert [data.store for data in loaded] == ["Target"]
+    # Items and coupons are fetched together, and both again on the retry
+    assert server.request_count == 4
@@ -0,0 +1,50 @@
+"""
+Coupon Sentinel - HTTP Caching Tests
+
+ETag / Last-Modified validation of the catalog listings.
+"""
+
+
+def test_matching_etag_gets_a_304_with_the_same_headers(client):
+    headers = {"Accept-Encoding": "identity"}
+    first = client.get("/api/items", params={"limit": 5}, headers=headers)
+    again = client.get(
+        "/api/items", params={"limit": 5},
+        headers={**headers, "If-None-Match": first.headers["etag"]},
+    )
+
+    assert first.status_code == 200
+    assert again.status_code == 304
+    assert again.content == b""
+    for header in ("etag", "vary", "cache-control", "last-modified"):
+        assert again.headers[header] == first.headers[header]
+
+
+def test_etag_depends_on_the_query(client):
+    headers = {"Accept-Encoding": "identity"}
+    five = client.get("/api/items", params={"limit": 5}, headers=headers)
+    six = client.get(
+        "/api/items", params={"limit": 6},
+        headers={**headers, "If-None-Match": five.headers["etag"]},
+    )
+
+    assert six.status_code == 200
+    assert six.headers["etag"] != five.headers["etag"]
+
+
+def test_if_modified_since_the_load_gets_a_304(client):
+    first = client.get("/api/categories")
+    again = client.get("/api/categories", headers={"If-Modified-Since": first.headers["last-modified"]})
+
+    assert again.status_code == 304
+    assert again.headers["etag"] == first.headers["etag"]
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since(client):
+    first = client.get("/api/categories")
+    again = client.get(
+        "/api/categories",
+        headers={"If-None-Match": '"stale"', "If-Modified-Since": first.headers["last-modified"]},
+    )
+
+    assert again.status_code == 200
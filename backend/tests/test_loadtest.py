@@ -0,0 +1,57 @@
+"""
+Coupon Sentinel - Load Generator Tests
+
+Traffic the load generator draws is valid for the API, and its latency summaries.
+"""
+
+import pytest
+from backend.loadtest import (
+    DEFAULT_LIST_SIZES, DEFAULT_MIX, EndpointStats, TrafficGenerator, parse_args, percentile, summarize,
+)
+
+
+def test_percentile_is_nearest_rank():
+    values = [float(v) for v in range(1, 11)]
+
+    assert [percentile(values, p) for p in (50, 90, 99, 100)] == [5.0, 9.0, 10.0, 10.0]
+    assert percentile([0.2], 99) == 0.2
+    assert percentile([], 50) == 0.0
+
+
+def test_summary_counts_errors_and_statuses():
+    stats = EndpointStats()
+    for seconds, status, ok in [(0.010, "200", True), (0.030, "200", True), (0.020, "500", False), (0.040, "timeout", False)]:
+        stats.record(seconds, status, ok)
+
+    summary = summarize("optimize", stats, seconds=2.0)
+    assert summary["requests"] == 4
+    assert summary["rps"] == 2.0
+    assert summary["error_rate"] == 0.5
+    assert summary["statuses"] == {"200": 2, "500": 1, "timeout": 1}
+    assert (summary["p50_ms"], summary["p99_ms"], summary["max_ms"]) == (20.0, 40.0, 40.0)
+
+
+def test_mix_must_name_known_endpoints():
+    with pytest.raises(ValueError):
+        TrafficGenerator({"checkout": 1.0}, DEFAULT_LIST_SIZES)
+    with pytest.raises(ValueError):
+        TrafficGenerator({"optimize": 0.0}, DEFAULT_LIST_SIZES)
+
+
+def test_generated_traffic_is_accepted_by_the_api(client):
+    traffic = TrafficGenerator(DEFAULT_MIX, {1: 1.0, 3: 1.0}, seed=7)
+
+    for _ in range(40):
+        call = traffic.next_call()
+        response = client.request(call.method, call.path, params=call.params, json=call.body)
+        assert response.status_code == 200, (call, response.text)
+
+
+def test_command_line_weights():
+    args = parse_args(["--mix", "optimize=3,quick", "--list-sizes", "1=1,5=2", "--workers", "1,3"])
+
+    assert args.mix == {"optimize": 3.0, "quick": 1.0}
+    assert args.list_sizes == {1: 1.0, 5: 2.0}
+    assert args.workers == [1, 3]
+    with pytest.raises(SystemExit):
+        parse_args(["--list-sizes", "0=1"])
@@ -0,0 +1,81 @@
+"""
+Coupon Sentinel - Store Locality Tests
+
+Radius queries over store locations and the stores a shopper can reach.
+"""
+
+from backend.models import OptimizeRequest, ShoppingItem
+from backend.engines.locality import LocalityIndex, StoreLocation, haversine_miles
+from backend.engines.pricing_engine import candidate_stores
+from backend.providers.locations import load_zip_centroids
+from .conftest import make_item
+
+
+LOCATIONS = [
+    StoreLocation("target-sf", "Target", "Target SF", "94103", 37.784, -122.405),
+    StoreLocation("costco-sf", "Costco", "Costco SF", "94103", 37.771, -122.412),
+    StoreLocation("walmart-san-leandro", "Walmart", "Walmart San Leandro", "94577", 37.705, -122.127),
+    StoreLocation("walmart-chicago", "Walmart", "Walmart Chicago", "60640", 41.962, -87.658),
+]
+CENTROIDS = {"94105": (37.789, -122.395), "60614": (41.922, -87.652)}
+
+
+def index():
+    return LocalityIndex(LOCATIONS, CENTROIDS)
+
+
+def test_haversine_distance():
+    # San Francisco to Chicago is about 1,850 miles
+    assert 1_840 < haversine_miles(37.789, -122.395, 41.886, -87.622) < 1_870
+    assert haversine_miles(37.789, -122.395, 37.789, -122.395) == 0
+
+
+def test_near_zip_returns_locations_in_radius_nearest_first():
+    nearby = index().near_zip("94105", 5)
+
+    assert [n.location.store_id for n in nearby] == ["target-sf", "costco-sf"]
+    assert nearby[0].distance_miles < nearby[1].distance_miles < 5
+    assert [n.location.store_id for n in index().near_zip("94105", 25)][-1] == "walmart-san-leandro"
+
+
+def test_unknown_zip_is_none_and_empty_radius_is_empty():
+    locality = index()
+
+    assert locality.near_zip("00000") is None
+    assert locality.chains_near_zip("60614", 1) == frozenset()
+    assert locality.chains_near_zip("60614", 10) == frozenset({"walmart"})
+
+
+def test_candidate_stores_are_those_near_the_shopper():
+    items = [make_item("Large Eggs", 12, 3.00, store=store) for store in ("Target", "Costco", "Walmart")]
+
+    def stores(zip_code, radius, preferred=()):
+        request = OptimizeRequest(
+            shopping_list=[ShoppingItem(name="eggs")], zip_code=zip_code,
+            radius_miles=radius, preferred_stores=list(preferred),
+        )
+        return sorted(candidate_stores(request, items, index()))
+
+    assert stores("94105", 5) == ["Costco", "Target"]
+    assert stores("94105", 5, preferred=["Target", "Walmart"]) == ["Target"]
+    assert stores("60614", 10) == ["Walmart"]
+    # An unknown zip code does not restrict the stores
+    assert stores("00000", 5) == ["Costco", "Target", "Walmart"]
+
+
+def test_centroids_csv_extends_the_samples(tmp_path):
+    path = tmp_path / "zip_centroids.csv"
+    path.write_text("zip,lat,lon\n2134,42.353,-71.132\nbad line\n")
+
+    centroids = load_zip_centroids(path)
+    assert centroids["02134"] == (42.353, -71.132)
+    assert "94105" in centroids
+
+
+def test_nearby_stores_endpoint(client):
+    response = client.get("/api/stores/nearby", params={"zip": "94105", "radius": 5})
+
+    assert response.status_code == 200
+    stores = response.json()["stores"]
+    assert stores and all(store["distance_miles"] <= 5 for store in stores)
+    assert client.get("/api/stores/nearby", params={"zip": "00000"}).status_code == 404
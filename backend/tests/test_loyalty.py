@@ -0,0 +1,54 @@
+"""
+Coupon Sentinel - Loyalty Pricing Tests
+
+Tier prices precomputed per item, and memberships resolved per store.
+"""
+
+from backend.models import OptimizeRequest, ShoppingItem
+from backend.engines.loyalty import GUEST, MEMBER, member_stores, regular_cents, store_tier, tier_cents
+from backend.engines.pricing_engine import optimize_shopping_list
+from .conftest import make_catalog, make_item
+
+
+def test_members_pay_the_lower_loyalty_price():
+    item = make_item("Large Eggs", 12, 3.49, store="Target", brand="Good & Gather", loyalty_price=2.99)
+
+    assert (tier_cents(item, GUEST), tier_cents(item, MEMBER)) == (349, 299)
+
+
+def test_loyalty_price_above_shelf_is_ignored():
+    item = make_item("Large Eggs", 12, 3.49, loyalty_price=3.99)
+
+    assert tier_cents(item, MEMBER) == 349
+
+
+def test_regular_price_only_counts_when_higher():
+    assert regular_cents(make_item("Large Eggs", 12, 2.99, regular_price=3.49)) == 349
+    assert regular_cents(make_item("Large Eggs", 12, 2.99, regular_price=2.49)) == 299
+
+
+def test_memberships_by_program_or_store_name():
+    members_of = member_stores([" Target Circle ", "costco"])
+
+    assert store_tier("Target", members_of) == MEMBER
+    assert store_tier("Costco", members_of) == MEMBER
+    assert store_tier("Walmart", members_of) == GUEST
+
+
+def test_membership_can_change_the_winning_store():
+    catalog = make_catalog([
+        make_item("Large Eggs", 12, 3.00),
+        make_item("Large Eggs", 12, 3.49, store="Target", brand="Good & Gather", loyalty_price=2.79),
+    ])
+
+    def winner(memberships):
+        request = OptimizeRequest(
+            shopping_list=[ShoppingItem(name="eggs", quantity=12)], zip_code="94105",
+            loyalty_memberships=memberships,
+        )
+        result = optimize_shopping_list(request, catalog.store_items, catalog.coupons, matcher=catalog.matcher)
+        [plan] = result.plans
+        return plan.store_name, plan.final_total
+
+    assert winner([]) == ("Walmart", 3.00)
+    assert winner(["Target Circle"]) == ("Target", 2.79)
@@ -0,0 +1,78 @@
+"""
+Coupon Sentinel - Item Matching Tests
+
+Synonyms, stemming, misspellings and top-tier matching.
+"""
+
+import pytest
+from backend.models import ShoppingItem
+from backend.engines import matching
+from backend.engines.matching import ItemMatcher, normalize, query_tokens
+from .conftest import make_item
+
+
+@pytest.fixture
+def matcher():
+    return ItemMatcher([
+        make_item("2% Reduced Fat Milk", 1, 2.95, unit="gallon"),
+        make_item("Whole Milk", 1, 3.48, unit="gallon"),
+        make_item("Large Eggs", 12, 3.00),
+        make_item("Marinara Sauce", 24, 1.50, brand="Prego", unit="oz", category="pasta"),
+        make_item("Whole Milk", 1, 3.99, store="Target", brand="Good & Gather", unit="gallon"),
+    ])
+
+
+def names(items):
+    return sorted((item.store_name, item.item_name) for item in items)
+
+
+def test_normalize_applies_synonyms_and_stems():
+    assert normalize("Reduced Fat Milks") == ["2%", "milk"]
+    assert normalize("Spaghetti Sauce") == ["marinara", "sauce"]
+
+
+def test_query_tokens_drop_quantities_and_filler():
+    assert query_tokens("1 gallon of milk") == ["milk"]
+    assert query_tokens("eggs dozen eggs") == ["egg"]
+
+
+def test_synonyms_match_on_both_sides(matcher):
+    assert names(matcher.match_items(ShoppingItem(name="two percent milk"))) == [("Walmart", "2% Reduced Fat Milk")]
+    assert names(matcher.match_items(ShoppingItem(name="pasta sauce"))) == [("Walmart", "Marinara Sauce")]
+
+
+def test_only_the_top_tier_is_returned(matcher):
+    """'2% milk' does not fall back to whole milk."""
+    assert names(matcher.match_items(ShoppingItem(name="2% milk"), store="Walmart")) == [("Walmart", "2% Reduced Fat Milk")]
+
+
+def test_store_filter(matcher):
+    assert names(matcher.match_items(ShoppingItem(name="whole milk"), store="Target")) == [("Target", "Whole Milk")]
+
+
+@pytest.mark.parametrize("typo", ["eggz", "egsg", "lagre eggs"])
+def test_misspellings_still_match(matcher, typo):
+    assert names(matcher.match_items(ShoppingItem(name=typo))) == [("Walmart", "Large Eggs")]
+
+
+def test_unrelated_queries_match_nothing(matcher):
+    assert matcher.match_items(ShoppingItem(name="dish soap")) == []
+
+
+def test_preferred_brand_joins_the_top_tier(matcher):
+    requested = ShoppingItem(name="whole milk", brand_preference="Good & Gather")
+
+    assert ("Target", "Whole Milk") in names(matcher.match_items(requested))
+
+
+def test_vocabulary_tokens_expand_to_themselves(matcher):
+    assert matcher.expand("milk") == [("milk", 1.0)]
+
+
+def test_fuzzy_expansions_are_bounded(matcher, monkeypatch):
+    monkeypatch.setattr(matching, "EXPANSION_CACHE_SIZE", 3)
+    for typo in ["mlik", "milj", "mikl", "eggz", "sause"]:
+        matcher.expand(typo)
+
+    assert len(matcher._expansions) == 3
+    assert ("sause", matching.FUZZY_CUTOFF) in matcher._expansions
@@ -0,0 +1,66 @@
+"""
+Coupon Sentinel - Money Tests
+
+Integer-cent conversion and the half-up rounding of percentage discounts.
+"""
+
+import pytest
+from backend.models import DiscountType
+from backend.money import percent_of, to_cents, to_dollars
+from backend.engines.stacking_logic import discount_cents
+from .conftest import make_coupon
+
+
+@pytest.mark.parametrize("dollars, cents", [(0.0, 0), (0.29, 29), (1.99, 199), (3.50, 350), (19.999, 2000)])
+def test_to_cents(dollars, cents):
+    assert to_cents(dollars) == cents
+
+
+def test_to_dollars():
+    assert to_dollars(1999) == 19.99
+
+
+@pytest.mark.parametrize("cents, rate, expected", [
+    (1000, 0.29, 290),     # 0.29 is not exact in binary
+    (199, 0.15, 30),       # 29.85 rounds up
+    (1, 0.5, 1),           # half a cent rounds up
+    (3, 0.5, 2),           # 1.5 rounds up
+    (333, 1 / 3, 111),     # rates are taken to a basis point
+    (0, 0.25, 0),
+])
+def test_percent_of_rounds_half_up(cents, rate, expected):
+    assert percent_of(cents, rate) == expected
+
+
+def test_percent_off_rounds_the_line_total():
+    coupon = make_coupon("pct", "eggs", 0.15, DiscountType.PERCENT_OFF)
+
+    # 15% of 3 x $1.99 = 89.55 cents
+    assert discount_cents(coupon, 3, 199) == 90
+
+
+def test_bogo_half_rounds_half_a_unit_up():
+    coupon = make_coupon("bogo", "eggs", 0, DiscountType.BOGO_HALF)
+
+    assert discount_cents(coupon, 2, 199) == 100
+    assert discount_cents(coupon, 1, 199) == 0
+
+
+def test_bogo_free_takes_one_unit():
+    coupon = make_coupon("bogo", "eggs", 0, DiscountType.BOGO_FREE)
+
+    assert discount_cents(coupon, 3, 249) == 249
+
+
+def test_amount_off_is_capped_at_the_line_total():
+    coupon = make_coupon("five-off", "eggs", 5.00)
+
+    assert discount_cents(coupon, 2, 199) == 398
+    assert discount_cents(coupon, 4, 199) == 500
+
+
+def test_min_quantity_not_met_gives_nothing():
+    coupon = make_coupon("pct", "eggs", 0.50, DiscountType.PERCENT_OFF, min_quantity=3)
+
+    assert discount_cents(coupon, 2, 400) == 0
+    assert discount_cents(coupon, 3, 400) == 600
@@ -0,0 +1,109 @@
+"""
+Coupon Sentinel - Optimization Session Tests
+
+Incremental re-pricing of a list edit by edit, checked against a full
+optimization of the same list.
+"""
+
+import pytest
+from backend.models import ListEdit, OptimizeRequest, ShoppingItem
+from backend.engines.optimize_sessions import OptimizationSession, SessionRegistry
+from .conftest import make_catalog, make_item
+
+
+ITEMS = [
+    make_item("Whole Milk", 1, 3.48, unit="gallon"),
+    make_item("Whole Milk", 1, 3.29, store="Target", brand="Good & Gather", unit="gallon"),
+    make_item("Large Eggs", 12, 2.50),
+    make_item("Large Eggs", 12, 3.19, store="Target", brand="Good & Gather"),
+    make_item("White Bread", 20, 1.50, unit="oz", category="bakery"),
+]
+
+
+class Catalogs:
+    """A catalog source whose version can be swapped under a session."""
+
+    def __init__(self, items):
+        self.current = make_catalog(items)
+
+    def __call__(self):
+        return self.current
+
+
+def request(*names, multi=False):
+    return OptimizeRequest(
+        shopping_list=[ShoppingItem(name=name) for name in names],
+        zip_code="94105", allow_multi_store=multi,
+    )
+
+
+def add(name, quantity=1):
+    return ListEdit(op="add", item=ShoppingItem(name=name, quantity=quantity))
+
+
+def assert_matches_full_result(session, diff):
+    assert diff["grand_total"]["after"] == session.result().grand_total
+
+
+def test_single_store_edits_move_the_whole_list():
+    session = OptimizationSession("s", request("milk"), Catalogs(ITEMS))
+    assert session.result().plans[0].store_name == "Target"
+
+    diff = session.apply([add("eggs")])
+
+    # Walmart's cheaper eggs outweigh Target's cheaper milk
+    assert diff["store"] == {"before": "Target", "after": "Walmart"}
+    assert [change["item"] for change in diff["items"]] == ["eggs", "milk"]
+    milk = diff["items"][1]
+    assert (milk["before"]["store"], milk["after"]["store"]) == ("Target", "Walmart")
+    assert_matches_full_result(session, diff)
+
+
+def test_multi_store_edit_reprices_only_its_item():
+    session = OptimizationSession("s", request("milk", "eggs", multi=True), Catalogs(ITEMS))
+
+    diff = session.apply([ListEdit(op="set_quantity", name="eggs", quantity=24)])
+
+    [eggs] = diff["items"]
+    assert eggs["item"] == "eggs"
+    assert (eggs["before"]["final_cost"], eggs["after"]["final_cost"]) == (2.50, 5.00)
+    assert diff["grand_total"] == {"before": 5.79, "after": 8.29}
+    assert_matches_full_result(session, diff)
+
+    diff = session.apply([ListEdit(op="remove", name="milk")])
+    assert diff["items"][0]["after"] is None
+    assert diff["grand_total"]["after"] == 5.00
+
+
+def test_invalid_batch_is_rejected_whole():
+    session = OptimizationSession("s", request("milk"), Catalogs(ITEMS))
+
+    with pytest.raises(ValueError, match="not on the list"):
+        session.apply([add("eggs"), ListEdit(op="remove", name="bread")])
+    with pytest.raises(ValueError, match="already on the list"):
+        session.apply([add("Milk")])
+    assert [item.name for item in session.shopping_list] == ["milk"]
+    assert session.version == 0
+
+
+def test_catalog_change_reprices_every_row():
+    catalogs = Catalogs(ITEMS)
+    session = OptimizationSession("s", request("milk", "eggs", multi=True), catalogs)
+    catalogs.current = make_catalog([item.model_copy(update={"price": item.price + 1}) for item in ITEMS])
+
+    diff = session.apply([add("bread")])
+
+    assert diff["repriced"]
+    assert [change["item"] for change in diff["items"]] == ["bread", "eggs", "milk"]
+    assert_matches_full_result(session, diff)
+
+
+def test_registry_drops_least_recently_used_sessions():
+    registry = SessionRegistry(Catalogs(ITEMS), max_sessions=2)
+    first, second = registry.create(request("milk")), registry.create(request("eggs"))
+    registry.get(first.session_id)
+    third = registry.create(request("bread"))
+
+    assert registry.get(second.session_id) is None
+    assert registry.get(first.session_id) is first and registry.get(third.session_id) is third
+    assert registry.delete(first.session_id) and len(registry) == 1
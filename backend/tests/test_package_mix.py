@@ -0,0 +1,80 @@
+"""
+Coupon Sentinel - Package Mix Tests
+
+The knapsack over package sizes: mixed sizes, coupon thresholds and
+brand-only purchases.
+"""
+
+from backend.models import ShoppingItem
+from .conftest import make_catalog, make_coupon, make_item
+
+
+def best(catalog, requested, store="Walmart", **options):
+    matches = catalog.matcher.match_items(requested, store=store)
+    return catalog.mixer.best_purchase(requested, matches, store, **options)
+
+
+def bought(purchase):
+    """Sorted (brand, package size, packages) lines of a purchase."""
+    return sorted((line.product.brand, line.product.package_size, line.quantity) for line in purchase.lines)
+
+
+def test_mixes_package_sizes(eggs):
+    """30 eggs: 12 + 18 ($7.00) beats 2 x 18 ($8.00) and 3 x 12 ($9.00)."""
+    purchase = best(make_catalog(eggs), ShoppingItem(name="eggs", quantity=30))
+
+    assert bought(purchase) == [("Great Value", 12, 1), ("Great Value", 18, 1)]
+    assert purchase.final_cents == 700
+
+
+def test_single_size_when_it_covers_the_quantity(eggs):
+    purchase = best(make_catalog(eggs), ShoppingItem(name="eggs", quantity=10))
+
+    assert bought(purchase) == [("Great Value", 12, 1)]
+    assert purchase.final_cents == 300
+
+
+def test_coupon_min_quantity_changes_the_mix(eggs):
+    """$2 off two 18-counts makes 2 x 18 ($6.00) cheaper than 12 + 18 ($7.00)."""
+    eggs[1] = eggs[1].model_copy(update={"item_name": "Large Eggs 18ct"})
+    coupon = make_coupon("two-18s", "eggs 18ct", 2.00, min_quantity=2)
+    purchase = best(make_catalog(eggs, [coupon]), ShoppingItem(name="eggs", quantity=30))
+
+    assert bought(purchase) == [("Great Value", 18, 2)]
+    assert purchase.final_cents == 600
+    assert [c.coupon_id for c in purchase.lines[0].applied_coupons] == ["two-18s"]
+
+
+def test_coupon_below_min_quantity_does_not_apply(eggs):
+    coupon = make_coupon("two-12s", "eggs", 2.00, min_quantity=2)
+    purchase = best(make_catalog(eggs, [coupon]), ShoppingItem(name="eggs", quantity=12))
+
+    assert bought(purchase) == [("Great Value", 12, 1)]
+    assert purchase.final_cents == 300
+    assert purchase.lines[0].applied_coupons == []
+
+
+def test_brand_only_uses_the_preferred_brand(eggs):
+    requested = ShoppingItem(name="eggs", quantity=12, brand_preference="Eggland")
+    purchase = best(make_catalog(eggs), requested, brand_only=True)
+
+    assert bought(purchase) == [("Eggland's Best", 12, 1)]
+    assert purchase.final_cents == 450
+
+
+def test_brand_only_without_that_brand_buys_nothing(eggs):
+    requested = ShoppingItem(name="eggs", quantity=12, brand_preference="Vital Farms")
+
+    assert best(make_catalog(eggs), requested, brand_only=True) is None
+
+
+def test_buys_past_the_quantity_to_reach_a_coupon_threshold():
+    """$2 off 3 cups: 3 cups ($1.00) beat the 2 asked for ($2.00)."""
+    cups = [make_item("Yogurt Cup", 1, 1.00, brand="Chobani")]
+    coupon = make_coupon("three-cups", "yogurt", 2.00, min_quantity=3)
+    catalog = make_catalog(cups, [coupon])
+
+    assert catalog.mixer.price_line(cups[0], 3).final_cents == 100
+    purchase = best(catalog, ShoppingItem(name="yogurt", quantity=2))
+    assert bought(purchase) == [("Chobani", 1, 3)]
+    assert purchase.final_cents == 100
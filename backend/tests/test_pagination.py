@@ -0,0 +1,59 @@
+"""
+Coupon Sentinel - Pagination Tests
+
+Cursor pagination of the catalog listings over the prebuilt orderings.
+"""
+
+import pytest
+from backend.engines.catalog_index import encode_cursor
+from backend.providers import get_catalog
+from .conftest import make_catalog, make_item
+
+
+def test_cursors_walk_every_item_once():
+    catalog = make_catalog([make_item(f"Item {n}", 1, 1.00 + n / 100) for n in range(7)])
+    seen, cursor = [], None
+    while True:
+        page = catalog.page_items(sort="price", limit=3, cursor=cursor)
+        seen.extend(row["id"] for row in page.rows)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert page.total == 7
+    assert seen == [item.item_id for item in catalog.store_items]
+
+
+def test_descending_pages_reverse_the_order():
+    catalog = make_catalog([make_item(f"Item {n}", 1, 1.00 + n / 100) for n in range(4)])
+    first = catalog.page_items(sort="price", descending=True, limit=2)
+    second = catalog.page_items(sort="price", descending=True, limit=2, cursor=first.next_cursor)
+
+    prices = [row["price"] for row in first.rows + second.rows]
+    assert prices == [1.03, 1.02, 1.01, 1.00]
+    assert second.next_cursor is None
+
+
+def test_cursor_from_another_version_is_rejected():
+    old = make_catalog([make_item("Milk", 1, 3.00, unit="gallon")])
+    new = make_catalog([make_item("Milk", 1, 3.10, unit="gallon")])
+
+    with pytest.raises(ValueError, match="older catalog"):
+        new.page_items(cursor=encode_cursor(old.version, 1))
+    with pytest.raises(ValueError, match="Malformed"):
+        new.page_items(cursor="not-a-cursor")
+
+
+def test_items_endpoint_paginates(client):
+    first = client.get("/api/items", params={"limit": 5}).json()
+    second = client.get("/api/items", params={"limit": 5, "cursor": first["next_cursor"]}).json()
+
+    ids = [row["id"] for row in first["items"] + second["items"]]
+    assert len(ids) == len(set(ids)) == 10
+    assert first["total"] == len(get_catalog().store_items)
+
+
+def test_bad_cursor_is_a_400(client):
+    response = client.get("/api/items", params={"cursor": "bogus"})
+
+    assert response.status_code == 400
@@ -0,0 +1,75 @@
+"""
+Coupon Sentinel - Plan Frontier Tests
+
+Pareto-optimal plans over total cost, store stops and brand preference,
+checked against brute force on a small catalog.
+"""
+
+from itertools import product
+from backend.models import OptimizeRequest, ShoppingItem
+from backend.engines.pareto import optimize_frontier
+from .conftest import make_catalog, make_item
+
+
+ITEMS = [
+    make_item("Whole Milk", 1, 3.48, unit="gallon"),
+    make_item("Whole Milk", 1, 2.99, store="Target", brand="Good & Gather", unit="gallon"),
+    make_item("Whole Milk", 1, 4.49, store="Target", brand="Horizon", unit="gallon"),
+    make_item("Large Eggs", 12, 2.50),
+    make_item("Large Eggs", 12, 3.19, store="Target", brand="Good & Gather"),
+    make_item("White Bread", 20, 1.50, unit="oz", category="bakery"),
+    make_item("White Bread", 20, 2.10, store="Costco", brand="Kirkland Signature", unit="oz", category="bakery"),
+]
+
+
+def frontier(*entries):
+    catalog = make_catalog(ITEMS)
+    request = OptimizeRequest(shopping_list=list(entries), zip_code="94105")
+    return [
+        (plan.grand_total, plan.store_count, plan.brand_violations)
+        for plan in optimize_frontier(request, catalog.store_items, catalog.coupons, matcher=catalog.matcher)
+    ]
+
+
+def test_frontier_trades_cost_against_stops():
+    plans = frontier(ShoppingItem(name="milk"), ShoppingItem(name="eggs"))
+
+    # Milk at Target and eggs at Walmart is cheapest; Walmart alone is one stop
+    assert plans == [(5.49, 2, 0), (5.98, 1, 0)]
+
+
+def test_brand_preference_adds_a_dimension():
+    plans = frontier(ShoppingItem(name="milk", brand_preference="Horizon"), ShoppingItem(name="eggs"))
+
+    assert plans == [(5.49, 2, 1), (5.98, 1, 1), (6.99, 2, 0), (7.68, 1, 0)]
+
+
+def test_inflexible_entries_only_take_their_brand():
+    plans = frontier(ShoppingItem(name="milk", brand_preference="Horizon", flexible=False), ShoppingItem(name="eggs"))
+
+    assert plans == [(6.99, 2, 0), (7.68, 1, 0)]
+
+
+def test_frontier_matches_brute_force():
+    """Every non-dominated combination of per-store choices is on the frontier."""
+    options = {
+        "milk": [("Walmart", 3.48, 1), ("Target", 2.99, 1), ("Target", 4.49, 0)],
+        "eggs": [("Walmart", 2.50, 0), ("Target", 3.19, 0)],
+        "bread": [("Walmart", 1.50, 0), ("Costco", 2.10, 0)],
+    }
+    points = set()
+    for choice in product(*options.values()):
+        points.add((
+            round(sum(cost for _, cost, _ in choice), 2),
+            len({store for store, _, _ in choice}),
+            sum(violation for _, _, violation in choice),
+        ))
+    expected = sorted(
+        p for p in points
+        if not any(q != p and q[0] <= p[0] and q[1] <= p[1] and q[2] <= p[2] for q in points)
+    )
+
+    plans = frontier(
+        ShoppingItem(name="milk", brand_preference="Horizon"), ShoppingItem(name="eggs"), ShoppingItem(name="bread"),
+    )
+    assert sorted(plans) == expected
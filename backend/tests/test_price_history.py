@@ -0,0 +1,133 @@
+"""
+Coupon Sentinel - Price History Tests
+
+Run-length compaction, rollups and recording each catalog version once.
+"""
+
+from datetime import datetime, timedelta, timezone
+import pytest
+from backend.storage.price_history import PriceHistory
+
+
+START = datetime(2026, 1, 5, tzinfo=timezone.utc)
+REGULAR = (100, None, 120)
+SALE = (90, None, 120)
+
+
+@pytest.fixture
+def history(tmp_path):
+    store = PriceHistory(tmp_path / "history.db")
+    yield store
+    store.close()
+
+
+def at(hours):
+    return START + timedelta(hours=hours)
+
+
+def prices(history, item_id):
+    """(price, observations) per run, oldest first."""
+    return [(run["price"], run["observations"]) for run in history.history(item_id)]
+
+
+def test_unchanged_prices_extend_one_run(history):
+    for hour in range(3):
+        history.record([("milk", REGULAR)], at(hour))
+
+    [run] = history.history("milk")
+    assert (run["from"], run["to"]) == (at(0).isoformat(), at(2).isoformat())
+    assert run["observations"] == 3
+
+
+def test_price_changes_start_new_runs(history):
+    started = [history.record([("milk", key)], at(hour)) for hour, key in enumerate([REGULAR, SALE, SALE, REGULAR])]
+
+    assert started == [1, 1, 0, 1]
+    assert prices(history, "milk") == [(1.00, 1), (0.90, 2), (1.00, 1)]
+
+
+def test_out_of_order_observations_are_dropped(history):
+    history.record([("milk", REGULAR)], at(5))
+
+    assert history.record([("milk", SALE)], at(1)) == 0
+    assert prices(history, "milk") == [(1.00, 1)]
+
+
+def test_repeated_items_in_one_write_are_recorded_in_order(history):
+    history.record([("milk", SALE), ("milk", SALE), ("eggs", REGULAR)], at(0))
+
+    assert prices(history, "milk") == [(0.90, 2)]
+    assert prices(history, "eggs") == [(1.00, 1)]
+
+
+def test_daily_rollups(history):
+    for hour, key in enumerate([REGULAR, SALE, SALE, REGULAR]):
+        history.record([("milk", key)], at(hour))
+
+    [day] = history.history("milk", resolution="day")
+    assert (day["min"], day["max"], day["close"], day["observations"]) == (0.90, 1.00, 1.00, 4)
+    assert day["mean"] == 0.95
+
+
+def test_each_catalog_version_is_recorded_once(tmp_path):
+    """Workers sharing the file record a version only the first time it loads."""
+    worker_a = PriceHistory(tmp_path / "history.db")
+    worker_b = PriceHistory(tmp_path / "history.db")
+    try:
+        assert worker_a.record([("milk", REGULAR)], at(0), "v1") == 1
+        assert worker_b.record([("milk", REGULAR)], at(0), "v1") == 0
+        # worker_b compacts against the run worker_a started
+        assert worker_b.record([("milk", SALE)], at(1), "v2") == 1
+        assert worker_a.record([("milk", SALE)], at(1), "v2") == 0
+        # A version coming back after a change is a new observation
+        assert worker_a.record([("milk", REGULAR)], at(2), "v1") == 1
+
+        assert prices(worker_a, "milk") == [(1.00, 1), (0.90, 1), (1.00, 1)]
+    finally:
+        worker_a.close()
+        worker_b.close()
+
+
+def test_has_item(history):
+    history.record([("milk", REGULAR)], at(0))
+
+    assert history.has_item("milk")
+    assert not history.has_item("eggs")
+
+
+def test_backdated_observation_counts_towards_the_run_it_falls_in(history):
+    history.record([("milk", REGULAR)], at(0))
+    history.record([("milk", REGULAR)], at(10))
+
+    assert history.record_at([("milk", REGULAR)], at(4)) == (1, 0)
+    assert prices(history, "milk") == [(1.00, 3)]
+
+
+def test_backdated_price_change_becomes_its_own_run(history):
+    history.record([("milk", REGULAR)], at(0))
+    history.record([("milk", REGULAR)], at(10))
+
+    assert history.record_at([("milk", SALE)], at(4)) == (1, 1)
+    assert prices(history, "milk") == [(1.00, 2), (0.90, 1)]
+    # The run seen last is still the newest: an unchanged load extends it
+    assert history.record([("milk", REGULAR)], at(11)) == 0
+    assert prices(history, "milk") == [(1.00, 3), (0.90, 1)]
+    assert [run["price"] for run in history.history("milk", start=at(5))] == [1.00]
+
+
+def test_backdated_observation_extends_a_neighbour_across_a_gap(history):
+    history.record([("milk", REGULAR)], at(0))
+    history.record([("milk", SALE)], at(10))
+
+    assert history.record_at([("milk", SALE)], at(6)) == (1, 0)
+    [regular, sale] = history.history("milk")
+    assert (sale["from"], sale["observations"]) == (at(6).isoformat(), 2)
+
+
+def test_backdated_observation_keeps_the_days_close(history):
+    history.record([("milk", REGULAR)], at(0))
+    history.record([("milk", REGULAR)], at(10))
+    history.record_at([("milk", SALE)], at(4))
+
+    [day] = history.history("milk", resolution="day")
+    assert (day["min"], day["close"], day["observations"]) == (0.90, 1.00, 3)
@@ -0,0 +1,61 @@
+"""
+Coupon Sentinel - Price Prediction Tests
+
+Sale-cycle fitting and the nightly batch over recorded history.
+"""
+
+from datetime import datetime, timedelta, timezone
+import pytest
+from backend.engines.price_prediction import (
+    LOOKBACK_DAYS, fit_series, get_prediction_table, prediction_note, run_prediction_batch,
+)
+from backend.storage.price_history import PriceHistory
+
+
+NOW = datetime(2026, 10, 19, tzinfo=timezone.utc)
+
+
+def sale_cycle(days, period=14, sale_days=3, regular=400, sale=300):
+    """Daily closes with a sale for the first `sale_days` of every period."""
+    return [sale if day % period < sale_days else regular for day in range(days)]
+
+
+@pytest.fixture
+def history(tmp_path):
+    store = PriceHistory(tmp_path / "history.db")
+    yield store
+    store.close()
+
+
+def test_regular_cycle_predicts_the_next_sale():
+    closes = sale_cycle(120)
+    prediction = fit_series("milk", closes)
+
+    assert prediction is not None
+    assert (prediction.current_cents, prediction.expected_cents) == (400, 300)
+    assert prediction.confidence == 1.0
+    # Sales start every 14 days; day 119 is 7 days before the next one
+    assert prediction.days_until == 7
+
+
+def test_no_prediction_while_on_sale_or_without_a_cycle():
+    assert fit_series("milk", sale_cycle(113)) is None
+    assert fit_series("milk", [400] * 120) is None
+    assert fit_series("milk", sale_cycle(40)) is None
+
+
+def test_batch_fills_gaps_and_skips_flat_prices(history):
+    start = NOW - timedelta(days=LOOKBACK_DAYS)
+    closes = sale_cycle(LOOKBACK_DAYS + 1)
+    for day, close in enumerate(closes):
+        # Unchanged days are sometimes not observed at all
+        if day % 5 == 4 and close == closes[day - 1]:
+            continue
+        history.record([("walmart:milk", (close, None, None)), ("walmart:eggs", (500, None, None))],
+                       start + timedelta(days=day))
+
+    assert run_prediction_batch(history, NOW) == 1
+    table = get_prediction_table(history)
+    assert set(table) == {"walmart:milk"}
+    assert table["walmart:milk"] == fit_series("walmart:milk", closes)
+    assert prediction_note(table["walmart:milk"]).startswith("Likely cheaper in")
@@ -0,0 +1,98 @@
+"""
+Coupon Sentinel - Price Zone Tests
+
+Zone and store price overrides over the chain-level catalog.
+"""
+
+import json
+import logging
+import pytest
+from backend.models import OptimizeRequest, ShoppingItem
+from backend.engines.catalog_index import CatalogIndex
+from backend.engines.locality import LocalityIndex, StoreLocation
+from backend.engines.price_zones import validate_override
+from backend.providers.zones import load_overrides
+from .conftest import make_item
+
+
+MILK = make_item("Whole Milk", 1, 3.48, unit="gallon")
+EGGS = make_item("Large Eggs", 12, 3.00)
+STORE_ZONES = {"walmart-uptown": "walmart", "walmart-downtown": "walmart", "walmart-airport": "walmart"}
+
+
+def zoned(zone_overrides=None, store_overrides=None):
+    return CatalogIndex(
+        [MILK, EGGS], [], best_buy_terms=(), store_zones=STORE_ZONES,
+        zone_overrides=zone_overrides, store_overrides=store_overrides,
+    ).zones
+
+
+def prices(view):
+    return {item.item_id: item.price for item in view.store_items}
+
+
+def test_stores_without_overrides_share_the_catalog():
+    zones = zoned(store_overrides={"walmart-uptown": {MILK.item_id: {"price": 3.98}}})
+
+    assert zones.view(["walmart-downtown"]) is zones.shared
+    assert prices(zones.view(["walmart-uptown"])) == {MILK.item_id: 3.98, EGGS.item_id: 3.00}
+    # The catalog's own record is untouched
+    assert MILK.price == 3.48
+
+
+def test_store_overrides_layer_on_their_zone():
+    zones = zoned(
+        zone_overrides={"walmart": {MILK.item_id: {"price": 3.68, "regular_price": 3.98}, EGGS.item_id: None}},
+        store_overrides={"walmart-airport": {MILK.item_id: {"price": 4.28}}},
+    )
+
+    downtown = zones.view(["walmart-downtown"])
+    assert prices(downtown) == {MILK.item_id: 3.68}
+    [milk] = zones.view(["walmart-airport"]).store_items
+    assert (milk.price, milk.regular_price) == (4.28, 3.98)
+    # Items a zone does not carry are not matched there either
+    assert downtown.matcher.match_items(ShoppingItem(name="eggs", quantity=12)) == []
+
+
+def test_request_is_priced_at_the_nearest_location_of_each_chain():
+    zones = zoned(store_overrides={"walmart-uptown": {MILK.item_id: {"price": 2.98}}})
+    locality = LocalityIndex(
+        [
+            StoreLocation("walmart-uptown", "Walmart", "Uptown", "10001", 40.75, -73.99),
+            StoreLocation("walmart-downtown", "Walmart", "Downtown", "10004", 40.70, -74.01),
+        ],
+        {"10001": (40.75, -73.99), "10004": (40.70, -74.01)},
+    )
+
+    def request(zip_code):
+        return OptimizeRequest(shopping_list=[ShoppingItem(name="milk", quantity=1)], zip_code=zip_code)
+
+    assert prices(zones.for_request(request("10001"), locality))[MILK.item_id] == 2.98
+    assert zones.for_request(request("10004"), locality) is zones.shared
+
+
+@pytest.mark.parametrize("updates", [{"brand": "X"}, {"price": "cheap"}, {"price": None}, [3.49]])
+def test_invalid_overrides_are_rejected(updates):
+    with pytest.raises(ValueError):
+        validate_override(updates)
+    with pytest.raises(ValueError):
+        zoned(store_overrides={"walmart-uptown": {MILK.item_id: updates}})
+
+
+def test_invalid_entries_are_skipped_when_loading(tmp_path, caplog):
+    path = tmp_path / "store_price_overrides.json"
+    path.write_text(json.dumps({
+        "walmart-uptown": {
+            MILK.item_id: {"price": "3.49"},
+            EGGS.item_id: {"brand": "X"},
+            "walmart:gone": None,
+        },
+    }))
+
+    with caplog.at_level(logging.WARNING):
+        overrides = load_overrides(path)
+
+    assert overrides == {"walmart-uptown": {MILK.item_id: {"price": 3.49}, "walmart:gone": None}}
+    assert "Cannot override fields: brand" in caplog.text
+    # What was loaded prices a store without errors
+    assert prices(zoned(store_overrides=overrides).view(["walmart-uptown"]))[MILK.item_id] == 3.49
@@ -0,0 +1,106 @@
+"""
+Coupon Sentinel - Provider Cache Tests
+
+Stale-while-revalidate serving, coalesced misses and warm restarts.
+"""
+
+import asyncio
+import pytest
+from backend.providers import cache
+from backend.providers.base import StoreData
+from backend.providers.cache import ProviderCache
+from backend.storage.provider_cache import ProviderCacheStore
+from .conftest import make_coupon, make_item
+
+
+KEY = ("fake", "Walmart", "94105")
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+class Upstream:
+    """A provider fetch returning a new price on every call."""
+
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        items = [make_item("Large Eggs", 12, 3.00 + self.calls / 100)]
+        return StoreData("fake", "Walmart", "94105", items, [make_coupon("eggs-off", "eggs", 0.50)])
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", clock)
+    return clock
+
+
+def price(data):
+    return data.items[0].price
+
+
+@pytest.mark.asyncio
+async def test_fresh_entries_are_served_from_memory(clock):
+    provider_cache, upstream = ProviderCache(ttls={}, default_ttl=60), Upstream()
+
+    assert price(await provider_cache.get(KEY, upstream)) == 3.01
+    clock.now += 59
+    assert price(await provider_cache.get(KEY, upstream)) == 3.01
+    assert upstream.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_entries_are_served_while_one_refresh_runs(clock):
+    provider_cache, upstream = ProviderCache(ttls={"walmart": 60}, default_ttl=3600, max_stale=600), Upstream()
+    await provider_cache.get(KEY, upstream)
+    clock.now += 61
+
+    stale = await asyncio.gather(*(provider_cache.get(KEY, upstream) for _ in range(3)))
+    assert [price(data) for data in stale] == [3.01] * 3
+    # Let the background refresh finish
+    await asyncio.sleep(0.01)
+    assert price(await provider_cache.get(KEY, upstream)) == 3.02
+    assert upstream.calls == 2
+
+    # Too stale to serve: the caller waits for fresh data
+    clock.now += 601
+    assert price(await provider_cache.get(KEY, upstream)) == 3.03
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_fetch(clock):
+    provider_cache, upstream = ProviderCache(ttls={}), Upstream(delay=0.01)
+
+    results = await asyncio.gather(*(provider_cache.get(KEY, upstream) for _ in range(5)))
+    assert upstream.calls == 1
+    assert {price(data) for data in results} == {3.01}
+    assert provider_cache.stats["coalesced"] == 4
+
+
+@pytest.mark.asyncio
+async def test_restart_serves_persisted_data(clock, tmp_path):
+    store = ProviderCacheStore(tmp_path / "provider_cache.db")
+    try:
+        await ProviderCache(store, ttls={}).get(KEY, Upstream())
+
+        restarted, upstream = ProviderCache(store, ttls={}), Upstream()
+        data = await restarted.get(KEY, upstream)
+        assert (price(data), upstream.calls) == (3.01, 0)
+        assert data.coupons[0].id == "eggs-off"
+
+        restarted.invalidate(KEY)
+        clock.now += 1
+        assert price(await restarted.get(KEY, upstream)) == 3.01
+        assert upstream.calls == 1
+    finally:
+        store.close()
@@ -0,0 +1,52 @@
+"""
+Coupon Sentinel - Rebate Tests
+
+Rebates from the shopper's apps attached while pricing, and ranking net of them.
+"""
+
+from backend.models import CouponType, OptimizeRequest, ShoppingItem
+from backend.engines.pricing_engine import optimize_shopping_list
+from .conftest import make_catalog, make_coupon, make_item
+
+
+ITEMS = [
+    make_item("Large Eggs", 12, 3.00),
+    make_item("Large Eggs", 12, 3.30, brand="Eggland's Best"),
+]
+REBATES = [
+    make_coupon("ibotta-eggland", "eggland", 0.75, coupon_type=CouponType.REBATE, source="Ibotta"),
+    make_coupon("fetch-eggland", "eggland", 0.10, coupon_type=CouponType.REBATE, source="Fetch"),
+]
+
+
+def optimize(**fields):
+    catalog = make_catalog(ITEMS, REBATES)
+    request = OptimizeRequest(shopping_list=[ShoppingItem(name="eggs", quantity=12)], zip_code="94105", **fields)
+    return optimize_shopping_list(request, catalog.store_items, catalog.coupons, matcher=catalog.matcher)
+
+
+def chosen_brand(result):
+    [plan] = result.plans
+    [item] = plan.items
+    return item.chosen_product.brand
+
+
+def test_rebates_only_from_the_shoppers_apps():
+    result = optimize(rebate_apps=["ibotta"], rank_by_net_cost=True)
+
+    assert chosen_brand(result) == "Eggland's Best"
+    assert [(r.app, r.rebate_amount) for r in result.rebate_opportunities] == [("Ibotta", 0.75)]
+
+
+def test_ranking_by_shelf_cost_ignores_rebates():
+    result = optimize(rebate_apps=["Ibotta"])
+
+    assert chosen_brand(result) == "Great Value"
+    assert result.rebate_opportunities == []
+
+
+def test_no_apps_no_rebates():
+    result = optimize(rank_by_net_cost=True)
+
+    assert chosen_brand(result) == "Great Value"
+    assert result.rebate_opportunities == []
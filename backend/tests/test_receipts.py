@@ -0,0 +1,56 @@
+"""
+Coupon Sentinel - Receipt Tests
+
+Matching receipt lines to catalog products and recording what was paid.
+"""
+
+from datetime import datetime, timedelta, timezone
+import pytest
+from backend.engines.receipts import ParsedReceipt, ReceiptLine, ingest_receipt
+from backend.storage.price_history import PriceHistory
+from .conftest import make_catalog, make_item
+
+
+MILK = make_item("Whole Milk", 1, 3.48, unit="gallon")
+EGGS = make_item("Large Eggs", 12, 3.00)
+NOW = datetime.now(timezone.utc)
+
+
+@pytest.fixture
+def history(tmp_path):
+    store = PriceHistory(tmp_path / "history.db")
+    yield store
+    store.close()
+
+
+def seconds(moment):
+    return moment.replace(microsecond=0).isoformat()
+
+
+def receipt(purchased_at, *lines):
+    return ParsedReceipt(
+        store="Walmart", purchased_at=purchased_at.isoformat(),
+        lines=[ReceiptLine(n, desc, 1, price, price, 0.0) for n, (desc, price) in enumerate(lines, 1)],
+        subtotal=None, tax=None, total=None,
+    )
+
+
+def test_receipt_prices_are_recorded_at_the_purchase_date(history):
+    catalog = make_catalog([MILK, EGGS])
+    # The catalog has been loaded since the purchase
+    history.record_items(catalog.store_items, NOW - timedelta(days=1))
+    purchased = NOW - timedelta(days=3)
+
+    stored, _ = ingest_receipt(
+        receipt(purchased, ("GV WHOLE MILK", 2.98), ("LG EGGS", 3.00), ("PAPER TOWELS", 5.00)), catalog, history,
+    )
+
+    assert [line["item_id"] for line in stored["lines"]] == [MILK.item_id, EGGS.item_id, None]
+    # Milk was cheaper then; eggs cost the same, so their run starts earlier
+    assert (stored["recorded_lines"], stored["price_changes"]) == (2, 1)
+    assert [(run["from"], run["price"]) for run in history.history(MILK.item_id)] == [
+        (seconds(purchased), 2.98),
+        (seconds(NOW - timedelta(days=1)), 3.48),
+    ]
+    [eggs] = history.history(EGGS.item_id)
+    assert (eggs["from"], eggs["observations"]) == (seconds(purchased), 2)
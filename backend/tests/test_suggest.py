@@ -0,0 +1,59 @@
+"""
+Coupon Sentinel - Suggestion Tests
+
+Prefix-trie autocomplete over product names, categories and brands.
+"""
+
+from backend.engines.suggest import Suggestion, SuggestionIndex
+from .conftest import make_coupon, make_item
+
+
+def texts(suggestions):
+    return [s.text for s in suggestions]
+
+
+def test_every_word_start_is_indexed():
+    index = SuggestionIndex([Suggestion("Large Grade A Eggs", "product", 1)])
+
+    assert texts(index.suggest("egg")) == ["Large Grade A Eggs"]
+    assert texts(index.suggest("grade a")) == ["Large Grade A Eggs"]
+    assert index.suggest("rade") == []
+
+
+def test_heaviest_first_and_limited():
+    index = SuggestionIndex([Suggestion(f"Milk {n}", "product", n) for n in range(5)], k=3)
+
+    assert texts(index.suggest("milk")) == ["Milk 4", "Milk 3", "Milk 2"]
+    assert texts(index.suggest("milk", limit=1)) == ["Milk 4"]
+    assert len(index.suggest("milk", limit=50)) == 3
+
+
+def test_blank_and_unknown_prefixes():
+    index = SuggestionIndex([Suggestion("Milk", "product", 1)])
+
+    assert index.suggest("   ") == []
+    assert index.suggest("xyz") == []
+    assert texts(index.suggest("  MI")) == ["Milk"]
+
+
+def test_catalog_weights_count_listings_and_coupons():
+    items = [
+        make_item("Whole Milk", 1, 3.48, unit="gallon"),
+        make_item("Whole Milk", 1, 3.99, store="Target", brand="Good & Gather", unit="gallon"),
+        make_item("Whole Wheat Bread", 20, 2.50, unit="oz", category="bakery"),
+    ]
+    index = SuggestionIndex.from_catalog(items, [make_coupon("bread-off", "bread", 0.50)])
+    by_text = {(s.text, s.kind): s.weight for s in index.suggest("w")}
+
+    assert by_text[("Whole Milk", "product")] == 2
+    # One listing plus a coupon on one of its words
+    assert by_text[("Whole Wheat Bread", "product")] == 3
+    assert texts(index.suggest("good")) == ["Good & Gather"]
+
+
+def test_suggest_endpoint(client):
+    response = client.get("/api/suggest", params={"q": "mil", "limit": 3}).json()
+
+    assert response["count"] == len(response["suggestions"]) <= 3
+    assert all("mil" in s["text"].lower() for s in response["suggestions"])
+    assert client.get("/api/suggest", params={"q": ""}).status_code == 422
@@ -0,0 +1,65 @@
+"""
+Coupon Sentinel - Unit Normalization Tests
+
+Canonical base quantities, packages needed and comparable unit prices.
+"""
+
+import pytest
+from backend.models import ShoppingItem
+from backend.engines.units import (
+    COUNT, MASS, VOLUME, base_unit, comparable_unit_price, compatible, packages_needed, to_base,
+)
+from .conftest import make_item
+
+
+@pytest.mark.parametrize("quantity, unit, dimension, amount", [
+    (1, "gallon", VOLUME, 128.0),
+    (2, "Gallons", VOLUME, 256.0),
+    (1.5, "lbs", MASS, 24.0),
+    (1, "dozen", COUNT, 12.0),
+    (12, "fl oz", VOLUME, 12.0),
+])
+def test_to_base(quantity, unit, dimension, amount):
+    canonical = to_base(quantity, unit)
+
+    assert (canonical.dimension, canonical.amount) == (dimension, amount)
+
+
+def test_unknown_units():
+    assert to_base(1, "bunch") is None
+
+
+def test_bare_ounces_bridge_mass_and_volume():
+    assert compatible(to_base(16, "oz"), to_base(1, "pint"))
+    assert not compatible(to_base(1, "lb"), to_base(1, "pint"))
+    assert not compatible(to_base(1, "dozen"), to_base(1, "lb"))
+
+
+@pytest.mark.parametrize("quantity, unit, size, package_unit, packages", [
+    (12, "count", 12, "count", 1),     # float noise does not add a package
+    (1, "dozen", 18, "count", 1),
+    (30, "count", 12, "count", 3),
+    (1, "gallon", 64, "fl oz", 2),
+    (2, "lb", 24, "oz", 2),
+])
+def test_packages_needed(quantity, unit, size, package_unit, packages):
+    requested = ShoppingItem(name="x", quantity=quantity, unit=unit)
+    product = make_item("x", size, 1.00, unit=package_unit)
+
+    assert packages_needed(requested, product) == packages
+
+
+def test_incomparable_units_buy_one_package_per_unit():
+    requested = ShoppingItem(name="chicken", quantity=3, unit="count")
+    product = make_item("Chicken Breast", 2, 8.00, unit="lb")
+
+    assert packages_needed(requested, product) == 3
+
+
+def test_comparable_unit_price_across_pack_sizes():
+    gallon = make_item("Milk", 1, 3.84, unit="gallon")
+    half = make_item("Milk", 64, 2.56, unit="fl oz")
+
+    assert comparable_unit_price(gallon) == pytest.approx(0.03)
+    assert comparable_unit_price(half) == pytest.approx(0.04)
+    assert base_unit(gallon) == base_unit(half) == "fl oz"
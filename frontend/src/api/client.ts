@@ -8,6 +8,7 @@ import type {
   StoresResponse,
   ItemsResponse,
   CouponsResponse,
+  SuggestResponse,
 } from '../types';
 
 // Use relative URL in development (Vite proxy handles it)
@@ -90,6 +91,17 @@ export async function getCoupons(
   return fetchAPI<CouponsResponse>(`/api/coupons${query ? `?${query}` : ''}`);
 }
 
+/**
+ * Get autocomplete suggestions for a typed prefix
+ */
+export async function getSuggestions(
+  query: string,
+  limit = 8
+): Promise<SuggestResponse> {
+  const params = new URLSearchParams({ q: query, limit: String(limit) });
+  return fetchAPI<SuggestResponse>(`/api/suggest?${params.toString()}`);
+}
+
 /**
  * Health check
  */
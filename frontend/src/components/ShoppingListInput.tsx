@@ -1,5 +1,6 @@
-import { useState } from 'react';
-import type { ShoppingItem } from '../types';
+import { useEffect, useState } from 'react';
+import type { ShoppingItem, Suggestion } from '../types';
+import { getSuggestions } from '../api/client';
 
 interface Props {
   items: ShoppingItem[];
@@ -11,6 +12,28 @@ export function ShoppingListInput({ items, onAdd, onRemove }: Props) {
   const [name, setName] = useState('');
   const [quantity, setQuantity] = useState(1);
   const [unit, setUnit] = useState('count');
+  const [suggestions, setSuggestions] = useState<Suggestion[]>([]);
+
+  useEffect(() => {
+    const query = name.trim();
+    if (!query) {
+      setSuggestions([]);
+      return;
+    }
+
+    let cancelled = false;
+    getSuggestions(query)
+      .then((res) => {
+        if (!cancelled) setSuggestions(res.suggestions);
+      })
+      .catch(() => {
+        if (!cancelled) setSuggestions([]);
+      });
+
+    return () => {
+      cancelled = true;
+    };
+  }, [name]);
 
   const handleAdd = () => {
     if (!name.trim()) return;
@@ -45,7 +68,14 @@ export function ShoppingListInput({ items, onAdd, onRemove }: Props) {
           onChange={(e) => setName(e.target.value)}
           onKeyDown={handleKeyDown}
           className="item-name-input"
+          list="item-suggestions"
+          autoComplete="off"
         />
+        <datalist id="item-suggestions">
+          {suggestions.map((s) => (
+            <option key={`${s.kind}:${s.text}`} value={s.text} />
+          ))}
+        </datalist>
 
         <div className="quantity-group">
           <input
@@ -63,7 +93,9 @@ export function ShoppingListInput({ items, onAdd, onRemove }: Props) {
           >
             <option value="count">count</option>
             <option value="lb">lb</option>
+            <option value="dozen">dozen</option>
             <option value="oz">oz</option>
+            <option value="fl oz">fl oz</option>
             <option value="gallon">gallon</option>
           </select>
         </div>
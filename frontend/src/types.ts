@@ -20,6 +20,7 @@ export interface OptimizeRequest {
   preferred_stores: string[];
   allow_multi_store: boolean;
   rebate_apps: string[];
+  loyalty_memberships?: string[];
 }
 
 // ============================================================================
@@ -34,6 +35,7 @@ export interface StoreItem {
   package_unit: string;
   price: number;
   regular_price?: number;
+  loyalty_price?: number;
   category: string;
   unit_price: number;
   in_stock: boolean;
@@ -101,9 +103,13 @@ export interface ItemsResponse {
     price: number;
     size: string;
     unit_price: number;
+    base_unit: string;
+    base_unit_price: number;
     category: string;
   }[];
   count: number;
+  total: number;
+  next_cursor: string | null;
 }
 
 export interface CouponsResponse {
@@ -117,6 +123,20 @@ export interface CouponsResponse {
     source: string;
   }[];
   count: number;
+  total: number;
+  next_cursor: string | null;
+}
+
+export interface Suggestion {
+  text: string;
+  kind: 'product' | 'category' | 'brand';
+  weight: number;
+}
+
+export interface SuggestResponse {
+  query: string;
+  suggestions: Suggestion[];
+  count: number;
 }
 
 // ============================================================================